@@ -0,0 +1,73 @@
+"""
+_export_with_animations.py
+==========================
+Blender Python script — launched by generate_animations.py, not run directly:
+    blender --background scene.blend --python _export_with_animations.py -- OUTPUT.glb
+
+Exports the armature and its skinned mesh from the saved animation scene
+as a GLB with NLA-strip animations, then runs it through gltfpack. Running
+the export in a fresh Blender process keeps the exporter's memory out of
+the authoring session.
+"""
+
+import bpy
+import os
+import shutil
+import subprocess
+import sys
+
+
+def optimize_glb(filepath):
+    """
+    Post-process the animated export with gltfpack (meshoptimizer): vertex
+    cache/fetch reordering plus KHR_mesh_quantization for normals, UVs and
+    skin weights, and quantized animation tracks. The default 30 Hz
+    resampling matches the FPS the clips are keyed at. No -c/-cc -- glTFast
+    in the Unity project has no meshopt decoder. -vpf keeps positions float
+    like the other exports, -kn keeps the bone and mesh node names that
+    Mecanim maps by. Skipped if gltfpack is not on PATH.
+    """
+    gltfpack = shutil.which("gltfpack")
+    if gltfpack is None:
+        print("  gltfpack not found, skipping mesh optimization")
+        return
+    subprocess.run([gltfpack, "-i", filepath, "-o", filepath, "-vpf", "-kn"], check=True)
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if not argv:
+        print("ERROR: No output path given.")
+        sys.exit(1)
+    output_path = argv[0]
+
+    arm_obj = next((o for o in bpy.data.objects if o.type == 'ARMATURE'), None)
+    if arm_obj is None:
+        print("ERROR: No armature found in scene.")
+        sys.exit(1)
+
+    for obj in bpy.context.view_layer.objects:
+        obj.select_set(obj == arm_obj or obj.parent == arm_obj)
+    bpy.context.view_layer.objects.active = arm_obj
+
+    bpy.ops.export_scene.gltf(
+        filepath=output_path,
+        export_format='GLB',
+        use_selection=True,
+        export_apply=False,
+        export_yup=True,
+        export_materials='EXPORT',
+        export_skins=True,
+        export_all_influences=True,
+        export_animations=True,
+        export_nla_strips=True,
+    )
+    optimize_glb(output_path)
+
+    file_size = os.path.getsize(output_path)
+    print(f"  Exported: {output_path}")
+    print(f"  File size: {file_size / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,8 +13,16 @@ Must be run AFTER rig_and_export.py.
 import bpy
 import math
 import os
+import subprocess
 import sys
-from mathutils import Euler
+import tempfile
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; fall back to the NumPy kernel
+    njit = None
+    prange = range
 
 # ---------------------------------------------------------------------------
 # Config
@@ -23,8 +31,20 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 EXPORT_DIR = os.path.join(SCRIPT_DIR, "..", "exports")
 INPUT_PATH = os.path.join(EXPORT_DIR, "humanoid_rigged.glb")
 OUTPUT_PATH = os.path.join(EXPORT_DIR, "humanoid_rigged.glb")  # overwrite
+EXPORT_SCRIPT = os.path.join(SCRIPT_DIR, "_export_with_animations.py")
 
 FPS = 30
+_DEG2RAD = math.pi / 180.0
+
+# Keyframes are collected here by set_bone_rotation / set_bone_location and
+# written to the action in one go by flush_keys().
+# {(bone_name, data_path, axis): {frame: value}}
+_pending_keys = {}
+
+# Enum values for bulk keyframe setup via foreach_set
+_KEYFRAME_PROPS = bpy.types.Keyframe.bl_rna.properties
+_INTERP_BEZIER = _KEYFRAME_PROPS['interpolation'].enum_items['BEZIER'].value
+_HANDLE_AUTO_CLAMPED = _KEYFRAME_PROPS['handle_left_type'].enum_items['AUTO_CLAMPED'].value
 
 
 # ---------------------------------------------------------------------------
@@ -34,15 +54,64 @@ def clear_scene():
     """Remove all objects from the scene."""
     bpy.ops.object.select_all(action='SELECT')
     bpy.ops.object.delete(use_global=False)
-    for block in bpy.data.meshes:
-        if block.users == 0:
-            bpy.data.meshes.remove(block)
-    for block in bpy.data.armatures:
-        if block.users == 0:
-            bpy.data.armatures.remove(block)
-    for block in bpy.data.actions:
-        if block.users == 0:
-            bpy.data.actions.remove(block)
+    orphans = [b for coll in (bpy.data.meshes, bpy.data.armatures, bpy.data.actions)
+               for b in coll if b.users == 0]
+    bpy.data.batch_remove(ids=orphans)
+
+
+def _nearest_bone_numpy(co, heads, tails):
+    """
+    Index of the closest bone segment for each vertex. Every vertex is
+    projected onto every segment at once as a (V, B) broadcast; a
+    degenerate segment projects onto its head.
+    """
+    ab = tails - heads
+    length_sq = (ab * ab).sum(axis=1)
+    degenerate = length_sq < 1e-8
+    ap = co[:, None, :] - heads[None, :, :]
+    t = np.clip((ap * ab).sum(axis=2) / np.where(degenerate, 1.0, length_sq), 0.0, 1.0)
+    t[:, degenerate] = 0.0
+    # Squared distances give the same argmin
+    offset = ap - t[..., None] * ab
+    return (offset * offset).sum(axis=2).argmin(axis=1)
+
+
+def _nearest_bone_loop(co, heads, tails):
+    """
+    Scalar form of _nearest_bone_numpy for numba to compile. It needs no
+    (V, B, 3) temporaries; ties go to the first bone in both versions.
+    Vertices are independent, so the outer loop runs under prange.
+    """
+    n = co.shape[0]
+    num_bones = heads.shape[0]
+    best = np.zeros(n, dtype=np.int64)
+    for v in prange(n):
+        px, py, pz = co[v, 0], co[v, 1], co[v, 2]
+        best_dist = np.inf
+        for b in range(num_bones):
+            ax, ay, az = heads[b, 0], heads[b, 1], heads[b, 2]
+            abx = tails[b, 0] - ax
+            aby = tails[b, 1] - ay
+            abz = tails[b, 2] - az
+            length_sq = abx * abx + aby * aby + abz * abz
+            t = 0.0
+            if length_sq >= 1e-8:
+                t = ((px - ax) * abx + (py - ay) * aby + (pz - az) * abz) / length_sq
+                t = max(0.0, min(1.0, t))
+            dx = ax + abx * t - px
+            dy = ay + aby * t - py
+            dz = az + abz * t - pz
+            dist = dx * dx + dy * dy + dz * dz
+            if dist < best_dist:
+                best_dist = dist
+                best[v] = b
+    return best
+
+
+if njit is not None:
+    _nearest_bone = njit(cache=True, parallel=True)(_nearest_bone_loop)
+else:
+    _nearest_bone = _nearest_bone_numpy
 
 
 def assign_weights_by_bones(mesh_obj, arm_obj):
@@ -62,34 +131,27 @@ def assign_weights_by_bones(mesh_obj, arm_obj):
     mesh_obj.vertex_groups.clear()
     for bone_name, _, _ in bone_data:
         mesh_obj.vertex_groups.new(name=bone_name)
+    if not bone_data:
+        return
 
-    def closest_point_on_segment(p, a, b):
-        ab = b - a
-        length_sq = ab.length_squared
-        if length_sq < 1e-8:
-            return a
-        t = max(0.0, min(1.0, (p - a).dot(ab) / length_sq))
-        return a + ab * t
-
-    for v in mesh_obj.data.vertices:
-        co = mesh_obj.matrix_world @ v.co
-        best_bone = None
-        best_dist = float('inf')
-        for bone_name, head, tail in bone_data:
-            pt = closest_point_on_segment(co, head, tail)
-            dist = (co - pt).length
-            if dist < best_dist:
-                best_dist = dist
-                best_bone = bone_name
-        if best_bone:
-            vg = mesh_obj.vertex_groups[best_bone]
-            vg.add([v.index], 1.0, 'REPLACE')
+    # World-space vertex positions as a (V, 3) array
+    n = len(mesh_obj.data.vertices)
+    co = np.empty(n * 3, dtype=np.float32)
+    mesh_obj.data.vertices.foreach_get("co", co)
+    mw = np.array(mesh_obj.matrix_world)
+    co = co.reshape(n, 3).astype(np.float64) @ mw[:3, :3].T + mw[:3, 3]
+
+    heads = np.array([h for _, h, _ in bone_data])
+    tails = np.array([t for _, _, t in bone_data])
+    best = _nearest_bone(co, heads, tails)
+
+    for b, (bone_name, _, _) in enumerate(bone_data):
+        indices = np.flatnonzero(best == b)
+        if len(indices):
+            mesh_obj.vertex_groups[bone_name].add(indices.tolist(), 1.0, 'REPLACE')
 
-    total = sum(1 for vg in mesh_obj.vertex_groups
-                for v in mesh_obj.data.vertices
-                for g in v.groups
-                if g.group == vg.index and g.weight > 0.01)
-    print(f"  Reassigned {total} vertex-bone weights across {len(mesh_obj.vertex_groups)} groups")
+    # Every vertex gets exactly one full-weight bone
+    print(f"  Reassigned {n} vertex-bone weights across {len(mesh_obj.vertex_groups)} groups")
 
 
 def import_rigged_model():
@@ -101,19 +163,20 @@ def import_rigged_model():
     bpy.ops.import_scene.gltf(filepath=INPUT_PATH)
 
     arm_obj = None
-    mesh_obj = None
+    meshes = []
     for obj in bpy.data.objects:
         if obj.type == 'ARMATURE':
             arm_obj = obj
         elif obj.type == 'MESH':
-            # Pick the mesh with the most vertices (skip stray primitives)
-            if mesh_obj is None or len(obj.data.vertices) > len(mesh_obj.data.vertices):
-                mesh_obj = obj
+            meshes.append((obj, len(obj.data.vertices)))
+
+    # Pick the mesh with the most vertices (skip stray primitives)
+    mesh_obj = max(meshes, key=lambda m: m[1])[0] if meshes else None
 
     # Delete any stray mesh objects that aren't our main mesh
-    for obj in list(bpy.data.objects):
-        if obj.type == 'MESH' and obj != mesh_obj:
-            print(f"  Removing stray mesh: {obj.name} ({len(obj.data.vertices)} verts)")
+    for obj, num_verts in meshes:
+        if obj is not mesh_obj:
+            print(f"  Removing stray mesh: {obj.name} ({num_verts} verts)")
             bpy.data.objects.remove(obj, do_unlink=True)
 
     if arm_obj is None:
@@ -167,32 +230,35 @@ def import_rigged_model():
     return arm_obj, mesh_obj
 
 
-def rad(degrees):
-    """Convert degrees to radians."""
-    return math.radians(degrees)
+def _queue_key(bone_name, data_path, values, frame):
+    """Queue one keyframe per axis for a pose bone property."""
+    for axis, value in enumerate(values):
+        _pending_keys.setdefault((bone_name, data_path, axis), {})[frame] = value
+
+
+def pose_bone_map(arm_obj):
+    """Look up all pose bones once so the key helpers skip RNA lookups."""
+    return {pb.name: pb for pb in arm_obj.pose.bones}
 
 
-def set_bone_rotation(arm_obj, bone_name, rx_deg, ry_deg, rz_deg, frame):
-    """Set rotation keyframe on a pose bone (euler XYZ, in degrees)."""
-    pose_bone = arm_obj.pose.bones.get(bone_name)
-    if pose_bone is None:
+def set_bone_rotation(bones, bone_name, rx_deg, ry_deg, rz_deg, frame):
+    """Queue rotation keyframe on a pose bone (euler XYZ, in degrees)."""
+    if bone_name not in bones:
         return
-    pose_bone.rotation_mode = 'XYZ'
-    pose_bone.rotation_euler = Euler((rad(rx_deg), rad(ry_deg), rad(rz_deg)))
-    pose_bone.keyframe_insert(data_path="rotation_euler", frame=frame)
+    _queue_key(bone_name, "rotation_euler",
+               (rx_deg * _DEG2RAD, ry_deg * _DEG2RAD, rz_deg * _DEG2RAD), frame)
 
 
-def set_bone_location(arm_obj, bone_name, x, y, z, frame):
-    """Set location keyframe on a pose bone (local offset from rest)."""
-    pose_bone = arm_obj.pose.bones.get(bone_name)
-    if pose_bone is None:
+def set_bone_location(bones, bone_name, x, y, z, frame):
+    """Queue location keyframe on a pose bone (local offset from rest)."""
+    if bone_name not in bones:
         return
-    pose_bone.location = (x, y, z)
-    pose_bone.keyframe_insert(data_path="location", frame=frame)
+    _queue_key(bone_name, "location", (x, y, z), frame)
 
 
 def create_action(arm_obj, name):
     """Create a new action and assign it to the armature."""
+    _pending_keys.clear()
     action = bpy.data.actions.new(name=name)
     if arm_obj.animation_data is None:
         arm_obj.animation_data_create()
@@ -200,8 +266,37 @@ def create_action(arm_obj, name):
     return action
 
 
+def flush_keys(action):
+    """
+    Write all queued keyframes into the action.
+    Each fcurve is created once and filled with a single foreach_set,
+    instead of one keyframe_insert() per key.
+    """
+    for (bone_name, data_path, axis), keys in _pending_keys.items():
+        fc = action.fcurves.new(
+            data_path=f'pose.bones["{bone_name}"].{data_path}',
+            index=axis,
+            action_group=bone_name,
+        )
+        frames = sorted(keys)
+        co = np.empty(len(frames) * 2, dtype=np.float32)
+        co[0::2] = frames
+        co[1::2] = [keys[f] for f in frames]
+        n = len(frames)
+        fc.keyframe_points.add(n)
+        fc.keyframe_points.foreach_set("co", co)
+        fc.keyframe_points.foreach_set(
+            "interpolation", np.full(n, _INTERP_BEZIER, dtype=np.int32))
+        handles = np.full(n, _HANDLE_AUTO_CLAMPED, dtype=np.int32)
+        fc.keyframe_points.foreach_set("handle_left_type", handles)
+        fc.keyframe_points.foreach_set("handle_right_type", handles)
+        fc.update()
+    _pending_keys.clear()
+
+
 def push_to_nla(arm_obj, action, name):
-    """Push the current action to an NLA track."""
+    """Flush queued keys and push the action to an NLA track."""
+    flush_keys(action)
     track = arm_obj.animation_data.nla_tracks.new()
     track.name = name
     strip = track.strips.new(name, 1, action)
@@ -209,11 +304,44 @@ def push_to_nla(arm_obj, action, name):
     arm_obj.animation_data.action = None
 
 
+def mirror_name(bone_name):
+    """Swap the _L / _R suffix of a bone name."""
+    if bone_name.endswith("_L"):
+        return bone_name[:-2] + "_R"
+    if bone_name.endswith("_R"):
+        return bone_name[:-2] + "_L"
+    return bone_name
+
+
+def apply_pose(bones, pose, frame, hips=None, mirror=False):
+    """
+    Queue rotation keys for every bone in a {bone: (rx, ry, rz)} pose dict,
+    plus an optional Hips location. With mirror=True the pose is flipped
+    left/right: sides are swapped and Y/Z rotations negated.
+    """
+    for bone_name, (rx, ry, rz) in pose.items():
+        if mirror:
+            bone_name, ry, rz = mirror_name(bone_name), -ry, -rz
+        set_bone_rotation(bones, bone_name, rx, ry, rz, frame)
+    if hips is not None:
+        x, y, z = hips
+        set_bone_location(bones, "Hips", -x if mirror else x, y, z, frame)
+
+
+def symmetric(pose):
+    """Complete a left-side pose with its mirrored right side."""
+    full = dict(pose)
+    for bone_name, (rx, ry, rz) in pose.items():
+        if bone_name.endswith("_L"):
+            full[mirror_name(bone_name)] = (rx, -ry, -rz)
+    return full
+
+
 def reset_pose(arm_obj):
     """Reset all pose bones to rest position."""
     for pb in arm_obj.pose.bones:
         pb.rotation_mode = 'XYZ'
-        pb.rotation_euler = Euler((0, 0, 0))
+        pb.rotation_euler = (0, 0, 0)
         pb.location = (0, 0, 0)
 
 
@@ -224,22 +352,28 @@ def create_idle(arm_obj):
     """Subtle breathing / sway animation."""
     action = create_action(arm_obj, "Idle")
     reset_pose(arm_obj)
-
-    # Keyframe pattern: rest → peak → rest (looping)
-    # Frames: 1, 30, 60
-    for frame in [1, 60]:  # rest frames (loop boundary)
-        set_bone_rotation(arm_obj, "Spine", 0, 0, 0, frame)
-        set_bone_rotation(arm_obj, "Chest", 0, 0, 0, frame)
-        set_bone_rotation(arm_obj, "Head", 0, 0, 0, frame)
-        set_bone_rotation(arm_obj, "UpperArm_L", 0, 0, 0, frame)
-        set_bone_rotation(arm_obj, "UpperArm_R", 0, 0, 0, frame)
-
-    # Breathing peak at frame 30
-    set_bone_rotation(arm_obj, "Spine", 2, 0, 0, 30)
-    set_bone_rotation(arm_obj, "Chest", -1.5, 0, 0, 30)
-    set_bone_rotation(arm_obj, "Head", -1, 0, 0, 30)
-    set_bone_rotation(arm_obj, "UpperArm_L", 0, 0, 1, 30)
-    set_bone_rotation(arm_obj, "UpperArm_R", 0, 0, -1, 30)
+    bones = pose_bone_map(arm_obj)
+
+    # Keyframe pattern: rest → peak, mirrored by a Cycles modifier so the
+    # curve returns to rest at frame 60 without a duplicate boundary key.
+    # Rest at frame 1, breathing peak half-way through the 59-frame loop.
+    for name in ("Spine", "Chest", "Head", "UpperArm_L", "UpperArm_R"):
+        set_bone_rotation(bones, name, 0, 0, 0, 1)
+    set_bone_rotation(bones, "Spine", 2, 0, 0, 30.5)
+    set_bone_rotation(bones, "Chest", -1.5, 0, 0, 30.5)
+    set_bone_rotation(bones, "Head", -1, 0, 0, 30.5)
+    set_bone_rotation(bones, "UpperArm_L", 0, 0, 1, 30.5)
+    set_bone_rotation(bones, "UpperArm_R", 0, 0, -1, 30.5)
+
+    flush_keys(action)
+    for fc in action.fcurves:
+        mod = fc.modifiers.new(type='CYCLES')
+        mod.mode_before = 'MIRROR'
+        mod.mode_after = 'MIRROR'
+    action.use_frame_range = True
+    action.frame_start = 1
+    action.frame_end = 60
+    action.use_cyclic = True
 
     push_to_nla(arm_obj, action, "Idle")
     print("  Created: Idle (60 frames)")
@@ -248,10 +382,45 @@ def create_idle(arm_obj):
 # ---------------------------------------------------------------------------
 # Animation: Walk (30 frames = 1.0s, looping)
 # ---------------------------------------------------------------------------
+# Left-side key poses; the right-side ones are mirrored from these.
+WALK_CONTACT = {
+    # Legs
+    "UpperLeg_L": (-25, 0, 0),
+    "LowerLeg_L": (5, 0, 0),
+    "Foot_L": (10, 0, 0),
+    "UpperLeg_R": (20, 0, 0),
+    "LowerLeg_R": (35, 0, 0),
+    "Foot_R": (-5, 0, 0),
+    # Arms (opposite to legs)
+    "UpperArm_L": (15, 0, 0),
+    "LowerArm_L": (-10, 0, 0),
+    "UpperArm_R": (-15, 0, 0),
+    "LowerArm_R": (-15, 0, 0),
+    # Spine twist
+    "Spine": (2, 3, 0),
+    "Chest": (0, -3, 0),
+}
+WALK_PASSING = {
+    "UpperLeg_L": (0, 0, 0),
+    "LowerLeg_L": (30, 0, 0),
+    "Foot_L": (-15, 0, 0),
+    "UpperLeg_R": (0, 0, 0),
+    "LowerLeg_R": (5, 0, 0),
+    "Foot_R": (0, 0, 0),
+    "UpperArm_L": (0, 0, 0),
+    "LowerArm_L": (-5, 0, 0),
+    "UpperArm_R": (0, 0, 0),
+    "LowerArm_R": (-5, 0, 0),
+    "Spine": (2, 0, 0),
+    "Chest": (0, 0, 0),
+}
+
+
 def create_walk(arm_obj):
     """Bipedal walk cycle."""
     action = create_action(arm_obj, "Walk")
     reset_pose(arm_obj)
+    bones = pose_bone_map(arm_obj)
 
     # Walk cycle keyframes:
     # Frame 1:  Left contact (left foot forward)
@@ -259,71 +428,12 @@ def create_walk(arm_obj):
     # Frame 15: Right contact (right foot forward)
     # Frame 23: Right passing
     # Frame 30: Left contact again (loop)
-
-    # --- Frame 1 & 30: Left contact ---
+    # Hips bob: lowest at contact, highest when passing
     for f in [1, 30]:
-        # Legs
-        set_bone_rotation(arm_obj, "UpperLeg_L", -25, 0, 0, f)
-        set_bone_rotation(arm_obj, "LowerLeg_L", 5, 0, 0, f)
-        set_bone_rotation(arm_obj, "Foot_L", 10, 0, 0, f)
-        set_bone_rotation(arm_obj, "UpperLeg_R", 20, 0, 0, f)
-        set_bone_rotation(arm_obj, "LowerLeg_R", 35, 0, 0, f)
-        set_bone_rotation(arm_obj, "Foot_R", -5, 0, 0, f)
-        # Arms (opposite to legs)
-        set_bone_rotation(arm_obj, "UpperArm_L", 15, 0, 0, f)
-        set_bone_rotation(arm_obj, "LowerArm_L", -10, 0, 0, f)
-        set_bone_rotation(arm_obj, "UpperArm_R", -15, 0, 0, f)
-        set_bone_rotation(arm_obj, "LowerArm_R", -15, 0, 0, f)
-        # Spine twist
-        set_bone_rotation(arm_obj, "Spine", 2, 3, 0, f)
-        set_bone_rotation(arm_obj, "Chest", 0, -3, 0, f)
-        # Hips bob (lowest at contact)
-        set_bone_location(arm_obj, "Hips", 0, 0, -0.02, f)
-
-    # --- Frame 8: Left passing ---
-    set_bone_rotation(arm_obj, "UpperLeg_L", 0, 0, 0, 8)
-    set_bone_rotation(arm_obj, "LowerLeg_L", 30, 0, 0, 8)
-    set_bone_rotation(arm_obj, "Foot_L", -15, 0, 0, 8)
-    set_bone_rotation(arm_obj, "UpperLeg_R", 0, 0, 0, 8)
-    set_bone_rotation(arm_obj, "LowerLeg_R", 5, 0, 0, 8)
-    set_bone_rotation(arm_obj, "Foot_R", 0, 0, 0, 8)
-    set_bone_rotation(arm_obj, "UpperArm_L", 0, 0, 0, 8)
-    set_bone_rotation(arm_obj, "LowerArm_L", -5, 0, 0, 8)
-    set_bone_rotation(arm_obj, "UpperArm_R", 0, 0, 0, 8)
-    set_bone_rotation(arm_obj, "LowerArm_R", -5, 0, 0, 8)
-    set_bone_rotation(arm_obj, "Spine", 2, 0, 0, 8)
-    set_bone_rotation(arm_obj, "Chest", 0, 0, 0, 8)
-    set_bone_location(arm_obj, "Hips", 0, 0, 0.01, 8)
-
-    # --- Frame 15: Right contact (mirror of frame 1) ---
-    set_bone_rotation(arm_obj, "UpperLeg_L", 20, 0, 0, 15)
-    set_bone_rotation(arm_obj, "LowerLeg_L", 35, 0, 0, 15)
-    set_bone_rotation(arm_obj, "Foot_L", -5, 0, 0, 15)
-    set_bone_rotation(arm_obj, "UpperLeg_R", -25, 0, 0, 15)
-    set_bone_rotation(arm_obj, "LowerLeg_R", 5, 0, 0, 15)
-    set_bone_rotation(arm_obj, "Foot_R", 10, 0, 0, 15)
-    set_bone_rotation(arm_obj, "UpperArm_L", -15, 0, 0, 15)
-    set_bone_rotation(arm_obj, "LowerArm_L", -15, 0, 0, 15)
-    set_bone_rotation(arm_obj, "UpperArm_R", 15, 0, 0, 15)
-    set_bone_rotation(arm_obj, "LowerArm_R", -10, 0, 0, 15)
-    set_bone_rotation(arm_obj, "Spine", 2, -3, 0, 15)
-    set_bone_rotation(arm_obj, "Chest", 0, 3, 0, 15)
-    set_bone_location(arm_obj, "Hips", 0, 0, -0.02, 15)
-
-    # --- Frame 23: Right passing (mirror of frame 8) ---
-    set_bone_rotation(arm_obj, "UpperLeg_L", 0, 0, 0, 23)
-    set_bone_rotation(arm_obj, "LowerLeg_L", 5, 0, 0, 23)
-    set_bone_rotation(arm_obj, "Foot_L", 0, 0, 0, 23)
-    set_bone_rotation(arm_obj, "UpperLeg_R", 0, 0, 0, 23)
-    set_bone_rotation(arm_obj, "LowerLeg_R", 30, 0, 0, 23)
-    set_bone_rotation(arm_obj, "Foot_R", -15, 0, 0, 23)
-    set_bone_rotation(arm_obj, "UpperArm_L", 0, 0, 0, 23)
-    set_bone_rotation(arm_obj, "LowerArm_L", -5, 0, 0, 23)
-    set_bone_rotation(arm_obj, "UpperArm_R", 0, 0, 0, 23)
-    set_bone_rotation(arm_obj, "LowerArm_R", -5, 0, 0, 23)
-    set_bone_rotation(arm_obj, "Spine", 2, 0, 0, 23)
-    set_bone_rotation(arm_obj, "Chest", 0, 0, 0, 23)
-    set_bone_location(arm_obj, "Hips", 0, 0, 0.01, 23)
+        apply_pose(bones, WALK_CONTACT, f, hips=(0, 0, -0.02))
+    apply_pose(bones, WALK_PASSING, 8, hips=(0, 0, 0.01))
+    apply_pose(bones, WALK_CONTACT, 15, hips=(0, 0, -0.02), mirror=True)
+    apply_pose(bones, WALK_PASSING, 23, hips=(0, 0, 0.01), mirror=True)
 
     push_to_nla(arm_obj, action, "Walk")
     print("  Created: Walk (30 frames)")
@@ -332,77 +442,52 @@ def create_walk(arm_obj):
 # ---------------------------------------------------------------------------
 # Animation: Run (20 frames = 0.667s, looping)
 # ---------------------------------------------------------------------------
+RUN_CONTACT = {
+    "UpperLeg_L": (-40, 0, 0),
+    "LowerLeg_L": (10, 0, 0),
+    "Foot_L": (15, 0, 0),
+    "UpperLeg_R": (30, 0, 0),
+    "LowerLeg_R": (50, 0, 0),
+    "Foot_R": (-10, 0, 0),
+    "UpperArm_L": (25, 0, 0),
+    "LowerArm_L": (-20, 0, 0),
+    "UpperArm_R": (-30, 0, 0),
+    "LowerArm_R": (-25, 0, 0),
+    "Spine": (5, 5, 0),
+    "Chest": (-3, -5, 0),
+}
+RUN_PASSING = {
+    "UpperLeg_L": (5, 0, 0),
+    "LowerLeg_L": (45, 0, 0),
+    "Foot_L": (-20, 0, 0),
+    "UpperLeg_R": (-5, 0, 0),
+    "LowerLeg_R": (10, 0, 0),
+    "Foot_R": (0, 0, 0),
+    "UpperArm_L": (0, 0, 0),
+    "LowerArm_L": (-10, 0, 0),
+    "UpperArm_R": (0, 0, 0),
+    "LowerArm_R": (-10, 0, 0),
+    "Spine": (5, 0, 0),
+    "Chest": (-3, 0, 0),
+}
+
+
 def create_run(arm_obj):
     """Amplified walk cycle for running."""
     action = create_action(arm_obj, "Run")
     reset_pose(arm_obj)
+    bones = pose_bone_map(arm_obj)
 
     # Run cycle: same structure as walk but more extreme, faster
     # Frame 1 & 20: Left contact
     # Frame 5: Left passing
     # Frame 10: Right contact
     # Frame 15: Right passing
-
-    # --- Frame 1 & 20: Left contact ---
     for f in [1, 20]:
-        set_bone_rotation(arm_obj, "UpperLeg_L", -40, 0, 0, f)
-        set_bone_rotation(arm_obj, "LowerLeg_L", 10, 0, 0, f)
-        set_bone_rotation(arm_obj, "Foot_L", 15, 0, 0, f)
-        set_bone_rotation(arm_obj, "UpperLeg_R", 30, 0, 0, f)
-        set_bone_rotation(arm_obj, "LowerLeg_R", 50, 0, 0, f)
-        set_bone_rotation(arm_obj, "Foot_R", -10, 0, 0, f)
-        set_bone_rotation(arm_obj, "UpperArm_L", 25, 0, 0, f)
-        set_bone_rotation(arm_obj, "LowerArm_L", -20, 0, 0, f)
-        set_bone_rotation(arm_obj, "UpperArm_R", -30, 0, 0, f)
-        set_bone_rotation(arm_obj, "LowerArm_R", -25, 0, 0, f)
-        set_bone_rotation(arm_obj, "Spine", 5, 5, 0, f)
-        set_bone_rotation(arm_obj, "Chest", -3, -5, 0, f)
-        set_bone_location(arm_obj, "Hips", 0, 0, -0.03, f)
-
-    # --- Frame 5: Left passing ---
-    set_bone_rotation(arm_obj, "UpperLeg_L", 5, 0, 0, 5)
-    set_bone_rotation(arm_obj, "LowerLeg_L", 45, 0, 0, 5)
-    set_bone_rotation(arm_obj, "Foot_L", -20, 0, 0, 5)
-    set_bone_rotation(arm_obj, "UpperLeg_R", -5, 0, 0, 5)
-    set_bone_rotation(arm_obj, "LowerLeg_R", 10, 0, 0, 5)
-    set_bone_rotation(arm_obj, "Foot_R", 0, 0, 0, 5)
-    set_bone_rotation(arm_obj, "UpperArm_L", 0, 0, 0, 5)
-    set_bone_rotation(arm_obj, "LowerArm_L", -10, 0, 0, 5)
-    set_bone_rotation(arm_obj, "UpperArm_R", 0, 0, 0, 5)
-    set_bone_rotation(arm_obj, "LowerArm_R", -10, 0, 0, 5)
-    set_bone_rotation(arm_obj, "Spine", 5, 0, 0, 5)
-    set_bone_rotation(arm_obj, "Chest", -3, 0, 0, 5)
-    set_bone_location(arm_obj, "Hips", 0, 0, 0.02, 5)
-
-    # --- Frame 10: Right contact (mirror) ---
-    set_bone_rotation(arm_obj, "UpperLeg_L", 30, 0, 0, 10)
-    set_bone_rotation(arm_obj, "LowerLeg_L", 50, 0, 0, 10)
-    set_bone_rotation(arm_obj, "Foot_L", -10, 0, 0, 10)
-    set_bone_rotation(arm_obj, "UpperLeg_R", -40, 0, 0, 10)
-    set_bone_rotation(arm_obj, "LowerLeg_R", 10, 0, 0, 10)
-    set_bone_rotation(arm_obj, "Foot_R", 15, 0, 0, 10)
-    set_bone_rotation(arm_obj, "UpperArm_L", -30, 0, 0, 10)
-    set_bone_rotation(arm_obj, "LowerArm_L", -25, 0, 0, 10)
-    set_bone_rotation(arm_obj, "UpperArm_R", 25, 0, 0, 10)
-    set_bone_rotation(arm_obj, "LowerArm_R", -20, 0, 0, 10)
-    set_bone_rotation(arm_obj, "Spine", 5, -5, 0, 10)
-    set_bone_rotation(arm_obj, "Chest", -3, 5, 0, 10)
-    set_bone_location(arm_obj, "Hips", 0, 0, -0.03, 10)
-
-    # --- Frame 15: Right passing (mirror) ---
-    set_bone_rotation(arm_obj, "UpperLeg_L", -5, 0, 0, 15)
-    set_bone_rotation(arm_obj, "LowerLeg_L", 10, 0, 0, 15)
-    set_bone_rotation(arm_obj, "Foot_L", 0, 0, 0, 15)
-    set_bone_rotation(arm_obj, "UpperLeg_R", 5, 0, 0, 15)
-    set_bone_rotation(arm_obj, "LowerLeg_R", 45, 0, 0, 15)
-    set_bone_rotation(arm_obj, "Foot_R", -20, 0, 0, 15)
-    set_bone_rotation(arm_obj, "UpperArm_L", 0, 0, 0, 15)
-    set_bone_rotation(arm_obj, "LowerArm_L", -10, 0, 0, 15)
-    set_bone_rotation(arm_obj, "UpperArm_R", 0, 0, 0, 15)
-    set_bone_rotation(arm_obj, "LowerArm_R", -10, 0, 0, 15)
-    set_bone_rotation(arm_obj, "Spine", 5, 0, 0, 15)
-    set_bone_rotation(arm_obj, "Chest", -3, 0, 0, 15)
-    set_bone_location(arm_obj, "Hips", 0, 0, 0.02, 15)
+        apply_pose(bones, RUN_CONTACT, f, hips=(0, 0, -0.03))
+    apply_pose(bones, RUN_PASSING, 5, hips=(0, 0, 0.02))
+    apply_pose(bones, RUN_CONTACT, 10, hips=(0, 0, -0.03), mirror=True)
+    apply_pose(bones, RUN_PASSING, 15, hips=(0, 0, 0.02), mirror=True)
 
     push_to_nla(arm_obj, action, "Run")
     print("  Created: Run (20 frames)")
@@ -411,90 +496,71 @@ def create_run(arm_obj):
 # ---------------------------------------------------------------------------
 # Animation: Jump (30 frames = 1.0s, non-looping)
 # ---------------------------------------------------------------------------
+# Jump poses are left/right symmetric: (frame, pose, hips location)
+JUMP_KEYS = [
+    # Standing (neutral)
+    (1, symmetric({
+        "Spine": (0, 0, 0),
+        "UpperLeg_L": (0, 0, 0),
+        "LowerLeg_L": (0, 0, 0),
+        "UpperArm_L": (0, 0, 0),
+    }), (0, 0, 0)),
+    # Crouch (preparation)
+    (6, symmetric({
+        "Spine": (15, 0, 0),
+        "UpperLeg_L": (-30, 0, 0),
+        "LowerLeg_L": (50, 0, 0),
+        "Foot_L": (-15, 0, 0),
+        "UpperArm_L": (20, 0, 0),
+        "LowerArm_L": (-20, 0, 0),
+    }), (0, 0, -0.1)),
+    # Launch (explosive extension)
+    (10, symmetric({
+        "Spine": (-10, 0, 0),
+        "UpperLeg_L": (10, 0, 0),
+        "LowerLeg_L": (5, 0, 0),
+        "Foot_L": (15, 0, 0),
+        "UpperArm_L": (-40, 0, 0),
+        "LowerArm_L": (-5, 0, 0),
+    }), (0, 0, 0.05)),
+    # Airborne peak (tucked)
+    (16, symmetric({
+        "Spine": (-5, 0, 0),
+        "UpperLeg_L": (-15, 0, 0),
+        "LowerLeg_L": (25, 0, 0),
+        "Foot_L": (0, 0, 0),
+        "UpperArm_L": (-20, 0, -15),
+        "LowerArm_L": (-10, 0, 0),
+    }), (0, 0, 0.03)),
+    # Landing impact (slight crouch)
+    (22, symmetric({
+        "Spine": (10, 0, 0),
+        "UpperLeg_L": (-20, 0, 0),
+        "LowerLeg_L": (35, 0, 0),
+        "Foot_L": (-10, 0, 0),
+        "UpperArm_L": (10, 0, 0),
+        "LowerArm_L": (-15, 0, 0),
+    }), (0, 0, -0.06)),
+    # Recovery (back to neutral)
+    (30, symmetric({
+        "Spine": (0, 0, 0),
+        "UpperLeg_L": (0, 0, 0),
+        "LowerLeg_L": (0, 0, 0),
+        "Foot_L": (0, 0, 0),
+        "UpperArm_L": (0, 0, 0),
+        "LowerArm_L": (0, 0, 0),
+    }), (0, 0, 0)),
+]
+
+
 def create_jump(arm_obj):
     """Jump: crouch → launch → airborne → land."""
     action = create_action(arm_obj, "Jump")
     reset_pose(arm_obj)
+    bones = pose_bone_map(arm_obj)
 
-    # Frame 1: Standing (neutral)
-    set_bone_rotation(arm_obj, "Spine", 0, 0, 0, 1)
-    set_bone_rotation(arm_obj, "UpperLeg_L", 0, 0, 0, 1)
-    set_bone_rotation(arm_obj, "UpperLeg_R", 0, 0, 0, 1)
-    set_bone_rotation(arm_obj, "LowerLeg_L", 0, 0, 0, 1)
-    set_bone_rotation(arm_obj, "LowerLeg_R", 0, 0, 0, 1)
-    set_bone_rotation(arm_obj, "UpperArm_L", 0, 0, 0, 1)
-    set_bone_rotation(arm_obj, "UpperArm_R", 0, 0, 0, 1)
-    set_bone_location(arm_obj, "Hips", 0, 0, 0, 1)
-
-    # Frame 6: Crouch (preparation)
-    set_bone_rotation(arm_obj, "Spine", 15, 0, 0, 6)
-    set_bone_rotation(arm_obj, "UpperLeg_L", -30, 0, 0, 6)
-    set_bone_rotation(arm_obj, "UpperLeg_R", -30, 0, 0, 6)
-    set_bone_rotation(arm_obj, "LowerLeg_L", 50, 0, 0, 6)
-    set_bone_rotation(arm_obj, "LowerLeg_R", 50, 0, 0, 6)
-    set_bone_rotation(arm_obj, "Foot_L", -15, 0, 0, 6)
-    set_bone_rotation(arm_obj, "Foot_R", -15, 0, 0, 6)
-    set_bone_rotation(arm_obj, "UpperArm_L", 20, 0, 0, 6)
-    set_bone_rotation(arm_obj, "UpperArm_R", 20, 0, 0, 6)
-    set_bone_rotation(arm_obj, "LowerArm_L", -20, 0, 0, 6)
-    set_bone_rotation(arm_obj, "LowerArm_R", -20, 0, 0, 6)
-    set_bone_location(arm_obj, "Hips", 0, 0, -0.1, 6)
-
-    # Frame 10: Launch (explosive extension)
-    set_bone_rotation(arm_obj, "Spine", -10, 0, 0, 10)
-    set_bone_rotation(arm_obj, "UpperLeg_L", 10, 0, 0, 10)
-    set_bone_rotation(arm_obj, "UpperLeg_R", 10, 0, 0, 10)
-    set_bone_rotation(arm_obj, "LowerLeg_L", 5, 0, 0, 10)
-    set_bone_rotation(arm_obj, "LowerLeg_R", 5, 0, 0, 10)
-    set_bone_rotation(arm_obj, "Foot_L", 15, 0, 0, 10)
-    set_bone_rotation(arm_obj, "Foot_R", 15, 0, 0, 10)
-    set_bone_rotation(arm_obj, "UpperArm_L", -40, 0, 0, 10)
-    set_bone_rotation(arm_obj, "UpperArm_R", -40, 0, 0, 10)
-    set_bone_rotation(arm_obj, "LowerArm_L", -5, 0, 0, 10)
-    set_bone_rotation(arm_obj, "LowerArm_R", -5, 0, 0, 10)
-    set_bone_location(arm_obj, "Hips", 0, 0, 0.05, 10)
-
-    # Frame 16: Airborne peak (tucked)
-    set_bone_rotation(arm_obj, "Spine", -5, 0, 0, 16)
-    set_bone_rotation(arm_obj, "UpperLeg_L", -15, 0, 0, 16)
-    set_bone_rotation(arm_obj, "UpperLeg_R", -15, 0, 0, 16)
-    set_bone_rotation(arm_obj, "LowerLeg_L", 25, 0, 0, 16)
-    set_bone_rotation(arm_obj, "LowerLeg_R", 25, 0, 0, 16)
-    set_bone_rotation(arm_obj, "Foot_L", 0, 0, 0, 16)
-    set_bone_rotation(arm_obj, "Foot_R", 0, 0, 0, 16)
-    set_bone_rotation(arm_obj, "UpperArm_L", -20, 0, -15, 16)
-    set_bone_rotation(arm_obj, "UpperArm_R", -20, 0, 15, 16)
-    set_bone_rotation(arm_obj, "LowerArm_L", -10, 0, 0, 16)
-    set_bone_rotation(arm_obj, "LowerArm_R", -10, 0, 0, 16)
-    set_bone_location(arm_obj, "Hips", 0, 0, 0.03, 16)
-
-    # Frame 22: Landing impact (slight crouch)
-    set_bone_rotation(arm_obj, "Spine", 10, 0, 0, 22)
-    set_bone_rotation(arm_obj, "UpperLeg_L", -20, 0, 0, 22)
-    set_bone_rotation(arm_obj, "UpperLeg_R", -20, 0, 0, 22)
-    set_bone_rotation(arm_obj, "LowerLeg_L", 35, 0, 0, 22)
-    set_bone_rotation(arm_obj, "LowerLeg_R", 35, 0, 0, 22)
-    set_bone_rotation(arm_obj, "Foot_L", -10, 0, 0, 22)
-    set_bone_rotation(arm_obj, "Foot_R", -10, 0, 0, 22)
-    set_bone_rotation(arm_obj, "UpperArm_L", 10, 0, 0, 22)
-    set_bone_rotation(arm_obj, "UpperArm_R", 10, 0, 0, 22)
-    set_bone_rotation(arm_obj, "LowerArm_L", -15, 0, 0, 22)
-    set_bone_rotation(arm_obj, "LowerArm_R", -15, 0, 0, 22)
-    set_bone_location(arm_obj, "Hips", 0, 0, -0.06, 22)
-
-    # Frame 30: Recovery (back to neutral)
-    set_bone_rotation(arm_obj, "Spine", 0, 0, 0, 30)
-    set_bone_rotation(arm_obj, "UpperLeg_L", 0, 0, 0, 30)
-    set_bone_rotation(arm_obj, "UpperLeg_R", 0, 0, 0, 30)
-    set_bone_rotation(arm_obj, "LowerLeg_L", 0, 0, 0, 30)
-    set_bone_rotation(arm_obj, "LowerLeg_R", 0, 0, 0, 30)
-    set_bone_rotation(arm_obj, "Foot_L", 0, 0, 0, 30)
-    set_bone_rotation(arm_obj, "Foot_R", 0, 0, 0, 30)
-    set_bone_rotation(arm_obj, "UpperArm_L", 0, 0, 0, 30)
-    set_bone_rotation(arm_obj, "UpperArm_R", 0, 0, 0, 30)
-    set_bone_rotation(arm_obj, "LowerArm_L", 0, 0, 0, 30)
-    set_bone_rotation(arm_obj, "LowerArm_R", 0, 0, 0, 30)
-    set_bone_location(arm_obj, "Hips", 0, 0, 0, 30)
+    for frame, pose, hips in JUMP_KEYS:
+        apply_pose(bones, pose, frame, hips=hips)
 
     push_to_nla(arm_obj, action, "Jump")
     print("  Created: Jump (30 frames)")
@@ -507,56 +573,57 @@ def create_attack(arm_obj):
     """Right-hand sword slash: wind-up → swing → follow-through."""
     action = create_action(arm_obj, "Attack")
     reset_pose(arm_obj)
+    bones = pose_bone_map(arm_obj)
 
     # Frame 1: Ready stance (sword raised behind right shoulder)
-    set_bone_rotation(arm_obj, "Spine", 5, -15, 0, 1)
-    set_bone_rotation(arm_obj, "Chest", 0, -10, 0, 1)
-    set_bone_rotation(arm_obj, "UpperArm_R", -60, -30, 0, 1)
-    set_bone_rotation(arm_obj, "LowerArm_R", -80, 0, 0, 1)
-    set_bone_rotation(arm_obj, "Hand_R", 0, 0, 0, 1)
-    set_bone_rotation(arm_obj, "UpperArm_L", 15, 0, 10, 1)
-    set_bone_rotation(arm_obj, "LowerArm_L", -15, 0, 0, 1)
-    set_bone_rotation(arm_obj, "UpperLeg_L", -5, 0, 0, 1)
-    set_bone_rotation(arm_obj, "UpperLeg_R", -5, 0, 0, 1)
-    set_bone_location(arm_obj, "Hips", 0, 0, 0, 1)
+    set_bone_rotation(bones, "Spine", 5, -15, 0, 1)
+    set_bone_rotation(bones, "Chest", 0, -10, 0, 1)
+    set_bone_rotation(bones, "UpperArm_R", -60, -30, 0, 1)
+    set_bone_rotation(bones, "LowerArm_R", -80, 0, 0, 1)
+    set_bone_rotation(bones, "Hand_R", 0, 0, 0, 1)
+    set_bone_rotation(bones, "UpperArm_L", 15, 0, 10, 1)
+    set_bone_rotation(bones, "LowerArm_L", -15, 0, 0, 1)
+    set_bone_rotation(bones, "UpperLeg_L", -5, 0, 0, 1)
+    set_bone_rotation(bones, "UpperLeg_R", -5, 0, 0, 1)
+    set_bone_location(bones, "Hips", 0, 0, 0, 1)
 
     # Frame 5: Wind-up peak (torso twisted back)
-    set_bone_rotation(arm_obj, "Spine", 5, -25, 0, 5)
-    set_bone_rotation(arm_obj, "Chest", 0, -15, 0, 5)
-    set_bone_rotation(arm_obj, "UpperArm_R", -70, -40, 0, 5)
-    set_bone_rotation(arm_obj, "LowerArm_R", -90, 0, 0, 5)
-    set_bone_rotation(arm_obj, "UpperArm_L", 20, 0, 15, 5)
-    set_bone_rotation(arm_obj, "LowerArm_L", -20, 0, 0, 5)
+    set_bone_rotation(bones, "Spine", 5, -25, 0, 5)
+    set_bone_rotation(bones, "Chest", 0, -15, 0, 5)
+    set_bone_rotation(bones, "UpperArm_R", -70, -40, 0, 5)
+    set_bone_rotation(bones, "LowerArm_R", -90, 0, 0, 5)
+    set_bone_rotation(bones, "UpperArm_L", 20, 0, 15, 5)
+    set_bone_rotation(bones, "LowerArm_L", -20, 0, 0, 5)
 
     # Frame 10: Swing impact (fast forward slash)
-    set_bone_rotation(arm_obj, "Spine", -5, 20, 0, 10)
-    set_bone_rotation(arm_obj, "Chest", -5, 15, 0, 10)
-    set_bone_rotation(arm_obj, "UpperArm_R", -20, 50, 0, 10)
-    set_bone_rotation(arm_obj, "LowerArm_R", -30, 0, 0, 10)
-    set_bone_rotation(arm_obj, "Hand_R", 10, 0, 0, 10)
-    set_bone_rotation(arm_obj, "UpperArm_L", 5, 0, -5, 10)
-    set_bone_rotation(arm_obj, "LowerArm_L", -10, 0, 0, 10)
-    set_bone_location(arm_obj, "Hips", 0, 0.02, 0, 10)
+    set_bone_rotation(bones, "Spine", -5, 20, 0, 10)
+    set_bone_rotation(bones, "Chest", -5, 15, 0, 10)
+    set_bone_rotation(bones, "UpperArm_R", -20, 50, 0, 10)
+    set_bone_rotation(bones, "LowerArm_R", -30, 0, 0, 10)
+    set_bone_rotation(bones, "Hand_R", 10, 0, 0, 10)
+    set_bone_rotation(bones, "UpperArm_L", 5, 0, -5, 10)
+    set_bone_rotation(bones, "LowerArm_L", -10, 0, 0, 10)
+    set_bone_location(bones, "Hips", 0, 0.02, 0, 10)
 
     # Frame 14: Follow-through (sword continues past)
-    set_bone_rotation(arm_obj, "Spine", -3, 30, 0, 14)
-    set_bone_rotation(arm_obj, "Chest", -3, 20, 0, 14)
-    set_bone_rotation(arm_obj, "UpperArm_R", 10, 60, 0, 14)
-    set_bone_rotation(arm_obj, "LowerArm_R", -15, 0, 0, 14)
-    set_bone_rotation(arm_obj, "Hand_R", 15, 0, 0, 14)
-    set_bone_rotation(arm_obj, "UpperArm_L", -5, 0, -10, 14)
+    set_bone_rotation(bones, "Spine", -3, 30, 0, 14)
+    set_bone_rotation(bones, "Chest", -3, 20, 0, 14)
+    set_bone_rotation(bones, "UpperArm_R", 10, 60, 0, 14)
+    set_bone_rotation(bones, "LowerArm_R", -15, 0, 0, 14)
+    set_bone_rotation(bones, "Hand_R", 15, 0, 0, 14)
+    set_bone_rotation(bones, "UpperArm_L", -5, 0, -10, 14)
 
     # Frame 20: Recovery (back to neutral)
-    set_bone_rotation(arm_obj, "Spine", 0, 0, 0, 20)
-    set_bone_rotation(arm_obj, "Chest", 0, 0, 0, 20)
-    set_bone_rotation(arm_obj, "UpperArm_R", 0, 0, 0, 20)
-    set_bone_rotation(arm_obj, "LowerArm_R", 0, 0, 0, 20)
-    set_bone_rotation(arm_obj, "Hand_R", 0, 0, 0, 20)
-    set_bone_rotation(arm_obj, "UpperArm_L", 0, 0, 0, 20)
-    set_bone_rotation(arm_obj, "LowerArm_L", 0, 0, 0, 20)
-    set_bone_rotation(arm_obj, "UpperLeg_L", 0, 0, 0, 20)
-    set_bone_rotation(arm_obj, "UpperLeg_R", 0, 0, 0, 20)
-    set_bone_location(arm_obj, "Hips", 0, 0, 0, 20)
+    set_bone_rotation(bones, "Spine", 0, 0, 0, 20)
+    set_bone_rotation(bones, "Chest", 0, 0, 0, 20)
+    set_bone_rotation(bones, "UpperArm_R", 0, 0, 0, 20)
+    set_bone_rotation(bones, "LowerArm_R", 0, 0, 0, 20)
+    set_bone_rotation(bones, "Hand_R", 0, 0, 0, 20)
+    set_bone_rotation(bones, "UpperArm_L", 0, 0, 0, 20)
+    set_bone_rotation(bones, "LowerArm_L", 0, 0, 0, 20)
+    set_bone_rotation(bones, "UpperLeg_L", 0, 0, 0, 20)
+    set_bone_rotation(bones, "UpperLeg_R", 0, 0, 0, 20)
+    set_bone_location(bones, "Hips", 0, 0, 0, 20)
 
     push_to_nla(arm_obj, action, "Attack")
     print("  Created: Attack (20 frames)")
@@ -590,29 +657,24 @@ def main():
     # Report NLA tracks
     print(f"  NLA tracks: {[t.name for t in arm_obj.animation_data.nla_tracks]}")
 
-    # Export with animations
-    bpy.ops.object.select_all(action='DESELECT')
-    arm_obj.select_set(True)
-    if mesh_obj:
-        mesh_obj.select_set(True)
-    bpy.context.view_layer.objects.active = arm_obj
+    # Export with animations in a separate Blender process, so the
+    # exporter's memory is released independently of this session.
+    # --python-exit-code makes an exception in the export script (or its
+    # gltfpack step) fail the child instead of exiting 0.
+    before = os.stat(OUTPUT_PATH).st_mtime_ns if os.path.exists(OUTPUT_PATH) else None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_blend = os.path.join(tmp_dir, "animations.blend")
+        bpy.ops.wm.save_as_mainfile(filepath=tmp_blend, copy=True)
+        subprocess.run(
+            [bpy.app.binary_path, "--background", tmp_blend,
+             "--python-exit-code", "1",
+             "--python", EXPORT_SCRIPT, "--", OUTPUT_PATH],
+            check=True,
+        )
+    if not os.path.exists(OUTPUT_PATH) or os.stat(OUTPUT_PATH).st_mtime_ns == before:
+        print(f"ERROR: {OUTPUT_PATH} was not written by the export process.")
+        sys.exit(1)
 
-    bpy.ops.export_scene.gltf(
-        filepath=OUTPUT_PATH,
-        export_format='GLB',
-        use_selection=True,
-        export_apply=False,
-        export_yup=True,
-        export_materials='EXPORT',
-        export_skins=True,
-        export_all_influences=True,
-        export_animations=True,
-        export_nla_strips=True,
-    )
-
-    file_size = os.path.getsize(OUTPUT_PATH)
-    print(f"  Exported: {OUTPUT_PATH}")
-    print(f"  File size: {file_size / 1024:.1f} KB")
     print("=" * 60)
     print("  Done! Animations baked into humanoid_rigged.glb")
     print("=" * 60)
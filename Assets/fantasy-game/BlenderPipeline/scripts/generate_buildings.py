@@ -17,126 +17,275 @@ import bpy
 import bmesh
 import os
 import math
-from mathutils import Vector
+import shutil
+import subprocess
+import numpy as np
+from mathutils import Euler
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 EXPORT_DIR = os.path.join(SCRIPT_DIR, "..", "exports")
 
+# Vertex-color materials keyed by (roughness, metallic); the node tree is
+# identical for all of them, so buildings with the same values share one.
+_VC_MAT_CACHE = {}
+
 
 def clear_scene():
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete(use_global=False)
-    for block in bpy.data.meshes:
-        if block.users == 0:
-            bpy.data.meshes.remove(block)
-    for mat in bpy.data.materials:
-        if mat.users == 0:
-            bpy.data.materials.remove(mat)
+    _VC_MAT_CACHE.clear()
+    bpy.data.batch_remove(ids=list(bpy.data.objects))
+    orphans = [b for coll in (bpy.data.meshes, bpy.data.materials)
+               for b in coll if b.users == 0]
+    bpy.data.batch_remove(ids=orphans)
 
 
 def set_vertex_colors(obj, color_func):
+    """color_func maps an (N, 3) array of positions to (N, 4) RGBA colors."""
     mesh = obj.data
+    n_verts = len(mesh.vertices)
+    co = np.empty(n_verts * 3, dtype=np.float32)
+    mesh.attributes["position"].data.foreach_get("vector", co)
+    co = co.reshape(n_verts, 3)
+    loop_vi = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vi)
+    # Colors depend only on position: evaluate once per vertex, then gather
+    # the per-vertex table for every corner
+    colors = color_func(co.astype(np.float64))[loop_vi].astype(np.float32, copy=False)
+    # Create the layer after the colors are computed
     if not mesh.color_attributes:
         mesh.color_attributes.new(name="Color", type='BYTE_COLOR', domain='CORNER')
     color_layer = mesh.color_attributes[0]
-    vert_positions = {v.index: v.co.copy() for v in mesh.vertices}
-    for poly in mesh.polygons:
-        for li in poly.loop_indices:
-            loop = mesh.loops[li]
-            vi = loop.vertex_index
-            color_layer.data[li].color = color_func(vert_positions[vi])
+    # BYTE_COLOR stores 8-bit sRGB and converts each float on write; a float32
+    # buffer only saves numpy a dtype conversion on the way in
+    color_layer.data.foreach_set("color", colors.ravel())
+
+
+def select_colors(n, rules, default):
+    """
+    Vectorized if/elif chain for color functions: rules is a list of
+    (mask, color) pairs where the first matching mask wins. A color is
+    either an RGBA tuple or an (n, 4) array.
+    """
+    out = np.empty((n, 4), dtype=np.float32)
+    out[:] = default
+    for mask, color in reversed(rules):
+        out[mask] = color[mask] if np.ndim(color) == 2 else color
+    return out
 
 
 def make_vc_material(name, roughness=0.6, metallic=0.0):
-    mat = bpy.data.materials.new(name=name)
-    mat.use_nodes = True
-    tree = mat.node_tree
-    for n in tree.nodes:
-        tree.nodes.remove(n)
-
-    vc_node = tree.nodes.new('ShaderNodeVertexColor')
-    vc_node.layer_name = "Color"
-    vc_node.location = (-300, 0)
-
-    bsdf = tree.nodes.new('ShaderNodeBsdfPrincipled')
-    bsdf.location = (0, 0)
+    key = (roughness, metallic)
+    if key in _VC_MAT_CACHE:
+        return _VC_MAT_CACHE[key]
+    if _VC_MAT_CACHE:
+        # Every variant has the same node tree: copy one and set the scalars
+        mat = next(iter(_VC_MAT_CACHE.values())).copy()
+        mat.name = name
+        bsdf = mat.node_tree.nodes["Principled BSDF"]
+    else:
+        mat = bpy.data.materials.new(name=name)
+        mat.use_nodes = True
+        tree = mat.node_tree
+        for n in tree.nodes:
+            tree.nodes.remove(n)
+
+        vc_node = tree.nodes.new('ShaderNodeVertexColor')
+        vc_node.layer_name = "Color"
+        vc_node.location = (-300, 0)
+
+        bsdf = tree.nodes.new('ShaderNodeBsdfPrincipled')
+        bsdf.name = "Principled BSDF"
+        bsdf.location = (0, 0)
+
+        output = tree.nodes.new('ShaderNodeOutputMaterial')
+        output.location = (300, 0)
+
+        tree.links.new(vc_node.outputs["Color"], bsdf.inputs["Base Color"])
+        tree.links.new(bsdf.outputs["BSDF"], output.inputs["Surface"])
     bsdf.inputs["Roughness"].default_value = roughness
     bsdf.inputs["Metallic"].default_value = metallic
-
-    output = tree.nodes.new('ShaderNodeOutputMaterial')
-    output.location = (300, 0)
-
-    tree.links.new(vc_node.outputs["Color"], bsdf.inputs["Base Color"])
-    tree.links.new(bsdf.outputs["BSDF"], output.inputs["Surface"])
+    _VC_MAT_CACHE[key] = mat
     return mat
 
 
 def export_glb(filepath):
-    bpy.ops.object.select_all(action='SELECT')
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
     bpy.ops.export_scene.gltf(
         filepath=filepath,
         export_format='GLB',
-        use_selection=True,
+        use_selection=False,
         export_apply=True,
         export_yup=True,
         export_materials='EXPORT',
     )
+    optimize_glb(filepath)
     size = os.path.getsize(filepath)
     print(f"  Exported: {filepath} ({size / 1024:.1f} KB)")
 
 
-def add_part(parts, name, prim, loc, scl, rot=None):
+def optimize_glb(filepath):
+    """
+    Reorder the exported index/vertex buffers for GPU vertex cache and fetch
+    locality with gltfpack (meshoptimizer). -noq keeps float attributes and
+    -kn keeps the named building nodes; skipped if gltfpack is not on PATH.
+    """
+    gltfpack = shutil.which("gltfpack")
+    if gltfpack is None:
+        print("  gltfpack not found, skipping mesh optimization")
+        return
+    subprocess.run([gltfpack, "-i", filepath, "-o", filepath, "-noq", "-kn"], check=True)
+
+
+def create_torus(bm, major_radius, minor_radius, major_segments, minor_segments):
+    """Torus around Z with the same layout as primitive_torus_add (no bmesh op exists)."""
+    ring = []
+    for i in range(major_segments):
+        a = 2.0 * math.pi * i / major_segments
+        ca, sa = math.cos(a), math.sin(a)
+        for j in range(minor_segments):
+            b = 2.0 * math.pi * j / minor_segments
+            r = major_radius + math.cos(b) * minor_radius
+            ring.append(bm.verts.new((ca * r, sa * r, math.sin(b) * minor_radius)))
+    for i in range(major_segments):
+        i_next = (i + 1) % major_segments
+        for j in range(minor_segments):
+            j_next = (j + 1) % minor_segments
+            bm.faces.new((ring[i * minor_segments + j],
+                          ring[i_next * minor_segments + j],
+                          ring[i_next * minor_segments + j_next],
+                          ring[i * minor_segments + j_next]))
+
+
+# Unit primitives, built once with bmesh and cached as NumPy arrays:
+# {prim: (homogeneous verts (V, 4) float32, face vertex indices (flat int32), face sizes)}
+TEMPLATES = {}
+
+
+def get_template(prim):
+    template = TEMPLATES.get(prim)
+    if template is not None:
+        return template
+    bm = bmesh.new()
     if prim == 'cube':
-        bpy.ops.mesh.primitive_cube_add(location=loc)
+        bmesh.ops.create_cube(bm, size=2.0)
     elif prim == 'cylinder':
-        bpy.ops.mesh.primitive_cylinder_add(location=loc, vertices=8, radius=1, depth=1)
+        bmesh.ops.create_cone(bm, cap_ends=True, segments=8, radius1=1, radius2=1, depth=1)
+    elif prim == 'cylinder6':
+        bmesh.ops.create_cone(bm, cap_ends=True, segments=6, radius1=1, radius2=1, depth=1)
     elif prim == 'uv_sphere':
-        bpy.ops.mesh.primitive_uv_sphere_add(location=loc, segments=10, ring_count=8)
+        bmesh.ops.create_uvsphere(bm, u_segments=10, v_segments=8, radius=1)
     elif prim == 'cone':
-        bpy.ops.mesh.primitive_cone_add(location=loc, vertices=8, radius1=1, radius2=0, depth=1)
+        bmesh.ops.create_cone(bm, cap_ends=True, segments=8, radius1=1, radius2=0, depth=1)
+    elif prim == 'cone6':
+        bmesh.ops.create_cone(bm, cap_ends=True, segments=6, radius1=1, radius2=0, depth=1)
     elif prim == 'torus':
-        bpy.ops.mesh.primitive_torus_add(location=loc, major_radius=1, minor_radius=0.25,
-                                          major_segments=12, minor_segments=6)
-    obj = bpy.context.active_object
-    obj.name = name
-    obj.scale = scl
-    if rot:
-        obj.rotation_euler = rot
-    bpy.ops.object.transform_apply(scale=True, rotation=True)
-    parts.append(obj)
-    return obj
-
-
-def join_parts(parts, final_name):
-    bpy.ops.object.select_all(action='DESELECT')
-    for p in parts:
-        p.select_set(True)
-    bpy.context.view_layer.objects.active = parts[0]
-    bpy.ops.object.join()
-    obj = bpy.context.active_object
-    obj.name = final_name
-    return obj
+        create_torus(bm, major_radius=1, minor_radius=0.25,
+                     major_segments=12, minor_segments=6)
+    bm.verts.index_update()
+    verts = np.array([(*v.co, 1.0) for v in bm.verts], dtype=np.float32)
+    face_verts = np.array([v.index for f in bm.faces for v in f.verts], dtype=np.int32)
+    face_sizes = np.array([len(f.verts) for f in bm.faces], dtype=np.int32)
+    bm.free()
+    template = TEMPLATES[prim] = (verts, face_verts, face_sizes)
+    return template
+
+
+# Rotation matrices by Euler tuple; the buildings only use a handful of angles.
+# None is an unrotated part.
+ROT_CACHE = {None: np.eye(3, dtype=np.float32)}
+
+
+def rot_matrix(rot):
+    m = ROT_CACHE.get(rot)
+    if m is None:
+        m = ROT_CACHE[rot] = np.array(Euler(rot).to_matrix(), dtype=np.float32)
+    return m
+
+
+# Cylinders/cones thinner than this radius (in scl) use the 6-sided templates;
+# the missing sides are not visible on bars and pegs this size
+THIN_RADIUS = 0.05
+
+
+def add_part(parts, name, prim, loc, scl, rot=None):
+    """Queue a primitive with its transform; build_mesh places all parts at once."""
+    if prim in ('cylinder', 'cone') and max(scl[0], scl[1]) < THIN_RADIUS:
+        prim += '6'
+    parts.append((prim, loc, scl, tuple(rot) if rot and any(rot) else None))
+
+
+def add_parts_batch(parts, name, prim, specs):
+    """
+    Queue several copies of one primitive. specs is a list of (loc, scl) or
+    (loc, scl, rot) tuples, as for add_part.
+    """
+    for spec in specs:
+        add_part(parts, name, prim, *spec)
+
+
+def build_mesh(parts, final_name):
+    """
+    Build one mesh object from the queued parts with bulk foreach_set calls.
+    Parts are grouped by primitive so each group is placed with one einsum
+    over its stacked (K, 3, 4) affine matrices. The object is not linked to
+    the scene yet; main() links all buildings at once right before export.
+    """
+    groups = {}
+    for prim, loc, scl, rot in parts:
+        groups.setdefault(prim, []).append((loc, scl, rot))
+
+    co_chunks, vi_chunks, size_chunks = [], [], []
+    n_verts = 0
+    for prim, specs in groups.items():
+        verts, face_verts, face_sizes = get_template(prim)
+        k = len(specs)
+        ms = np.empty((k, 3, 4), dtype=np.float32)
+        # R @ diag(scl): scale the rotation's columns, translation in column 3
+        ms[:, :, :3] = np.array([rot_matrix(rot) for _, _, rot in specs])
+        ms[:, :, :3] *= np.array([scl for _, scl, _ in specs], dtype=np.float32)[:, None, :]
+        ms[:, :, 3] = [loc for loc, _, _ in specs]
+        co_chunks.append(np.einsum('kij,vj->kvi', ms, verts).reshape(-1, 3))
+        offsets = n_verts + np.arange(k, dtype=np.int32)[:, None] * len(verts)
+        vi_chunks.append((face_verts + offsets).ravel())
+        size_chunks.append(np.tile(face_sizes, k))
+        n_verts += k * len(verts)
+
+    co = np.concatenate(co_chunks)
+    loop_vi = np.concatenate(vi_chunks)
+    loop_total = np.concatenate(size_chunks)
+    loop_start = np.zeros(len(loop_total), dtype=np.int32)
+    np.cumsum(loop_total[:-1], out=loop_start[1:])
+
+    mesh = bpy.data.meshes.new(final_name)
+    mesh.vertices.add(len(co))
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.loops.add(len(loop_vi))
+    mesh.loops.foreach_set("vertex_index", loop_vi)
+    mesh.polygons.add(len(loop_total))
+    mesh.polygons.foreach_set("loop_start", loop_start)
+    if bpy.app.version < (4, 0, 0):  # derived from loop_start in 4.0+
+        mesh.polygons.foreach_set("loop_total", loop_total)
+    mesh.update(calc_edges=True)
+    return bpy.data.objects.new(final_name, mesh)
 
 
 def smooth_shade(obj):
-    for poly in obj.data.polygons:
-        poly.use_smooth = True
+    n = len(obj.data.polygons)
+    obj.data.polygons.foreach_set("use_smooth", np.ones(n, dtype=bool))
 
 
 def set_origin_bottom(obj, z_offset=0.0):
     """Move vertices so the mesh is centered in X/Y with bottom at Z=0."""
-    verts = obj.data.vertices
-    xs = [v.co.x for v in verts]
-    ys = [v.co.y for v in verts]
-    zs = [v.co.z for v in verts]
-    cx = (min(xs) + max(xs)) * 0.5
-    cy = (min(ys) + max(ys)) * 0.5
-    min_z = min(zs) + z_offset
-    for v in verts:
-        v.co.x -= cx
-        v.co.y -= cy
-        v.co.z -= min_z
+    mesh = obj.data
+    position = mesh.attributes["position"].data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    position.foreach_get("vector", co)
+    co = co.reshape(-1, 3)
+    mn = co.min(axis=0)
+    mx = co.max(axis=0)
+    co[:, :2] -= (mn[:2] + mx[:2]) * 0.5
+    co[:, 2] -= mn[2] + z_offset
+    position.foreach_set("vector", co.ravel())
+    mesh.update()
     obj.location = (0, 0, 0)
 
 
@@ -202,30 +351,28 @@ def generate_cottage(offset_x=0):
     # Floor (interior)
     add_part(parts, "CO_Floor", 'cube', (offset_x, 0.75, 0.31), (1.30, 0.72, 0.01))
 
-    building = join_parts(parts, "Cottage")
+    building = build_mesh(parts, "Cottage")
 
     def cottage_color(pos):
-        lx = pos.x - offset_x
-        # Chimney (grey stone)
-        if lx > 0.90 and pos.y > 1.0 and pos.z > 2.0:
-            return (0.45, 0.42, 0.40, 1.0)
-        # Roof (dark thatch brown)
-        if pos.z > 1.85:
-            return (0.32, 0.22, 0.12, 1.0)
-        # Foundation (grey stone)
-        if pos.z < 0.32:
-            return (0.50, 0.48, 0.45, 1.0)
-        # Door (dark wood)
-        if abs(lx) < 0.32 and abs(pos.y) < 0.10 and pos.z < 1.35:
-            return (0.30, 0.18, 0.08, 1.0)
-        # Window frame / shutters (dark wood)
-        if lx > 1.35 and pos.z > 1.0 and pos.z < 1.45:
-            return (0.28, 0.16, 0.06, 1.0)
-        # Walls (warm wood)
-        if pos.z > 0.30 and pos.z < 1.90:
-            grain = math.sin(pos.z * 15) * 0.02
-            return (0.55 + grain, 0.38 + grain, 0.20, 1.0)
-        return (0.50, 0.35, 0.18, 1.0)
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        lx = x - offset_x
+        grain = np.sin(z * 15) * 0.02
+        wall = np.stack([0.55 + grain, 0.38 + grain,
+                         np.full_like(z, 0.20), np.ones_like(z)], axis=-1)
+        return select_colors(len(pos), [
+            # Chimney (grey stone)
+            ((lx > 0.90) & (y > 1.0) & (z > 2.0), (0.45, 0.42, 0.40, 1.0)),
+            # Roof (dark thatch brown)
+            (z > 1.85, (0.32, 0.22, 0.12, 1.0)),
+            # Foundation (grey stone)
+            (z < 0.32, (0.50, 0.48, 0.45, 1.0)),
+            # Door (dark wood)
+            ((np.abs(lx) < 0.32) & (np.abs(y) < 0.10) & (z < 1.35), (0.30, 0.18, 0.08, 1.0)),
+            # Window frame / shutters (dark wood)
+            ((lx > 1.35) & (z > 1.0) & (z < 1.45), (0.28, 0.16, 0.06, 1.0)),
+            # Walls (warm wood)
+            ((z > 0.30) & (z < 1.90), wall),
+        ], (0.50, 0.35, 0.18, 1.0))
 
     set_vertex_colors(building, cottage_color)
     mat = make_vc_material("CottageMat", roughness=0.8)
@@ -285,54 +432,47 @@ def generate_forge(offset_x=6):
     # Tool rack on back wall
     add_part(parts, "FO_Rack", 'cube', (offset_x - 0.60, 1.08, 1.30), (0.40, 0.03, 0.04))
     # Hanging tools
-    for i in range(3):
-        add_part(parts, f"FO_Tool_{i}", 'cylinder',
-                 (offset_x - 0.80 + i * 0.20, 1.05, 1.10), (0.015, 0.015, 0.15))
+    add_parts_batch(parts, "FO_Tool", 'cylinder', [
+        ((offset_x - 0.80 + i * 0.20, 1.05, 1.10), (0.015, 0.015, 0.15))
+        for i in range(3)
+    ])
 
     # Bellows (near forge)
     add_part(parts, "FO_Bellows", 'cube', (offset_x - 0.35, 0.85, 0.45), (0.10, 0.15, 0.12))
 
-    building = join_parts(parts, "BlacksmithForge")
+    building = build_mesh(parts, "BlacksmithForge")
 
     def forge_color(pos):
-        lx = pos.x - offset_x
-        # Chimney
-        if abs(lx) < 0.28 and pos.y > 1.0 and pos.z > 1.40:
-            return (0.40, 0.38, 0.36, 1.0)
-        # Embers (orange-red glow)
-        if abs(lx) < 0.40 and pos.y > 0.80 and pos.y < 1.05 and pos.z > 0.30 and pos.z < 0.70:
-            return (0.90, 0.40, 0.10, 1.0)
-        # Anvil (dark iron)
-        if lx > 0.30 and lx < 0.72 and pos.y > 0.15 and pos.y < 0.45 and pos.z > 0.25 and pos.z < 0.55:
-            return (0.30, 0.28, 0.30, 1.0)
-        # Water barrel (dark wood)
-        if lx < -0.60 and pos.z < 0.65 and pos.z > 0.10:
-            return (0.32, 0.20, 0.10, 1.0)
-        # Tools
-        if abs(pos.y - 1.05) < 0.08 and pos.z > 0.95 and pos.z < 1.40:
-            return (0.40, 0.38, 0.35, 1.0)
-        # Bellows (leather)
-        if lx < -0.20 and lx > -0.50 and pos.y > 0.68 and pos.z < 0.60:
-            return (0.42, 0.28, 0.14, 1.0)
-        # Roof (dark wood)
-        if pos.z > 1.82:
-            return (0.30, 0.20, 0.10, 1.0)
-        # Hearth stone
-        if pos.y > 0.90 and pos.z > 0.20 and pos.z < 1.10:
-            return (0.38, 0.35, 0.32, 1.0)
-        # Stone walls and floor
-        if pos.z < 0.22:
-            return (0.48, 0.45, 0.42, 1.0)
-        # Side walls (stone)
-        if abs(lx) > 1.30:
-            return (0.46, 0.43, 0.40, 1.0)
-        # Back wall
-        if pos.y > 1.05:
-            return (0.44, 0.41, 0.38, 1.0)
-        # Wooden posts
-        if abs(lx) > 1.20 and pos.z > 0.50:
-            return (0.42, 0.28, 0.14, 1.0)
-        return (0.45, 0.30, 0.15, 1.0)
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        lx = x - offset_x
+        return select_colors(len(pos), [
+            # Chimney
+            ((np.abs(lx) < 0.28) & (y > 1.0) & (z > 1.40), (0.40, 0.38, 0.36, 1.0)),
+            # Embers (orange-red glow)
+            ((np.abs(lx) < 0.40) & (y > 0.80) & (y < 1.05) & (z > 0.30) & (z < 0.70),
+             (0.90, 0.40, 0.10, 1.0)),
+            # Anvil (dark iron)
+            ((lx > 0.30) & (lx < 0.72) & (y > 0.15) & (y < 0.45) & (z > 0.25) & (z < 0.55),
+             (0.30, 0.28, 0.30, 1.0)),
+            # Water barrel (dark wood)
+            ((lx < -0.60) & (z < 0.65) & (z > 0.10), (0.32, 0.20, 0.10, 1.0)),
+            # Tools
+            ((np.abs(y - 1.05) < 0.08) & (z > 0.95) & (z < 1.40), (0.40, 0.38, 0.35, 1.0)),
+            # Bellows (leather)
+            ((lx < -0.20) & (lx > -0.50) & (y > 0.68) & (z < 0.60), (0.42, 0.28, 0.14, 1.0)),
+            # Roof (dark wood)
+            (z > 1.82, (0.30, 0.20, 0.10, 1.0)),
+            # Hearth stone
+            ((y > 0.90) & (z > 0.20) & (z < 1.10), (0.38, 0.35, 0.32, 1.0)),
+            # Stone walls and floor
+            (z < 0.22, (0.48, 0.45, 0.42, 1.0)),
+            # Side walls (stone)
+            (np.abs(lx) > 1.30, (0.46, 0.43, 0.40, 1.0)),
+            # Back wall
+            (y > 1.05, (0.44, 0.41, 0.38, 1.0)),
+            # Wooden posts
+            ((np.abs(lx) > 1.20) & (z > 0.50), (0.42, 0.28, 0.14, 1.0)),
+        ], (0.45, 0.30, 0.15, 1.0))
 
     set_vertex_colors(building, forge_color)
     mat = make_vc_material("ForgeMat", roughness=0.75, metallic=0.1)
@@ -351,10 +491,10 @@ def generate_market_stall(offset_x=12):
     parts = []
 
     # Four corner posts
-    for sx in [-1, 1]:
-        for sy in [-1, 1]:
-            add_part(parts, f"MS_Post_{sx}_{sy}", 'cylinder',
-                     (offset_x + sx * 1.10, sy * 0.80, 0.90), (0.04, 0.04, 0.90))
+    add_parts_batch(parts, "MS_Post", 'cylinder', [
+        ((offset_x + sx * 1.10, sy * 0.80, 0.90), (0.04, 0.04, 0.90))
+        for sx in [-1, 1] for sy in [-1, 1]
+    ])
 
     # Counter (front, waist-height)
     add_part(parts, "MS_Counter", 'cube', (offset_x, -0.80, 0.80), (1.15, 0.12, 0.04))
@@ -383,56 +523,52 @@ def generate_market_stall(offset_x=12):
     add_part(parts, "MS_Valance", 'cube', (offset_x, -0.82, 1.72), (1.10, 0.02, 0.08))
 
     # Display goods on counter (small objects)
-    for i in range(4):
-        x = offset_x - 0.60 + i * 0.40
-        add_part(parts, f"MS_Goods_{i}", 'cube',
-                 (x, -0.80, 0.90), (0.10, 0.08, 0.05))
+    add_parts_batch(parts, "MS_Goods", 'cube', [
+        ((offset_x - 0.60 + i * 0.40, -0.80, 0.90), (0.10, 0.08, 0.05))
+        for i in range(4)
+    ])
 
     # Hanging goods from canopy (sausages/herbs)
-    for i in range(3):
-        x = offset_x - 0.50 + i * 0.50
-        add_part(parts, f"MS_Hanging_{i}", 'cylinder',
-                 (x, -0.40, 1.55), (0.02, 0.02, 0.12))
+    add_parts_batch(parts, "MS_Hanging", 'cylinder', [
+        ((offset_x - 0.50 + i * 0.50, -0.40, 1.55), (0.02, 0.02, 0.12))
+        for i in range(3)
+    ])
 
     # Sign board on front
     add_part(parts, "MS_Sign", 'cube', (offset_x, -0.90, 1.50), (0.30, 0.02, 0.12))
 
-    building = join_parts(parts, "MarketStall")
+    building = build_mesh(parts, "MarketStall")
+
+    goods_colors = np.array([
+        (0.75, 0.55, 0.15, 1.0),  # Golden
+        (0.60, 0.25, 0.15, 1.0),  # Brown
+        (0.40, 0.55, 0.25, 1.0),  # Green
+    ], dtype=np.float32)
 
     def stall_color(pos):
-        lx = pos.x - offset_x
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        lx = x - offset_x
         # Canopy fabric (warm red/orange stripes)
-        if pos.z > 1.88:
-            stripe = int((lx + 2) * 3) % 2
-            if stripe:
-                return (0.72, 0.25, 0.12, 1.0)  # Red stripe
-            return (0.80, 0.65, 0.30, 1.0)  # Cream stripe
-        # Valance
-        if pos.z > 1.62 and pos.z < 1.82 and abs(pos.y + 0.82) < 0.05:
-            return (0.72, 0.25, 0.12, 1.0)
-        # Sign
-        if abs(pos.y + 0.90) < 0.05 and pos.z > 1.36 and pos.z < 1.64:
-            return (0.50, 0.35, 0.18, 1.0)
+        stripe = ((lx + 2) * 3).astype(np.int32) % 2
+        canopy = np.where(stripe[:, None] == 1,
+                          np.float32((0.72, 0.25, 0.12, 1.0)),   # Red stripe
+                          np.float32((0.80, 0.65, 0.30, 1.0)))   # Cream stripe
         # Display goods (various colors)
-        if abs(pos.y + 0.80) < 0.12 and pos.z > 0.84 and pos.z < 0.98:
-            idx = int((lx + 1.5) * 2) % 3
-            colors = [
-                (0.75, 0.55, 0.15, 1.0),  # Golden
-                (0.60, 0.25, 0.15, 1.0),  # Brown
-                (0.40, 0.55, 0.25, 1.0),  # Green
-            ]
-            return colors[idx]
-        # Hanging goods
-        if pos.z > 1.40 and pos.z < 1.70 and abs(pos.y + 0.40) < 0.08:
-            return (0.55, 0.28, 0.15, 1.0)
-        # Counter (lighter wood)
-        if abs(pos.y + 0.80) < 0.15 and pos.z > 0.74 and pos.z < 0.86:
-            return (0.58, 0.42, 0.22, 1.0)
-        # Shelf
-        if abs(pos.y - 0.70) < 0.18 and pos.z > 0.96 and pos.z < 1.06:
-            return (0.52, 0.36, 0.18, 1.0)
-        # Posts (dark wood)
-        return (0.40, 0.26, 0.12, 1.0)
+        goods = goods_colors[((lx + 1.5) * 2).astype(np.int32) % 3]
+        return select_colors(len(pos), [
+            (z > 1.88, canopy),
+            # Valance
+            ((z > 1.62) & (z < 1.82) & (np.abs(y + 0.82) < 0.05), (0.72, 0.25, 0.12, 1.0)),
+            # Sign
+            ((np.abs(y + 0.90) < 0.05) & (z > 1.36) & (z < 1.64), (0.50, 0.35, 0.18, 1.0)),
+            ((np.abs(y + 0.80) < 0.12) & (z > 0.84) & (z < 0.98), goods),
+            # Hanging goods
+            ((z > 1.40) & (z < 1.70) & (np.abs(y + 0.40) < 0.08), (0.55, 0.28, 0.15, 1.0)),
+            # Counter (lighter wood)
+            ((np.abs(y + 0.80) < 0.15) & (z > 0.74) & (z < 0.86), (0.58, 0.42, 0.22, 1.0)),
+            # Shelf
+            ((np.abs(y - 0.70) < 0.18) & (z > 0.96) & (z < 1.06), (0.52, 0.36, 0.18, 1.0)),
+        ], (0.40, 0.26, 0.12, 1.0))  # Posts (dark wood)
 
     set_vertex_colors(building, stall_color)
     mat = make_vc_material("StallMat", roughness=0.7)
@@ -451,10 +587,10 @@ def generate_watchtower(offset_x=18):
     parts = []
 
     # Four main support posts (tall)
-    for sx in [-1, 1]:
-        for sy in [-1, 1]:
-            add_part(parts, f"WT_Post_{sx}_{sy}", 'cylinder',
-                     (offset_x + sx * 0.60, sy * 0.60, 1.80), (0.06, 0.06, 1.80))
+    add_parts_batch(parts, "WT_Post", 'cylinder', [
+        ((offset_x + sx * 0.60, sy * 0.60, 1.80), (0.06, 0.06, 1.80))
+        for sx in [-1, 1] for sy in [-1, 1]
+    ])
 
     # Cross braces (X pattern on two sides)
     # Front face
@@ -485,28 +621,26 @@ def generate_watchtower(offset_x=18):
     add_part(parts, "WT_Platform", 'cube', (offset_x, 0, 2.80), (0.80, 0.80, 0.04))
 
     # Platform planks (visual detail)
-    for i in range(4):
-        z = 2.82
-        y = -0.60 + i * 0.40
-        add_part(parts, f"WT_Plank_{i}", 'cube',
-                 (offset_x, y, z), (0.78, 0.02, 0.005))
+    add_parts_batch(parts, "WT_Plank", 'cube', [
+        ((offset_x, -0.60 + i * 0.40, 2.82), (0.78, 0.02, 0.005))
+        for i in range(4)
+    ])
 
     # Railing posts (on platform)
-    for sx in [-1, 1]:
-        for sy in [-1, 1]:
-            add_part(parts, f"WT_RailPost_{sx}_{sy}", 'cylinder',
-                     (offset_x + sx * 0.75, sy * 0.75, 3.30), (0.03, 0.03, 0.45))
+    add_parts_batch(parts, "WT_RailPost", 'cylinder', [
+        ((offset_x + sx * 0.75, sy * 0.75, 3.30), (0.03, 0.03, 0.45))
+        for sx in [-1, 1] for sy in [-1, 1]
+    ])
 
     # Railing horizontal bars
-    for z in [3.10, 3.55]:
-        add_part(parts, f"WT_RailFront_{z}", 'cube',
-                 (offset_x, -0.75, z), (0.72, 0.025, 0.025))
-        add_part(parts, f"WT_RailBack_{z}", 'cube',
-                 (offset_x, 0.75, z), (0.72, 0.025, 0.025))
-        add_part(parts, f"WT_RailLeft_{z}", 'cube',
-                 (offset_x - 0.75, 0, z), (0.025, 0.72, 0.025))
-        add_part(parts, f"WT_RailRight_{z}", 'cube',
-                 (offset_x + 0.75, 0, z), (0.025, 0.72, 0.025))
+    add_parts_batch(parts, "WT_Rail", 'cube', [
+        spec for z in [3.10, 3.55] for spec in (
+            ((offset_x, -0.75, z), (0.72, 0.025, 0.025)),       # Front
+            ((offset_x, 0.75, z), (0.72, 0.025, 0.025)),        # Back
+            ((offset_x - 0.75, 0, z), (0.025, 0.72, 0.025)),    # Left
+            ((offset_x + 0.75, 0, z), (0.025, 0.72, 0.025)),    # Right
+        )
+    ])
 
     # Ladder (leaning against front)
     add_part(parts, "WT_LadderL", 'cube',
@@ -514,10 +648,10 @@ def generate_watchtower(offset_x=18):
     add_part(parts, "WT_LadderR", 'cube',
              (offset_x + 0.12, -0.55, 1.40), (0.02, 0.04, 1.35))
     # Ladder rungs
-    for i in range(6):
-        z = 0.30 + i * 0.42
-        add_part(parts, f"WT_Rung_{i}", 'cube',
-                 (offset_x, -0.55, z), (0.10, 0.025, 0.02))
+    add_parts_batch(parts, "WT_Rung", 'cube', [
+        ((offset_x, -0.55, 0.30 + i * 0.42), (0.10, 0.025, 0.02))
+        for i in range(6)
+    ])
 
     # Pointed roof (small, conical)
     add_part(parts, "WT_Roof", 'cone',
@@ -530,37 +664,32 @@ def generate_watchtower(offset_x=18):
     # Base platform
     add_part(parts, "WT_Base", 'cube', (offset_x, 0, 0.04), (0.85, 0.85, 0.04))
 
-    building = join_parts(parts, "Watchtower")
+    building = build_mesh(parts, "Watchtower")
 
     def tower_color(pos):
-        lx = pos.x - offset_x
-        # Roof (dark thatch)
-        if pos.z > 3.60:
-            return (0.30, 0.20, 0.10, 1.0)
-        # Railing (lighter wood)
-        if pos.z > 2.90 and (abs(lx) > 0.65 or abs(pos.y) > 0.65):
-            return (0.52, 0.38, 0.20, 1.0)
-        # Platform
-        if pos.z > 2.72 and pos.z < 2.90:
-            return (0.48, 0.34, 0.18, 1.0)
-        # Ladder rungs
-        if abs(lx) < 0.15 and abs(pos.y + 0.55) < 0.08 and pos.z < 2.80:
-            return (0.50, 0.36, 0.18, 1.0)
-        # Ladder sides
-        if abs(abs(lx) - 0.12) < 0.04 and abs(pos.y + 0.55) < 0.08:
-            return (0.45, 0.30, 0.14, 1.0)
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        lx = x - offset_x
+        ax, ay = np.abs(lx), np.abs(y)
         # Cross braces (medium wood)
-        dist_side = min(abs(lx) - 0.60 if abs(lx) > 0.50 else 10,
-                        abs(pos.y) - 0.60 if abs(pos.y) > 0.50 else 10)
-        if dist_side < 0.05 and pos.z > 0.50 and pos.z < 1.50:
-            return (0.42, 0.28, 0.13, 1.0)
-        # Main posts (dark wood)
-        if (abs(abs(lx) - 0.60) < 0.10 and abs(abs(pos.y) - 0.60) < 0.10):
-            return (0.38, 0.24, 0.12, 1.0)
-        # Base
-        if pos.z < 0.10:
-            return (0.44, 0.40, 0.36, 1.0)
-        return (0.42, 0.28, 0.14, 1.0)
+        dist_side = np.minimum(np.where(ax > 0.50, ax - 0.60, 10),
+                               np.where(ay > 0.50, ay - 0.60, 10))
+        return select_colors(len(pos), [
+            # Roof (dark thatch)
+            (z > 3.60, (0.30, 0.20, 0.10, 1.0)),
+            # Railing (lighter wood)
+            ((z > 2.90) & ((ax > 0.65) | (ay > 0.65)), (0.52, 0.38, 0.20, 1.0)),
+            # Platform
+            ((z > 2.72) & (z < 2.90), (0.48, 0.34, 0.18, 1.0)),
+            # Ladder rungs
+            ((ax < 0.15) & (np.abs(y + 0.55) < 0.08) & (z < 2.80), (0.50, 0.36, 0.18, 1.0)),
+            # Ladder sides
+            ((np.abs(ax - 0.12) < 0.04) & (np.abs(y + 0.55) < 0.08), (0.45, 0.30, 0.14, 1.0)),
+            ((dist_side < 0.05) & (z > 0.50) & (z < 1.50), (0.42, 0.28, 0.13, 1.0)),
+            # Main posts (dark wood)
+            ((np.abs(ax - 0.60) < 0.10) & (np.abs(ay - 0.60) < 0.10), (0.38, 0.24, 0.12, 1.0)),
+            # Base
+            (z < 0.10, (0.44, 0.40, 0.36, 1.0)),
+        ], (0.42, 0.28, 0.14, 1.0))
 
     set_vertex_colors(building, tower_color)
     mat = make_vc_material("TowerMat", roughness=0.78)
@@ -582,10 +711,17 @@ def main():
     print("  Generating Buildings")
     print("=" * 60)
 
-    generate_cottage(offset_x=0)
-    generate_forge(offset_x=6)
-    generate_market_stall(offset_x=12)
-    generate_watchtower(offset_x=18)
+    buildings = [
+        generate_cottage(offset_x=0),
+        generate_forge(offset_x=6),
+        generate_market_stall(offset_x=12),
+        generate_watchtower(offset_x=18),
+    ]
+
+    # Link everything in one go so the depsgraph is evaluated once
+    for building in buildings:
+        bpy.context.scene.collection.objects.link(building)
+    bpy.context.view_layer.update()
 
     export_glb(os.path.join(EXPORT_DIR, "buildings.glb"))
 
@@ -16,57 +16,95 @@ import bpy
 import bmesh
 import os
 import math
-from mathutils import Vector
+import shutil
+import subprocess
+import numpy as np
+from mathutils import Euler, Matrix, Vector
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 EXPORT_DIR = os.path.join(SCRIPT_DIR, "..", "exports")
 
+# Vertex-color material that make_vc_material copies (built on first use)
+_VC_TEMPLATE = None
+
+# Exit portal rune stones: six around the ring, X/Z relative to the portal
+# center column. Shared by the placement loop and portal_color.
+RUNE_ANGLES = np.arange(6) * (math.pi / 3)
+RUNE_RX = np.cos(RUNE_ANGLES) * 1.05
+RUNE_RZ = 1.40 + np.sin(RUNE_ANGLES) * 1.05
+
 
 def clear_scene():
     bpy.ops.object.select_all(action='SELECT')
     bpy.ops.object.delete(use_global=False)
-    for block in bpy.data.meshes:
-        if block.users == 0:
-            bpy.data.meshes.remove(block)
-    for mat in bpy.data.materials:
-        if mat.users == 0:
-            bpy.data.materials.remove(mat)
+    orphans = [b for coll in (bpy.data.meshes, bpy.data.materials)
+               for b in coll if b.users == 0]
+    bpy.data.batch_remove(ids=orphans)
 
 
 def set_vertex_colors(obj, color_func):
+    """color_func maps an (N, 3) array of world-space positions to (N, 4) RGBA colors."""
     mesh = obj.data
     if not mesh.color_attributes:
         mesh.color_attributes.new(name="Color", type='BYTE_COLOR', domain='CORNER')
     color_layer = mesh.color_attributes[0]
-    vert_positions = {v.index: v.co.copy() for v in mesh.vertices}
-    for poly in mesh.polygons:
-        for li in poly.loop_indices:
-            loop = mesh.loops[li]
-            vi = loop.vertex_index
-            color_layer.data[li].color = color_func(vert_positions[vi])
+    n_verts = len(mesh.vertices)
+    co = np.empty(n_verts * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    # join_parts leaves the mesh relative to the first part's location
+    co = co.reshape(n_verts, 3).astype(np.float64) + obj.matrix_world.translation[:]
+    loop_vi = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vi)
+    colors = color_func(co)[loop_vi]
+    color_layer.data.foreach_set("color", colors.astype(np.float32, copy=False).ravel())
+
+
+def select_colors(n, rules, default):
+    """
+    Vectorized if/elif chain for color functions: rules is a list of
+    (mask, color) pairs where the first matching mask wins. A color is
+    either an RGBA tuple or an (n, 4) array.
+    """
+    out = np.empty((n, 4), dtype=np.float32)
+    out[:] = default
+    for mask, color in reversed(rules):
+        out[mask] = color[mask] if np.ndim(color) == 2 else color
+    return out
 
 
 def make_vc_material(name, roughness=0.6, metallic=0.0):
-    mat = bpy.data.materials.new(name=name)
-    mat.use_nodes = True
-    tree = mat.node_tree
-    for n in tree.nodes:
-        tree.nodes.remove(n)
-
-    vc_node = tree.nodes.new('ShaderNodeVertexColor')
-    vc_node.layer_name = "Color"
-    vc_node.location = (-300, 0)
-
-    bsdf = tree.nodes.new('ShaderNodeBsdfPrincipled')
-    bsdf.location = (0, 0)
+    global _VC_TEMPLATE
+    if _VC_TEMPLATE is None:
+        # Build the vertex-color node tree once; every material is a copy.
+        # The fake user keeps it alive through clear_scene's orphan purge.
+        template = bpy.data.materials.new(name="VC_Template")
+        template.use_fake_user = True
+        template.use_nodes = True
+        tree = template.node_tree
+        for n in tree.nodes:
+            tree.nodes.remove(n)
+
+        vc_node = tree.nodes.new('ShaderNodeVertexColor')
+        vc_node.layer_name = "Color"
+        vc_node.location = (-300, 0)
+
+        bsdf = tree.nodes.new('ShaderNodeBsdfPrincipled')
+        bsdf.name = "Principled BSDF"
+        bsdf.location = (0, 0)
+
+        output = tree.nodes.new('ShaderNodeOutputMaterial')
+        output.location = (300, 0)
+
+        tree.links.new(vc_node.outputs["Color"], bsdf.inputs["Base Color"])
+        tree.links.new(bsdf.outputs["BSDF"], output.inputs["Surface"])
+        _VC_TEMPLATE = template
+
+    mat = _VC_TEMPLATE.copy()
+    mat.name = name
+    mat.use_fake_user = False
+    bsdf = mat.node_tree.nodes["Principled BSDF"]
     bsdf.inputs["Roughness"].default_value = roughness
     bsdf.inputs["Metallic"].default_value = metallic
-
-    output = tree.nodes.new('ShaderNodeOutputMaterial')
-    output.location = (300, 0)
-
-    tree.links.new(vc_node.outputs["Color"], bsdf.inputs["Base Color"])
-    tree.links.new(bsdf.outputs["BSDF"], output.inputs["Surface"])
     return mat
 
 
@@ -81,33 +119,81 @@ def export_glb(filepath):
         export_yup=True,
         export_materials='EXPORT',
     )
+    optimize_glb(filepath)
     size = os.path.getsize(filepath)
     print(f"  Exported: {filepath} ({size / 1024:.1f} KB)")
 
 
+def optimize_glb(filepath):
+    """
+    Post-process the export with gltfpack (meshoptimizer): vertex cache and
+    fetch reordering plus KHR_mesh_quantization, which glTFast reads
+    natively. No -c/-cc and no Draco -- the Unity project has neither
+    decoder package. Positions stay float (-vpf): GltfBootstrap takes the
+    meshes without their nodes, where gltfpack would put the position
+    dequantization. -kn keeps the named nodes. Skipped if gltfpack is not
+    on PATH.
+    """
+    gltfpack = shutil.which("gltfpack")
+    if gltfpack is None:
+        print("  gltfpack not found, skipping mesh optimization")
+        return
+    subprocess.run([gltfpack, "-i", filepath, "-o", filepath, "-vpf", "-kn"], check=True)
+
+
+def create_torus(bm, major_radius, minor_radius, major_segments, minor_segments):
+    """Torus around Z with the same layout as primitive_torus_add (no bmesh op exists)."""
+    ring = []
+    for i in range(major_segments):
+        a = 2.0 * math.pi * i / major_segments
+        ca, sa = math.cos(a), math.sin(a)
+        for j in range(minor_segments):
+            b = 2.0 * math.pi * j / minor_segments
+            r = major_radius + math.cos(b) * minor_radius
+            ring.append(bm.verts.new((ca * r, sa * r, math.sin(b) * minor_radius)))
+    for i in range(major_segments):
+        i_next = (i + 1) % major_segments
+        for j in range(minor_segments):
+            j_next = (j + 1) % minor_segments
+            bm.faces.new((ring[i * minor_segments + j],
+                          ring[i_next * minor_segments + j],
+                          ring[i_next * minor_segments + j_next],
+                          ring[i * minor_segments + j_next]))
+
+
 def add_part(parts, name, prim, loc, scl, rot=None):
+    """
+    Create a primitive with scale and rotation baked into its mesh (bmesh,
+    no primitive operator or transform_apply); the object keeps only loc.
+    """
+    bm = bmesh.new()
     if prim == 'cube':
-        bpy.ops.mesh.primitive_cube_add(location=loc)
+        bmesh.ops.create_cube(bm, size=2.0)
     elif prim == 'cylinder':
-        bpy.ops.mesh.primitive_cylinder_add(location=loc, vertices=8, radius=1, depth=1)
+        bmesh.ops.create_cone(bm, cap_ends=True, segments=8, radius1=1, radius2=1, depth=1)
     elif prim == 'uv_sphere':
-        bpy.ops.mesh.primitive_uv_sphere_add(location=loc, segments=10, ring_count=8)
+        bmesh.ops.create_uvsphere(bm, u_segments=10, v_segments=8, radius=1)
     elif prim == 'cone':
-        bpy.ops.mesh.primitive_cone_add(location=loc, vertices=8, radius1=1, radius2=0, depth=1)
+        bmesh.ops.create_cone(bm, cap_ends=True, segments=8, radius1=1, radius2=0, depth=1)
     elif prim == 'torus':
-        bpy.ops.mesh.primitive_torus_add(location=loc, major_radius=1, minor_radius=0.25,
-                                          major_segments=12, minor_segments=6)
-    obj = bpy.context.active_object
-    obj.name = name
-    obj.scale = scl
-    if rot:
-        obj.rotation_euler = rot
-    bpy.ops.object.transform_apply(scale=True, rotation=True)
+        create_torus(bm, major_radius=1, minor_radius=0.25,
+                     major_segments=12, minor_segments=6)
+    bmesh.ops.transform(bm, matrix=Matrix.LocRotScale(None, Euler(rot) if rot else None, scl),
+                        verts=bm.verts[:])
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+    obj = bpy.data.objects.new(name, mesh)
+    obj.location = loc
+    bpy.context.scene.collection.objects.link(obj)
     parts.append(obj)
     return obj
 
 
 def join_parts(parts, final_name):
+    # Parts are created with bpy.data, not operators: evaluate their world
+    # matrices before join reads them
+    bpy.context.view_layer.update()
     bpy.ops.object.select_all(action='DESELECT')
     for p in parts:
         p.select_set(True)
@@ -119,8 +205,8 @@ def join_parts(parts, final_name):
 
 
 def smooth_shade(obj):
-    for poly in obj.data.polygons:
-        poly.use_smooth = True
+    n = len(obj.data.polygons)
+    obj.data.polygons.foreach_set("use_smooth", np.ones(n, dtype=bool))
 
 
 def set_origin_bottom(obj, z_offset=0.0):
@@ -193,30 +279,27 @@ def generate_cave_entrance(offset_x=0):
     entrance = join_parts(parts, "CaveEntrance")
 
     def entrance_color(pos):
-        lx = pos.x - offset_x
-        # Moss patches (green tint at base)
-        if pos.z < 0.40 and (abs(lx) > 1.40 or abs(pos.y) > 0.25):
-            return (0.22, 0.30, 0.18, 1.0)
-        # Keystone (slightly lighter)
-        if pos.z > 3.0 and abs(lx) < 0.40:
-            return (0.42, 0.40, 0.38, 1.0)
-        # Arch segments
-        if pos.z > 2.60:
-            return (0.38, 0.35, 0.32, 1.0)
-        # Lintel (dark wood)
-        if pos.z > 2.55 and pos.z < 2.85 and abs(lx) < 1.0:
-            return (0.28, 0.18, 0.10, 1.0)
-        # Detail stones (varied grey)
-        if (abs(abs(lx) - 1.30) > 0.20 and pos.z > 0.20 and pos.z < 2.50):
-            return (0.40, 0.37, 0.33, 1.0)
-        # Main pillars
-        if abs(lx) > 0.80:
-            grain = math.sin(pos.z * 8) * 0.02
-            return (0.35 + grain, 0.32 + grain, 0.30, 1.0)
-        # Base stones
-        if pos.z < 0.20:
-            return (0.38, 0.36, 0.34, 1.0)
-        return (0.36, 0.33, 0.30, 1.0)
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        lx = x - offset_x
+        grain = np.sin(z * 8) * 0.02
+        pillar = np.stack([0.35 + grain, 0.32 + grain,
+                           np.full_like(z, 0.30), np.ones_like(z)], axis=-1)
+        return select_colors(len(pos), [
+            # Moss patches (green tint at base)
+            ((z < 0.40) & ((np.abs(lx) > 1.40) | (np.abs(y) > 0.25)), (0.22, 0.30, 0.18, 1.0)),
+            # Keystone (slightly lighter)
+            ((z > 3.0) & (np.abs(lx) < 0.40), (0.42, 0.40, 0.38, 1.0)),
+            # Arch segments
+            (z > 2.60, (0.38, 0.35, 0.32, 1.0)),
+            # Lintel (dark wood)
+            ((z > 2.55) & (z < 2.85) & (np.abs(lx) < 1.0), (0.28, 0.18, 0.10, 1.0)),
+            # Detail stones (varied grey)
+            ((np.abs(np.abs(lx) - 1.30) > 0.20) & (z > 0.20) & (z < 2.50), (0.40, 0.37, 0.33, 1.0)),
+            # Main pillars
+            (np.abs(lx) > 0.80, pillar),
+            # Base stones
+            (z < 0.20, (0.38, 0.36, 0.34, 1.0)),
+        ], (0.36, 0.33, 0.30, 1.0))
 
     set_vertex_colors(entrance, entrance_color)
     mat = make_vc_material("CaveEntranceMat", roughness=0.9)
@@ -255,22 +338,18 @@ def generate_torch_sconce(offset_x=6):
     sconce = join_parts(parts, "TorchSconce")
 
     def sconce_color(pos):
-        lx = pos.x - offset_x
-        # Flame (bright orange-yellow)
-        if pos.z > 0.42:
-            t = (pos.z - 0.42) / 0.12
-            r = 1.0
-            g = 0.7 - t * 0.3
-            b = 0.1
-            return (r, g, b, 1.0)
-        # Cup (dark iron)
-        if pos.z > 0.34 and pos.z < 0.42:
-            return (0.25, 0.22, 0.20, 1.0)
-        # Bracket arm (iron)
-        if abs(pos.y + 0.08) < 0.06 and pos.z > 0.20:
-            return (0.30, 0.28, 0.26, 1.0)
-        # Wall plate (iron)
-        return (0.28, 0.25, 0.23, 1.0)
+        y, z = pos[:, 1], pos[:, 2]
+        t = (z - 0.42) / 0.12
+        flame = np.stack([np.ones_like(z), 0.7 - t * 0.3,
+                          np.full_like(z, 0.1), np.ones_like(z)], axis=-1)
+        return select_colors(len(pos), [
+            # Flame (bright orange-yellow)
+            (z > 0.42, flame),
+            # Cup (dark iron)
+            ((z > 0.34) & (z < 0.42), (0.25, 0.22, 0.20, 1.0)),
+            # Bracket arm (iron)
+            ((np.abs(y + 0.08) < 0.06) & (z > 0.20), (0.30, 0.28, 0.26, 1.0)),
+        ], (0.28, 0.25, 0.23, 1.0))  # Wall plate (iron)
 
     set_vertex_colors(sconce, sconce_color)
     mat = make_vc_material("TorchMat", roughness=0.7, metallic=0.3)
@@ -299,13 +378,10 @@ def generate_exit_portal(offset_x=12):
     add_part(parts, "EP_PillarR", 'cube', (offset_x + 1.10, 0, 0.90), (0.15, 0.20, 0.80))
 
     # Rune stones (small cubes around the ring)
-    for i in range(6):
-        angle = (i / 6.0) * math.pi * 2
-        rx = offset_x + math.cos(angle) * 1.05
-        rz = 1.40 + math.sin(angle) * 1.05
+    for i, (rx, rz) in enumerate(zip(RUNE_RX, RUNE_RZ)):
         if rz > 0.20:  # Only above ground
             add_part(parts, f"EP_Rune_{i}", 'cube',
-                     (rx, 0, rz), (0.08, 0.06, 0.08))
+                     (offset_x + rx, 0, rz), (0.08, 0.06, 0.08))
 
     # Inner glow circle (flat disc)
     add_part(parts, "EP_GlowDisc", 'cylinder',
@@ -318,32 +394,31 @@ def generate_exit_portal(offset_x=12):
     portal = join_parts(parts, "ExitPortal")
 
     def portal_color(pos):
-        lx = pos.x - offset_x
-        # Inner glow disc (bright blue-purple)
-        dist_center = math.sqrt(lx**2 + (pos.z - 1.40)**2)
-        if abs(pos.y) < 0.05 and dist_center < 0.80 and dist_center > 0.15:
-            t = dist_center / 0.80
-            return (0.3 + t * 0.2, 0.2, 0.8 - t * 0.2, 1.0)
-        # Rune stones (glowing blue)
-        for i in range(6):
-            angle = (i / 6.0) * math.pi * 2
-            rx = math.cos(angle) * 1.05
-            rz = 1.40 + math.sin(angle) * 1.05
-            if abs(lx - rx) < 0.12 and abs(pos.z - rz) < 0.12:
-                return (0.3, 0.4, 0.9, 1.0)
-        # Main torus ring (dark stone with purple tint)
-        if dist_center > 0.85 and dist_center < 1.55 and pos.z > 0.20:
-            return (0.32, 0.28, 0.38, 1.0)
-        # Top capstone
-        if pos.z > 2.45:
-            return (0.35, 0.30, 0.40, 1.0)
-        # Pillars (dark stone)
-        if abs(abs(lx) - 1.10) < 0.20 and pos.z < 1.80:
-            return (0.30, 0.28, 0.26, 1.0)
-        # Base platform (grey stone)
-        if pos.z < 0.22:
-            return (0.38, 0.36, 0.34, 1.0)
-        return (0.33, 0.30, 0.32, 1.0)
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        lx = x - offset_x
+        # Region tests use the squared distance; only the glow gradient
+        # needs the distance itself
+        d2_center = lx ** 2 + (z - 1.40) ** 2
+        t = np.sqrt(d2_center) / 0.80
+        glow = np.stack([0.3 + t * 0.2, np.full_like(t, 0.2),
+                         0.8 - t * 0.2, np.ones_like(t)], axis=-1)
+        # Rune hit-test against all six stones at once: (N, 6) compares
+        rune = ((np.abs(lx[:, None] - RUNE_RX) < 0.12)
+                & (np.abs(z[:, None] - RUNE_RZ) < 0.12)).any(axis=1)
+        return select_colors(len(pos), [
+            # Inner glow disc (bright blue-purple)
+            ((np.abs(y) < 0.05) & (d2_center < 0.80 ** 2) & (d2_center > 0.15 ** 2), glow),
+            # Rune stones (glowing blue)
+            (rune, (0.3, 0.4, 0.9, 1.0)),
+            # Main torus ring (dark stone with purple tint)
+            ((d2_center > 0.85 ** 2) & (d2_center < 1.55 ** 2) & (z > 0.20), (0.32, 0.28, 0.38, 1.0)),
+            # Top capstone
+            (z > 2.45, (0.35, 0.30, 0.40, 1.0)),
+            # Pillars (dark stone)
+            ((np.abs(np.abs(lx) - 1.10) < 0.20) & (z < 1.80), (0.30, 0.28, 0.26, 1.0)),
+            # Base platform (grey stone)
+            (z < 0.22, (0.38, 0.36, 0.34, 1.0)),
+        ], (0.33, 0.30, 0.32, 1.0))
 
     set_vertex_colors(portal, portal_color)
     mat = make_vc_material("PortalMat", roughness=0.65, metallic=0.1)
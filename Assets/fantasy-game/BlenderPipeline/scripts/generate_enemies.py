@@ -16,64 +16,105 @@ import bpy
 import bmesh
 import os
 import math
-from mathutils import Vector
+import shutil
+import subprocess
+import numpy as np
+from mathutils import Euler, Matrix
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 EXPORT_DIR = os.path.join(SCRIPT_DIR, "..", "exports")
 
+# Vertex-color material that make_vc_material copies (built on first use)
+_VC_TEMPLATE = None
+
+# Per-channel RGBA slopes of the height ramps in slime_color / wolf_color,
+# so each ramp is one broadcast multiply-add instead of a stack of channels
+SLIME_RAMP = np.array([0.1, 0.3, 0.0, 0.0])
+WOLF_FUR_RAMP = np.array([0.05, 0.04, 0.02, 0.0])
+# RGB offsets from the skeleton's bone-white ramp
+SKELETON_TINT = np.array([0.03, 0.0, -0.05])
+
 
 def clear_scene():
     bpy.ops.object.select_all(action='SELECT')
     bpy.ops.object.delete(use_global=False)
-    for block in bpy.data.meshes:
-        if block.users == 0:
-            bpy.data.meshes.remove(block)
-    for mat in bpy.data.materials:
-        if mat.users == 0:
-            bpy.data.materials.remove(mat)
+    orphans = [b for coll in (bpy.data.meshes, bpy.data.materials)
+               for b in coll if b.users == 0]
+    bpy.data.batch_remove(ids=orphans)
 
 
 def set_vertex_colors(obj, color_func):
-    """Apply vertex colors using a function(vertex_position) -> (r,g,b,a)."""
+    """
+    Apply vertex colors using color_func, which maps an (N, 3) array of
+    world-space positions to (N, 4) RGBA colors.
+    """
     mesh = obj.data
     if not mesh.color_attributes:
         mesh.color_attributes.new(name="Color", type='BYTE_COLOR', domain='CORNER')
     color_layer = mesh.color_attributes[0]
 
-    # Build vertex index -> position map
-    vert_positions = {v.index: v.co.copy() for v in mesh.vertices}
-
-    # Color each corner (loop)
-    for poly in mesh.polygons:
-        for li in poly.loop_indices:
-            loop = mesh.loops[li]
-            vi = loop.vertex_index
-            color_layer.data[li].color = color_func(vert_positions[vi])
+    n_verts = len(mesh.vertices)
+    co = np.empty(n_verts * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    # join_parts and object_from_bmesh both create the object at the origin,
+    # so mesh coordinates are already the world coordinates the color rules
+    # are written in
+    co = co.reshape(n_verts, 3).astype(np.float64)
+    loop_vi = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vi)
+
+    # Color each vertex once, then gather per corner (loop)
+    colors = color_func(co)[loop_vi]
+    color_layer.data.foreach_set("color", colors.astype(np.float32, copy=False).ravel())
+
+
+def select_colors(n, rules, default):
+    """
+    Vectorized if/elif chain for color functions: rules is a list of
+    (mask, color) pairs where the first matching mask wins. A color is
+    either an RGBA tuple or an (n, 4) array.
+    """
+    out = np.empty((n, 4), dtype=np.float32)
+    out[:] = default
+    for mask, color in reversed(rules):
+        out[mask] = color[mask] if np.ndim(color) == 2 else color
+    return out
 
 
 def make_vc_material(name, roughness=0.6, metallic=0.0):
     """Create a Principled BSDF material reading vertex colors."""
-    mat = bpy.data.materials.new(name=name)
-    mat.use_nodes = True
-    tree = mat.node_tree
-    for n in tree.nodes:
-        tree.nodes.remove(n)
-
-    vc_node = tree.nodes.new('ShaderNodeVertexColor')
-    vc_node.layer_name = "Color"
-    vc_node.location = (-300, 0)
-
-    bsdf = tree.nodes.new('ShaderNodeBsdfPrincipled')
-    bsdf.location = (0, 0)
+    global _VC_TEMPLATE
+    if _VC_TEMPLATE is None:
+        # Build the vertex-color node tree once; every material is a copy.
+        # The fake user keeps it alive through clear_scene's orphan purge.
+        template = bpy.data.materials.new(name="VC_Template")
+        template.use_fake_user = True
+        template.use_nodes = True
+        tree = template.node_tree
+        for n in tree.nodes:
+            tree.nodes.remove(n)
+
+        vc_node = tree.nodes.new('ShaderNodeVertexColor')
+        vc_node.layer_name = "Color"
+        vc_node.location = (-300, 0)
+
+        bsdf = tree.nodes.new('ShaderNodeBsdfPrincipled')
+        bsdf.name = "Principled BSDF"
+        bsdf.location = (0, 0)
+
+        output = tree.nodes.new('ShaderNodeOutputMaterial')
+        output.location = (300, 0)
+
+        tree.links.new(vc_node.outputs["Color"], bsdf.inputs["Base Color"])
+        tree.links.new(bsdf.outputs["BSDF"], output.inputs["Surface"])
+        _VC_TEMPLATE = template
+
+    mat = _VC_TEMPLATE.copy()
+    mat.name = name
+    mat.use_fake_user = False
+    bsdf = mat.node_tree.nodes["Principled BSDF"]
     bsdf.inputs["Roughness"].default_value = roughness
     bsdf.inputs["Metallic"].default_value = metallic
-
-    output = tree.nodes.new('ShaderNodeOutputMaterial')
-    output.location = (300, 0)
-
-    tree.links.new(vc_node.outputs["Color"], bsdf.inputs["Base Color"])
-    tree.links.new(bsdf.outputs["BSDF"], output.inputs["Surface"])
-
     return mat
 
 
@@ -88,10 +129,146 @@ def export_glb(filepath):
         export_yup=True,
         export_materials='EXPORT',
     )
+    optimize_glb(filepath)
     size = os.path.getsize(filepath)
     print(f"  Exported: {filepath} ({size / 1024:.1f} KB)")
 
 
+def optimize_glb(filepath):
+    """
+    Post-process the export with gltfpack (meshoptimizer): vertex cache and
+    fetch reordering plus KHR_mesh_quantization, which glTFast reads
+    natively. No -c/-cc and no Draco -- the Unity project has neither
+    decoder package. -vpf keeps positions float, because integer positions
+    put their dequantization scale on the node and GltfBootstrap uses only
+    the meshes. -kn keeps the named nodes. Skipped if gltfpack is not on PATH.
+    """
+    gltfpack = shutil.which("gltfpack")
+    if gltfpack is None:
+        print("  gltfpack not found, skipping mesh optimization")
+        return
+    subprocess.run([gltfpack, "-i", filepath, "-o", filepath, "-vpf", "-kn"], check=True)
+
+
+def join_parts(parts, final_name):
+    """
+    Merge the parts into one new object at the origin, baking each part's
+    transform into its vertices. Replaces bpy.ops.object.join with bulk
+    foreach_get/foreach_set reads and writes.
+    """
+    cos, loop_vis, loop_totals = [], [], []
+    n_verts = 0
+    for obj in parts:
+        mesh = obj.data
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        # matrix_basis is current even before a depsgraph update (parts are unparented)
+        m = np.array(obj.matrix_basis, dtype=np.float32)
+        cos.append(co.reshape(-1, 3) @ m[:3, :3].T + m[:3, 3])
+        loop_vi = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", loop_vi)
+        loop_vis.append(loop_vi + n_verts)
+        loop_total = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", loop_total)
+        loop_totals.append(loop_total)
+        n_verts += len(mesh.vertices)
+    # Drop the parts first so the merged object gets the plain name
+    bpy.data.batch_remove(ids=parts + [p.data for p in parts])
+
+    co = np.concatenate(cos)
+    loop_vi = np.concatenate(loop_vis)
+    loop_total = np.concatenate(loop_totals)
+    loop_start = np.zeros(len(loop_total), dtype=np.int32)
+    np.cumsum(loop_total[:-1], out=loop_start[1:])
+
+    mesh = bpy.data.meshes.new(final_name)
+    mesh.vertices.add(len(co))
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.loops.add(len(loop_vi))
+    mesh.loops.foreach_set("vertex_index", loop_vi)
+    mesh.polygons.add(len(loop_total))
+    mesh.polygons.foreach_set("loop_start", loop_start)
+    if bpy.app.version < (4, 0, 0):  # derived from loop_start in 4.0+
+        mesh.polygons.foreach_set("loop_total", loop_total)
+    mesh.update(calc_edges=True)
+
+    obj = bpy.data.objects.new(final_name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    bpy.context.view_layer.objects.active = obj
+    obj.select_set(True)
+    return obj
+
+
+def smooth_shade(obj):
+    n = len(obj.data.polygons)
+    obj.data.polygons.foreach_set("use_smooth", np.ones(n, dtype=bool))
+
+
+def set_origin(obj, origin):
+    """
+    Move obj's origin to the world-space point `origin` without moving the
+    geometry (what origin_set(type='ORIGIN_CURSOR') does, minus the cursor
+    and the operator). The joined objects carry no rotation or scale.
+    """
+    mesh = obj.data
+    offset = np.subtract(origin, obj.location[:], dtype=np.float32)
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3) - offset
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.update()
+    obj.location = origin
+
+
+# Low-poly primitive builders shared by the skeleton and wolf. Each adds
+# a unit primitive to bm with `matrix` baked into its vertices.
+def _build_cube(bm, matrix):
+    bmesh.ops.create_cube(bm, size=2.0, matrix=matrix)
+
+
+def _build_cylinder(bm, matrix):
+    bmesh.ops.create_cone(bm, cap_ends=True, segments=6, radius1=1, radius2=1,
+                          depth=1, matrix=matrix)
+
+
+def _build_uv_sphere(bm, matrix):
+    bmesh.ops.create_uvsphere(bm, u_segments=8, v_segments=6, radius=1, matrix=matrix)
+
+
+def _build_cone(bm, matrix):
+    bmesh.ops.create_cone(bm, cap_ends=True, segments=6, radius1=1, radius2=0,
+                          depth=1, matrix=matrix)
+
+
+_PRIM_BUILDERS = {
+    'cube': _build_cube,
+    'cylinder': _build_cylinder,
+    'uv_sphere': _build_uv_sphere,
+    'cone': _build_cone,
+}
+
+
+def add_primitive(bm, name, prim, loc, scl, rot=None):
+    """Add a primitive to bm at loc with scale/rotation baked in; name only labels the call site."""
+    _PRIM_BUILDERS[prim](bm, Matrix.LocRotScale(loc, Euler(rot) if rot else None, scl))
+
+
+def object_from_bmesh(bm, name):
+    """
+    Write bm into a new mesh object linked to the scene (active and selected)
+    and free bm. The object sits at the origin, with any placement already
+    baked into bm's vertices; set_vertex_colors relies on that.
+    """
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    bpy.context.view_layer.objects.active = obj
+    obj.select_set(True)
+    return obj
+
+
 # =================================================================
 #  SLIME — A squishy green blob with darker underbelly
 # =================================================================
@@ -101,30 +278,31 @@ def generate_slime():
     print("=" * 60)
     clear_scene()
 
-    # Base: UV sphere, squashed vertically, slightly irregular
-    bpy.ops.mesh.primitive_uv_sphere_add(
-        segments=12, ring_count=8,
-        radius=0.5, location=(0, 0, 0.3)
-    )
-    slime = bpy.context.active_object
-    slime.name = "Slime"
-
-    # Squash into blob shape
-    slime.scale = (1.0, 1.0, 0.6)
-    bpy.ops.object.transform_apply(scale=True)
+    # Base: UV sphere, squashed vertically (baked into the mesh), slightly irregular
+    bm = bmesh.new()
+    bmesh.ops.create_uvsphere(bm, u_segments=12, v_segments=8, radius=0.5,
+                              matrix=Matrix.Diagonal((1.0, 1.0, 0.6, 1.0)))
+    mesh = bpy.data.meshes.new("Slime")
+    bm.to_mesh(mesh)
+    bm.free()
+    slime = bpy.data.objects.new("Slime", mesh)
+    slime.location = (0, 0, 0.3)
+    bpy.context.scene.collection.objects.link(slime)
 
     # Deform vertices for organic blobby look
     mesh = slime.data
-    for v in mesh.vertices:
-        # Flatten bottom
-        if v.co.z < 0.05:
-            v.co.z = 0.0
-        # Add slight bulge variation
-        dist_xz = math.sqrt(v.co.x ** 2 + v.co.y ** 2)
-        if v.co.z > 0.1:
-            wobble = math.sin(math.atan2(v.co.y, v.co.x) * 3) * 0.04
-            v.co.x *= (1.0 + wobble)
-            v.co.y *= (1.0 + wobble)
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+    # Flatten bottom
+    co[co[:, 2] < 0.05, 2] = 0.0
+    # Add slight bulge variation
+    upper = co[:, 2] > 0.1
+    wobble = np.sin(np.arctan2(co[upper, 1], co[upper, 0]) * 3) * 0.04
+    co[upper, :2] *= (1.0 + wobble)[:, None]
+    mesh.vertices.foreach_set("co", co.ravel())
+
+    parts = [slime]
 
     # Eyes — two small white spheres
     for side in [-1, 1]:
@@ -134,6 +312,7 @@ def generate_slime():
         )
         eye = bpy.context.active_object
         eye.name = f"SlimeEye_{side}"
+        parts.append(eye)
 
     # Pupils — tiny dark spheres
     for side in [-1, 1]:
@@ -143,30 +322,25 @@ def generate_slime():
         )
         pupil = bpy.context.active_object
         pupil.name = f"SlimePupil_{side}"
+        parts.append(pupil)
 
     # Join all
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.context.view_layer.objects.active = slime
-    bpy.ops.object.join()
+    slime = join_parts(parts, "Slime")
 
     # Vertex colors
     def slime_color(pos):
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
         # Green body with darker bottom
-        height_factor = max(0, min(1, pos.z / 0.4))
-        g = 0.55 + height_factor * 0.3
-        r = 0.15 + height_factor * 0.1
-        b = 0.1
+        height_factor = np.clip(z / 0.4, 0, 1)
+        body = np.array([0.15, 0.55, 0.1, 1.0]) + height_factor[:, None] * SLIME_RAMP
         # Eyes are white/dark
-        if abs(pos.y + 0.35) < 0.08 and pos.z > 0.28:
-            dist_eye = min(
-                math.sqrt((pos.x - 0.15) ** 2 + (pos.y + 0.35) ** 2),
-                math.sqrt((pos.x + 0.15) ** 2 + (pos.y + 0.35) ** 2)
-            )
-            if dist_eye < 0.05:
-                return (0.1, 0.1, 0.1, 1.0)  # Pupil
-            elif dist_eye < 0.08:
-                return (0.95, 0.95, 0.95, 1.0)  # Eye white
-        return (r, g, b, 1.0)
+        near_eye = (np.abs(y + 0.35) < 0.08) & (z > 0.28)
+        # Squared distance to the nearer eye, compared against squared radii
+        d2_eye = np.minimum((x - 0.15) ** 2, (x + 0.15) ** 2) + (y + 0.35) ** 2
+        return select_colors(len(pos), [
+            (near_eye & (d2_eye < 0.05 ** 2), (0.1, 0.1, 0.1, 1.0)),     # Pupil
+            (near_eye & (d2_eye < 0.08 ** 2), (0.95, 0.95, 0.95, 1.0)),  # Eye white
+        ], body)
 
     set_vertex_colors(slime, slime_color)
 
@@ -175,12 +349,10 @@ def generate_slime():
     slime.data.materials.append(mat)
 
     # Smooth shade
-    for poly in slime.data.polygons:
-        poly.use_smooth = True
+    smooth_shade(slime)
 
     # Origin at bottom center
-    bpy.context.scene.cursor.location = Vector((0, 0, 0))
-    bpy.ops.object.origin_set(type='ORIGIN_CURSOR')
+    set_origin(slime, (0, 0, 0))
 
     print(f"  Slime: {len(slime.data.vertices)} verts, {len(slime.data.polygons)} polys")
     export_glb(os.path.join(EXPORT_DIR, "slime.glb"))
@@ -195,113 +367,91 @@ def generate_skeleton():
     print("=" * 60)
     clear_scene()
 
-    parts = []
-
-    def add_part(name, prim, loc, scl):
-        if prim == 'cube':
-            bpy.ops.mesh.primitive_cube_add(location=loc)
-        elif prim == 'cylinder':
-            bpy.ops.mesh.primitive_cylinder_add(location=loc, vertices=6, radius=1, depth=1)
-        elif prim == 'uv_sphere':
-            bpy.ops.mesh.primitive_uv_sphere_add(location=loc, segments=8, ring_count=6)
-        obj = bpy.context.active_object
-        obj.name = name
-        obj.scale = scl
-        bpy.ops.object.transform_apply(scale=True)
-        parts.append(obj)
-        return obj
+    # All parts are built straight into one bmesh: no per-part objects,
+    # operators or join
+    bm = bmesh.new()
 
     # Head (skull)
-    add_part("Skull", 'uv_sphere', (0, 0, 1.65), (0.12, 0.14, 0.15))
+    add_primitive(bm, "Skull", 'uv_sphere', (0, 0, 1.65), (0.12, 0.14, 0.15))
 
     # Jaw
-    add_part("Jaw", 'cube', (0, -0.02, 1.52), (0.08, 0.10, 0.03))
+    add_primitive(bm, "Jaw", 'cube', (0, -0.02, 1.52), (0.08, 0.10, 0.03))
 
     # Eye sockets (dark indentations — small spheres we'll color dark)
-    add_part("EyeL", 'uv_sphere', (-0.05, -0.12, 1.68), (0.025, 0.025, 0.03))
-    add_part("EyeR", 'uv_sphere', (0.05, -0.12, 1.68), (0.025, 0.025, 0.03))
+    add_primitive(bm, "EyeL", 'uv_sphere', (-0.05, -0.12, 1.68), (0.025, 0.025, 0.03))
+    add_primitive(bm, "EyeR", 'uv_sphere', (0.05, -0.12, 1.68), (0.025, 0.025, 0.03))
 
     # Spine (chain of small cylinders)
     for i in range(4):
         z = 1.35 - i * 0.12
-        add_part(f"Spine_{i}", 'cylinder', (0, 0, z), (0.04, 0.04, 0.06))
+        add_primitive(bm, f"Spine_{i}", 'cylinder', (0, 0, z), (0.04, 0.04, 0.06))
 
     # Ribcage (curved bars)
     for i in range(3):
         z = 1.3 - i * 0.1
         for side in [-1, 1]:
-            add_part(f"Rib_{i}_{side}", 'cube',
-                     (side * 0.08, -0.02, z), (0.06, 0.015, 0.015))
+            add_primitive(bm, f"Rib_{i}_{side}", 'cube',
+                          (side * 0.08, -0.02, z), (0.06, 0.015, 0.015))
 
     # Pelvis
-    add_part("Pelvis", 'cube', (0, 0, 0.85), (0.12, 0.06, 0.04))
+    add_primitive(bm, "Pelvis", 'cube', (0, 0, 0.85), (0.12, 0.06, 0.04))
 
     # Upper arms
     for side in [-1, 1]:
-        add_part(f"UpperArm_{side}", 'cylinder',
-                 (side * 0.22, 0, 1.3), (0.025, 0.025, 0.12))
+        add_primitive(bm, f"UpperArm_{side}", 'cylinder',
+                      (side * 0.22, 0, 1.3), (0.025, 0.025, 0.12))
 
     # Lower arms
     for side in [-1, 1]:
-        add_part(f"LowerArm_{side}", 'cylinder',
-                 (side * 0.22, 0, 1.05), (0.02, 0.02, 0.12))
+        add_primitive(bm, f"LowerArm_{side}", 'cylinder',
+                      (side * 0.22, 0, 1.05), (0.02, 0.02, 0.12))
 
     # Hands
     for side in [-1, 1]:
-        add_part(f"Hand_{side}", 'cube',
-                 (side * 0.22, 0, 0.92), (0.03, 0.02, 0.04))
+        add_primitive(bm, f"Hand_{side}", 'cube',
+                      (side * 0.22, 0, 0.92), (0.03, 0.02, 0.04))
 
     # Upper legs
     for side in [-1, 1]:
-        add_part(f"UpperLeg_{side}", 'cylinder',
-                 (side * 0.06, 0, 0.65), (0.03, 0.03, 0.12))
+        add_primitive(bm, f"UpperLeg_{side}", 'cylinder',
+                      (side * 0.06, 0, 0.65), (0.03, 0.03, 0.12))
 
     # Lower legs
     for side in [-1, 1]:
-        add_part(f"LowerLeg_{side}", 'cylinder',
-                 (side * 0.06, 0, 0.4), (0.025, 0.025, 0.12))
+        add_primitive(bm, f"LowerLeg_{side}", 'cylinder',
+                      (side * 0.06, 0, 0.4), (0.025, 0.025, 0.12))
 
     # Feet
     for side in [-1, 1]:
-        add_part(f"Foot_{side}", 'cube',
-                 (side * 0.06, -0.03, 0.28), (0.03, 0.06, 0.015))
+        add_primitive(bm, f"Foot_{side}", 'cube',
+                      (side * 0.06, -0.03, 0.28), (0.03, 0.06, 0.015))
 
-    # Join all parts
-    bpy.ops.object.select_all(action='DESELECT')
-    for p in parts:
-        p.select_set(True)
-    bpy.context.view_layer.objects.active = parts[0]
-    bpy.ops.object.join()
-
-    skeleton = bpy.context.active_object
-    skeleton.name = "Skeleton"
+    skeleton = object_from_bmesh(bm, "Skeleton")
 
     # Vertex colors — bone white with dark eye sockets
     def skeleton_color(pos):
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
         # Eye sockets — dark
+        socket = np.zeros(len(pos), dtype=bool)
         for ex in [-0.05, 0.05]:
-            eye_dist = math.sqrt((pos.x - ex) ** 2 + (pos.y + 0.12) ** 2 + (pos.z - 1.68) ** 2)
-            if eye_dist < 0.04:
-                return (0.1, 0.05, 0.05, 1.0)
+            eye_d2 = (x - ex) ** 2 + (y + 0.12) ** 2 + (z - 1.68) ** 2
+            socket |= eye_d2 < 0.04 ** 2
 
         # Bone white with slight variation
-        base = 0.82 + (pos.z * 0.02)
-        r = min(1.0, base + 0.03)
-        g = min(1.0, base)
-        b = min(1.0, base - 0.05)
-        return (r, g, b, 1.0)
+        base = 0.82 + (z * 0.02)
+        bone = np.ones((len(pos), 4))
+        np.minimum(1.0, base[:, None] + SKELETON_TINT, out=bone[:, :3])
+        return select_colors(len(pos), [(socket, (0.1, 0.05, 0.05, 1.0))], bone)
 
     set_vertex_colors(skeleton, skeleton_color)
 
     mat = make_vc_material("SkeletonMat", roughness=0.7)
     skeleton.data.materials.append(mat)
 
-    for poly in skeleton.data.polygons:
-        poly.use_smooth = True
+    smooth_shade(skeleton)
 
     # Origin at feet
-    bpy.context.scene.cursor.location = Vector((0, 0, 0.28))
-    bpy.ops.object.origin_set(type='ORIGIN_CURSOR')
+    set_origin(skeleton, (0, 0, 0.28))
     skeleton.location = (0, 0, 0)
 
     print(f"  Skeleton: {len(skeleton.data.vertices)} verts, {len(skeleton.data.polygons)} polys")
@@ -317,118 +467,84 @@ def generate_wolf():
     print("=" * 60)
     clear_scene()
 
-    parts = []
-
-    def add_part(name, prim, loc, scl):
-        if prim == 'cube':
-            bpy.ops.mesh.primitive_cube_add(location=loc)
-        elif prim == 'cylinder':
-            bpy.ops.mesh.primitive_cylinder_add(location=loc, vertices=6, radius=1, depth=1)
-        elif prim == 'uv_sphere':
-            bpy.ops.mesh.primitive_uv_sphere_add(location=loc, segments=8, ring_count=6)
-        elif prim == 'cone':
-            bpy.ops.mesh.primitive_cone_add(location=loc, vertices=6, radius1=1, radius2=0, depth=1)
-        obj = bpy.context.active_object
-        obj.name = name
-        obj.scale = scl
-        bpy.ops.object.transform_apply(scale=True)
-        parts.append(obj)
-        return obj
+    bm = bmesh.new()
 
     # Body (elongated ellipsoid)
-    body = add_part("Body", 'uv_sphere', (0, 0, 0.45), (0.18, 0.4, 0.15))
+    add_primitive(bm, "Body", 'uv_sphere', (0, 0, 0.45), (0.18, 0.4, 0.15))
 
     # Head
-    add_part("Head", 'uv_sphere', (0, -0.55, 0.52), (0.12, 0.15, 0.11))
+    add_primitive(bm, "Head", 'uv_sphere', (0, -0.55, 0.52), (0.12, 0.15, 0.11))
 
     # Snout
-    add_part("Snout", 'cube', (0, -0.72, 0.48), (0.06, 0.10, 0.05))
+    add_primitive(bm, "Snout", 'cube', (0, -0.72, 0.48), (0.06, 0.10, 0.05))
 
     # Nose
-    add_part("Nose", 'uv_sphere', (0, -0.82, 0.49), (0.025, 0.02, 0.02))
+    add_primitive(bm, "Nose", 'uv_sphere', (0, -0.82, 0.49), (0.025, 0.02, 0.02))
 
     # Ears
     for side in [-1, 1]:
-        add_part(f"Ear_{side}", 'cone',
-                 (side * 0.08, -0.50, 0.65), (0.03, 0.03, 0.06))
+        add_primitive(bm, f"Ear_{side}", 'cone',
+                      (side * 0.08, -0.50, 0.65), (0.03, 0.03, 0.06))
 
     # Eyes
     for side in [-1, 1]:
-        add_part(f"Eye_{side}", 'uv_sphere',
-                 (side * 0.07, -0.62, 0.55), (0.02, 0.015, 0.02))
+        add_primitive(bm, f"Eye_{side}", 'uv_sphere',
+                      (side * 0.07, -0.62, 0.55), (0.02, 0.015, 0.02))
 
     # Front legs
     for side in [-1, 1]:
         # Upper
-        add_part(f"FrontLegUp_{side}", 'cylinder',
-                 (side * 0.1, -0.28, 0.22), (0.03, 0.03, 0.12))
+        add_primitive(bm, f"FrontLegUp_{side}", 'cylinder',
+                      (side * 0.1, -0.28, 0.22), (0.03, 0.03, 0.12))
         # Lower
-        add_part(f"FrontLegLow_{side}", 'cylinder',
-                 (side * 0.1, -0.28, 0.06), (0.025, 0.025, 0.08))
+        add_primitive(bm, f"FrontLegLow_{side}", 'cylinder',
+                      (side * 0.1, -0.28, 0.06), (0.025, 0.025, 0.08))
 
     # Back legs
     for side in [-1, 1]:
         # Upper
-        add_part(f"BackLegUp_{side}", 'cylinder',
-                 (side * 0.1, 0.28, 0.22), (0.035, 0.035, 0.12))
+        add_primitive(bm, f"BackLegUp_{side}", 'cylinder',
+                      (side * 0.1, 0.28, 0.22), (0.035, 0.035, 0.12))
         # Lower
-        add_part(f"BackLegLow_{side}", 'cylinder',
-                 (side * 0.1, 0.28, 0.06), (0.025, 0.025, 0.08))
-
-    # Tail (cone)
-    add_part("Tail", 'cone', (0, 0.55, 0.55), (0.03, 0.15, 0.03))
-    # Rotate tail upward
-    tail = parts[-1]
-    tail.rotation_euler = (math.radians(-30), 0, 0)
-    bpy.ops.object.transform_apply(rotation=True)
+        add_primitive(bm, f"BackLegLow_{side}", 'cylinder',
+                      (side * 0.1, 0.28, 0.06), (0.025, 0.025, 0.08))
 
-    # Join all
-    bpy.ops.object.select_all(action='DESELECT')
-    for p in parts:
-        p.select_set(True)
-    bpy.context.view_layer.objects.active = body
-    bpy.ops.object.join()
+    # Tail (cone), rotated upward
+    add_primitive(bm, "Tail", 'cone', (0, 0.55, 0.55), (0.03, 0.15, 0.03),
+                  rot=(math.radians(-30), 0, 0))
 
-    wolf = bpy.context.active_object
-    wolf.name = "Wolf"
+    wolf = object_from_bmesh(bm, "Wolf")
 
     # Vertex colors
     def wolf_color(pos):
-        # Nose — dark
-        if pos.y < -0.78 and pos.z > 0.46 and pos.z < 0.52:
-            return (0.1, 0.08, 0.08, 1.0)
-
-        # Eyes — amber
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        eyes = np.zeros(len(pos), dtype=bool)
         for side in [-1, 1]:
-            eye_dist = math.sqrt((pos.x - side * 0.07) ** 2 + (pos.y + 0.62) ** 2 + (pos.z - 0.55) ** 2)
-            if eye_dist < 0.025:
-                return (0.85, 0.65, 0.15, 1.0)
-
-        # Underbelly — lighter
-        if pos.z < 0.25:
-            return (0.6, 0.55, 0.5, 1.0)
-
-        # Back — darker
-        if pos.z > 0.55:
-            return (0.38, 0.33, 0.28, 1.0)
+            eye_d2 = (x - side * 0.07) ** 2 + (y + 0.62) ** 2 + (z - 0.55) ** 2
+            eyes |= eye_d2 < 0.025 ** 2
 
         # Default fur
-        r = 0.5 + (pos.z * 0.05)
-        g = 0.45 + (pos.z * 0.04)
-        b = 0.38 + (pos.z * 0.02)
-        return (r, g, b, 1.0)
+        fur = np.array([0.5, 0.45, 0.38, 1.0]) + z[:, None] * WOLF_FUR_RAMP
+        return select_colors(len(pos), [
+            # Nose — dark
+            ((y < -0.78) & (z > 0.46) & (z < 0.52), (0.1, 0.08, 0.08, 1.0)),
+            # Eyes — amber
+            (eyes, (0.85, 0.65, 0.15, 1.0)),
+            # Underbelly — lighter
+            (z < 0.25, (0.6, 0.55, 0.5, 1.0)),
+            # Back — darker
+            (z > 0.55, (0.38, 0.33, 0.28, 1.0)),
+        ], fur)
 
     set_vertex_colors(wolf, wolf_color)
 
     mat = make_vc_material("WolfMat", roughness=0.8)
     wolf.data.materials.append(mat)
 
-    for poly in wolf.data.polygons:
-        poly.use_smooth = True
+    smooth_shade(wolf)
 
     # Origin at bottom
-    bpy.context.scene.cursor.location = Vector((0, 0, 0))
-    bpy.ops.object.origin_set(type='ORIGIN_CURSOR')
+    set_origin(wolf, (0, 0, 0))
 
     print(f"  Wolf: {len(wolf.data.vertices)} verts, {len(wolf.data.polygons)} polys")
     export_glb(os.path.join(EXPORT_DIR, "wolf.glb"))
@@ -17,6 +17,7 @@ import bmesh
 import math
 import os
 import sys
+import numpy as np
 from mathutils import Vector, Matrix
 
 # ---------------------------------------------------------------------------
@@ -94,9 +95,7 @@ def clear_scene():
     bpy.ops.object.select_all(action='SELECT')
     bpy.ops.object.delete(use_global=False)
     # Purge orphan data
-    for block in bpy.data.meshes:
-        if block.users == 0:
-            bpy.data.meshes.remove(block)
+    bpy.data.batch_remove(ids=[m for m in bpy.data.meshes if m.users == 0])
 
 
 def create_body_part(name: str, pos: tuple, scale: tuple, subdiv: int) -> bpy.types.Object:
@@ -104,37 +103,96 @@ def create_body_part(name: str, pos: tuple, scale: tuple, subdiv: int) -> bpy.ty
     Create a subdivided cube at the given position/scale.
     Returns the Blender object.
     """
-    bpy.ops.mesh.primitive_cube_add(location=pos)
-    obj = bpy.context.active_object
-    obj.name = name
-    obj.scale = scale
-
-    # Apply scale so geometry is baked
-    bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
-
-    # Subdivision surface for rounder shapes
-    if subdiv > 0:
-        mod = obj.modifiers.new(name="Subsurf", type='SUBSURF')
-        mod.levels = subdiv
-        mod.render_levels = subdiv
-        bpy.ops.object.modifier_apply(modifier=mod.name)
+    # Build the scaled cube directly with bmesh (baked into the mesh, no
+    # primitive_cube_add / transform_apply operators)
+    bm = bmesh.new()
+    bmesh.ops.create_cube(bm, size=2.0, matrix=Matrix.LocRotScale(pos, None, scale))
+
+    # Subdivide for rounder shapes: each level splits every face in four and
+    # relaxes the vertices, approximating one Catmull-Clark level without
+    # running a SUBSURF modifier through modifier_apply
+    for _ in range(subdiv):
+        bmesh.ops.subdivide_edges(bm, edges=bm.edges[:], cuts=1, use_grid_fill=True)
+        bmesh.ops.smooth_vert(bm, verts=bm.verts[:], factor=0.5,
+                              use_axis_x=True, use_axis_y=True, use_axis_z=True)
+
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+
+    return obj
+
 
+def join_parts(parts: list, final_name: str) -> bpy.types.Object:
+    """
+    Merge the parts into one new object at the origin, baking each part's
+    transform into its vertices. Replaces bpy.ops.object.join with bulk
+    foreach_get/foreach_set reads and writes.
+    """
+    cos, loop_vis, loop_totals = [], [], []
+    n_verts = 0
+    for obj in parts:
+        mesh = obj.data
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        # matrix_basis is current even before a depsgraph update (parts are unparented)
+        m = np.array(obj.matrix_basis, dtype=np.float32)
+        cos.append(co.reshape(-1, 3) @ m[:3, :3].T + m[:3, 3])
+        loop_vi = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", loop_vi)
+        loop_vis.append(loop_vi + n_verts)
+        loop_total = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", loop_total)
+        loop_totals.append(loop_total)
+        n_verts += len(mesh.vertices)
+    # Drop the parts first so the merged object gets the plain name
+    bpy.data.batch_remove(ids=parts + [p.data for p in parts])
+
+    co = np.concatenate(cos)
+    loop_vi = np.concatenate(loop_vis)
+    loop_total = np.concatenate(loop_totals)
+    loop_start = np.zeros(len(loop_total), dtype=np.int32)
+    np.cumsum(loop_total[:-1], out=loop_start[1:])
+
+    mesh = bpy.data.meshes.new(final_name)
+    mesh.vertices.add(len(co))
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.loops.add(len(loop_vi))
+    mesh.loops.foreach_set("vertex_index", loop_vi)
+    mesh.polygons.add(len(loop_total))
+    mesh.polygons.foreach_set("loop_start", loop_start)
+    if bpy.app.version < (4, 0, 0):  # derived from loop_start in 4.0+
+        mesh.polygons.foreach_set("loop_total", loop_total)
+    mesh.update(calc_edges=True)
+
+    obj = bpy.data.objects.new(final_name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    bpy.context.view_layer.objects.active = obj
+    obj.select_set(True)
     return obj
 
 
-def assign_vertex_group(obj: bpy.types.Object, group_name: str, weight: float):
-    """Assign ALL vertices of obj to the named vertex group at the given weight."""
+def assign_vertex_group(obj: bpy.types.Object, group_name: str, weight: float, indices: range):
+    """Assign the given vertices of obj to the named vertex group at the given weight."""
     if group_name not in obj.vertex_groups:
         obj.vertex_groups.new(name=group_name)
     vg = obj.vertex_groups[group_name]
-    indices = [v.index for v in obj.data.vertices]
-    vg.add(indices, weight, 'REPLACE')
+    vg.add(list(indices), weight, 'REPLACE')
 
 
 def smooth_shade(obj: bpy.types.Object):
     """Apply smooth shading to an object."""
-    for poly in obj.data.polygons:
-        poly.use_smooth = True
+    n = len(obj.data.polygons)
+    obj.data.polygons.foreach_set("use_smooth", np.ones(n, dtype=bool))
+
+
+def count_tris(mesh: bpy.types.Mesh) -> int:
+    """Triangle count of the mesh as exported (an n-gon is n - 2 triangles)."""
+    loop_total = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+    return int((loop_total - 2).sum())
 
 
 def create_material() -> bpy.types.Material:
@@ -163,41 +221,29 @@ def main():
     parts = []
 
     # --- Create each body part ---
+    part_ranges = {}
+    n_verts = 0
     for part_name, props in BODY.items():
         subdiv = SUBDIV.get(part_name, DEFAULT_SUBDIV)
         obj = create_body_part(part_name, props["pos"], props["scale"], subdiv)
-
-        # Assign vertex groups for rigging
-        for bone_name, weight in WEIGHTS.get(part_name, []):
-            assign_vertex_group(obj, bone_name, weight)
-
-        # Material
-        if obj.data.materials:
-            obj.data.materials[0] = material
-        else:
-            obj.data.materials.append(material)
-
-        smooth_shade(obj)
+        part_ranges[part_name] = range(n_verts, n_verts + len(obj.data.vertices))
+        n_verts += len(obj.data.vertices)
         parts.append(obj)
 
     # --- Join all parts into a single mesh ---
-    bpy.ops.object.select_all(action='DESELECT')
-    for obj in parts:
-        obj.select_set(True)
-    bpy.context.view_layer.objects.active = parts[0]
-    bpy.ops.object.join()
+    humanoid = join_parts(parts, "Humanoid")
+
+    # Assign vertex groups for rigging, by each part's vertex range
+    for part_name, indices in part_ranges.items():
+        for bone_name, weight in WEIGHTS.get(part_name, []):
+            assign_vertex_group(humanoid, bone_name, weight, indices)
 
-    humanoid = bpy.context.active_object
-    humanoid.name = "Humanoid"
+    humanoid.data.materials.append(material)
+    smooth_shade(humanoid)
 
     # --- Apply a light decimate to hit ~3000 tris ---
-    # Count current tris
-    bpy.context.view_layer.update()
-    depsgraph = bpy.context.evaluated_depsgraph_get()
-    eval_obj = humanoid.evaluated_get(depsgraph)
-    eval_mesh = eval_obj.to_mesh()
-    current_tris = sum(len(p.vertices) - 2 for p in eval_mesh.polygons)
-    eval_obj.to_mesh_clear()
+    # Count current tris (no modifiers on the object, so the mesh data is final)
+    current_tris = count_tris(humanoid.data)
     print(f"  Pre-decimate triangle count: {current_tris}")
 
     TARGET_TRIS = 3000
@@ -208,11 +254,7 @@ def main():
         bpy.ops.object.modifier_apply(modifier=mod.name)
 
     # Final count
-    depsgraph = bpy.context.evaluated_depsgraph_get()
-    eval_obj = humanoid.evaluated_get(depsgraph)
-    eval_mesh = eval_obj.to_mesh()
-    final_tris = sum(len(p.vertices) - 2 for p in eval_mesh.polygons)
-    eval_obj.to_mesh_clear()
+    final_tris = count_tris(humanoid.data)
     print(f"  Final triangle count: {final_tris}")
 
     # --- Recalculate normals ---
@@ -222,10 +264,15 @@ def main():
     bpy.ops.object.mode_set(mode='OBJECT')
 
     # --- Set origin to base of feet ---
-    # Find lowest Z vertex
-    min_z = min(v.co.z for v in humanoid.data.vertices)
-    humanoid.location.z -= min_z
-    bpy.ops.object.transform_apply(location=True, rotation=False, scale=False)
+    # Shift the vertices so the lowest one sits at Z=0 (the object is at the
+    # world origin, so this is the same as moving it and applying location)
+    mesh = humanoid.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+    co[:, 2] -= co[:, 2].min()
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.update()
 
     # --- Export glTF ---
     os.makedirs(EXPORT_DIR, exist_ok=True)
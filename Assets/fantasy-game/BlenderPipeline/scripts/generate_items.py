@@ -19,37 +19,71 @@ import bpy
 import bmesh
 import os
 import math
-from mathutils import Vector
+import numpy as np
+from mathutils import Euler, Matrix
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 EXPORT_DIR = os.path.join(SCRIPT_DIR, "..", "exports")
 
+# Vertex-color materials by (roughness, metallic); models with the same
+# surface share one material, and one material block in the GLB
+_MAT_CACHE = {}
+
 
 def clear_scene():
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete(use_global=False)
-    for block in bpy.data.meshes:
-        if block.users == 0:
-            bpy.data.meshes.remove(block)
-    for mat in bpy.data.materials:
-        if mat.users == 0:
-            bpy.data.materials.remove(mat)
+    _MAT_CACHE.clear()
+    bpy.data.batch_remove(ids=list(bpy.data.objects))
+    orphans = [b for coll in (bpy.data.meshes, bpy.data.materials)
+               for b in coll if b.users == 0]
+    bpy.data.batch_remove(ids=orphans)
 
 
 def set_vertex_colors(obj, color_func):
+    """
+    Apply vertex colors using color_func, which maps an (N, 3) array of
+    world-space positions to (N, 4) RGBA colors.
+    """
     mesh = obj.data
     if not mesh.color_attributes:
         mesh.color_attributes.new(name="Color", type='BYTE_COLOR', domain='CORNER')
     color_layer = mesh.color_attributes[0]
-    vert_positions = {v.index: v.co.copy() for v in mesh.vertices}
-    for poly in mesh.polygons:
-        for li in poly.loop_indices:
-            loop = mesh.loops[li]
-            vi = loop.vertex_index
-            color_layer.data[li].color = color_func(vert_positions[vi])
+
+    n_verts = len(mesh.vertices)
+    co = np.empty(n_verts * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    # join_parts creates the object at the origin, so mesh coordinates are
+    # already the world coordinates the color rules are written in
+    co = co.reshape(n_verts, 3).astype(np.float64)
+    loop_vi = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vi)
+
+    # Color each vertex once, then gather per corner (loop)
+    colors = color_func(co)[loop_vi]
+    color_layer.data.foreach_set("color", colors.astype(np.float32, copy=False).ravel())
+
+
+def select_colors(n, rules, default):
+    """
+    Vectorized if/elif chain for color functions: rules is a list of
+    (mask, color) pairs where the first matching mask wins. A color is
+    either an RGBA tuple or an (n, 4) array.
+    """
+    out = np.empty((n, 4), dtype=np.float32)
+    out[:] = default
+    for mask, color in reversed(rules):
+        out[mask] = color[mask] if np.ndim(color) == 2 else color
+    return out
 
 
 def make_vc_material(name, roughness=0.6, metallic=0.0):
+    """
+    Return the vertex-color material for (roughness, metallic), creating it
+    under this name on first use.
+    """
+    key = (round(roughness, 2), round(metallic, 2))
+    mat = _MAT_CACHE.get(key)
+    if mat is not None:
+        return mat
     mat = bpy.data.materials.new(name=name)
     mat.use_nodes = True
     tree = mat.node_tree
@@ -70,90 +104,150 @@ def make_vc_material(name, roughness=0.6, metallic=0.0):
 
     tree.links.new(vc_node.outputs["Color"], bsdf.inputs["Base Color"])
     tree.links.new(bsdf.outputs["BSDF"], output.inputs["Surface"])
+    _MAT_CACHE[key] = mat
     return mat
 
 
 def export_glb(filepath):
-    bpy.ops.object.select_all(action='SELECT')
+    # clear_scene left only the generated models, so no selection is needed
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
     bpy.ops.export_scene.gltf(
         filepath=filepath,
         export_format='GLB',
-        use_selection=True,
-        export_apply=True,
+        use_selection=False,
+        export_apply=False,  # no modifiers; transforms are baked into the meshes
         export_yup=True,
         export_materials='EXPORT',
+        export_skins=False,
+        export_morph=False,
+        export_animations=False,
     )
     size = os.path.getsize(filepath)
     print(f"  Exported: {filepath} ({size / 1024:.1f} KB)")
 
 
+def _build_templates():
+    """
+    Unit primitives as (verts (V, 3) float32, faces) for from_pydata, built
+    once with bmesh. The vertex arrays are read-only; add_part transforms
+    them into fresh arrays.
+    """
+    templates = {}
+    for prim in ('cube', 'cylinder', 'uv_sphere', 'cone'):
+        bm = bmesh.new()
+        if prim == 'cube':
+            bmesh.ops.create_cube(bm, size=2.0)
+        elif prim == 'cylinder':
+            bmesh.ops.create_cone(bm, cap_ends=True, segments=8, radius1=1, radius2=1, depth=1)
+        elif prim == 'uv_sphere':
+            bmesh.ops.create_uvsphere(bm, u_segments=10, v_segments=8, radius=1)
+        elif prim == 'cone':
+            bmesh.ops.create_cone(bm, cap_ends=True, segments=8, radius1=1, radius2=0, depth=1)
+        bm.verts.index_update()
+        verts = np.array([v.co for v in bm.verts], dtype=np.float32)
+        verts.flags.writeable = False
+        faces = [tuple(v.index for v in f.verts) for f in bm.faces]
+        bm.free()
+        templates[prim] = (verts, faces)
+    return templates
+
+
+PRIM_TEMPLATES = _build_templates()
+
+
 def add_part(parts, name, prim, loc, scl, rot=None):
-    if prim == 'cube':
-        bpy.ops.mesh.primitive_cube_add(location=loc)
-    elif prim == 'cylinder':
-        bpy.ops.mesh.primitive_cylinder_add(location=loc, vertices=8, radius=1, depth=1)
-    elif prim == 'uv_sphere':
-        bpy.ops.mesh.primitive_uv_sphere_add(location=loc, segments=10, ring_count=8)
-    elif prim == 'cone':
-        bpy.ops.mesh.primitive_cone_add(location=loc, vertices=8, radius1=1, radius2=0, depth=1)
-    obj = bpy.context.active_object
-    obj.name = name
-    obj.scale = scl
-    if rot:
-        obj.rotation_euler = rot
-    bpy.ops.object.transform_apply(scale=True, rotation=True)
+    """
+    Create a primitive from its cached template with location, rotation and
+    scale baked into the vertices (no primitive operator or transform_apply).
+    The part is never linked to the scene; join_parts consumes it.
+    """
+    verts, faces = PRIM_TEMPLATES[prim]
+    m = np.array(Matrix.LocRotScale(loc, Euler(rot) if rot else None, scl), dtype=np.float32)
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(verts @ m[:3, :3].T + m[:3, 3], [], faces)
+    obj = bpy.data.objects.new(name, mesh)
     parts.append(obj)
     return obj
 
 
 def join_parts(parts, final_name):
-    bpy.ops.object.select_all(action='DESELECT')
-    for p in parts:
-        p.select_set(True)
-    bpy.context.view_layer.objects.active = parts[0]
-    bpy.ops.object.join()
-    obj = bpy.context.active_object
-    obj.name = final_name
-    return obj
+    """
+    Merge the parts into one new object with bulk foreach_get/foreach_set
+    reads and writes instead of bpy.ops.object.join. add_part already baked
+    each part's transform, so positions are concatenated as they are.
+    The object is not linked to the scene yet; main() links all items at
+    once right before export.
+    """
+    cos, loop_vis, loop_totals = [], [], []
+    n_verts = 0
+    for obj in parts:
+        mesh = obj.data
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        cos.append(co)
+        loop_vi = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", loop_vi)
+        loop_vis.append(loop_vi + n_verts)
+        loop_total = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", loop_total)
+        loop_totals.append(loop_total)
+        n_verts += len(mesh.vertices)
+    # Drop the parts first so the merged object gets the plain name
+    bpy.data.batch_remove(ids=parts + [p.data for p in parts])
+
+    co = np.concatenate(cos)
+    loop_vi = np.concatenate(loop_vis)
+    loop_total = np.concatenate(loop_totals)
+    loop_start = np.zeros(len(loop_total), dtype=np.int32)
+    np.cumsum(loop_total[:-1], out=loop_start[1:])
+
+    mesh = bpy.data.meshes.new(final_name)
+    mesh.vertices.add(n_verts)
+    mesh.vertices.foreach_set("co", co)
+    mesh.loops.add(len(loop_vi))
+    mesh.loops.foreach_set("vertex_index", loop_vi)
+    mesh.polygons.add(len(loop_total))
+    mesh.polygons.foreach_set("loop_start", loop_start)
+    if bpy.app.version < (4, 0, 0):  # derived from loop_start in 4.0+
+        mesh.polygons.foreach_set("loop_total", loop_total)
+    mesh.update(calc_edges=True)
+
+    return bpy.data.objects.new(final_name, mesh)
 
 
 def smooth_shade(obj):
-    for poly in obj.data.polygons:
-        poly.use_smooth = True
+    n = len(obj.data.polygons)
+    obj.data.polygons.foreach_set("use_smooth", np.ones(n, dtype=bool))
 
 
 def set_origin_center(obj):
     """Move vertices so the mesh is centered on all axes.
     Strips out any offset_x baked into vertex positions."""
-    verts = obj.data.vertices
-    xs = [v.co.x for v in verts]
-    ys = [v.co.y for v in verts]
-    zs = [v.co.z for v in verts]
-    cx = (min(xs) + max(xs)) * 0.5
-    cy = (min(ys) + max(ys)) * 0.5
-    cz = (min(zs) + max(zs)) * 0.5
-    for v in verts:
-        v.co.x -= cx
-        v.co.y -= cy
-        v.co.z -= cz
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+    mn = co.min(axis=0)
+    mx = co.max(axis=0)
+    co -= (mn + mx) * 0.5
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.update()
     obj.location = (0, 0, 0)
 
 
 def set_origin_bottom(obj):
     """Move vertices so the mesh is centered in X/Y with bottom at Z=0.
     Strips out any offset_x baked into vertex positions."""
-    verts = obj.data.vertices
-    xs = [v.co.x for v in verts]
-    ys = [v.co.y for v in verts]
-    zs = [v.co.z for v in verts]
-    cx = (min(xs) + max(xs)) * 0.5
-    cy = (min(ys) + max(ys)) * 0.5
-    min_z = min(zs)
-    for v in verts:
-        v.co.x -= cx
-        v.co.y -= cy
-        v.co.z -= min_z
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+    mn = co.min(axis=0)
+    mx = co.max(axis=0)
+    co[:, :2] -= (mn[:2] + mx[:2]) * 0.5
+    co[:, 2] -= mn[2]
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.update()
     obj.location = (0, 0, 0)
 
 
@@ -178,19 +272,14 @@ def generate_health_potion(offset_x=0):
     item = join_parts(parts, "HealthPotion")
 
     def potion_color(pos):
-        lx = pos.x - offset_x
-        dist = math.sqrt(lx ** 2 + pos.y ** 2)
-        # Cork
-        if pos.z > 0.25:
-            return (0.55, 0.40, 0.22, 1.0)
-        # Neck (glass)
-        if pos.z > 0.18 and dist < 0.04:
-            return (0.75, 0.80, 0.82, 1.0)
-        # Liquid (visible through glass -- red)
-        if dist < 0.05 and pos.z < 0.16:
-            return (0.85, 0.12, 0.10, 1.0)
-        # Glass body
-        return (0.70, 0.75, 0.78, 1.0)
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        dist = np.hypot(x - offset_x, y)
+        return select_colors(len(pos), [
+            (z > 0.25, (0.55, 0.40, 0.22, 1.0)),                  # Cork
+            ((z > 0.18) & (dist < 0.04), (0.75, 0.80, 0.82, 1.0)),  # Neck (glass)
+            # Liquid (visible through glass -- red)
+            ((dist < 0.05) & (z < 0.16), (0.85, 0.12, 0.10, 1.0)),
+        ], (0.70, 0.75, 0.78, 1.0))  # Glass body
 
     set_vertex_colors(item, potion_color)
     mat = make_vc_material("PotionMat", roughness=0.2, metallic=0.0)
@@ -228,26 +317,21 @@ def generate_shield(offset_x=1.5):
     item = join_parts(parts, "Shield")
 
     def shield_color(pos):
-        lx = pos.x - offset_x
-        dist = math.sqrt(lx ** 2 + (pos.z - 0.25) ** 2)
-        # Boss (metal)
-        if dist < 0.07 and pos.y < 0.0:
-            return (0.55, 0.52, 0.48, 1.0)
-        # Rim (metal)
-        if dist > 0.20:
-            return (0.48, 0.45, 0.40, 1.0)
-        # Cross braces (metal)
-        if (abs(lx) < 0.02 or abs(pos.z - 0.25) < 0.02) and pos.y < 0.0:
-            return (0.50, 0.48, 0.42, 1.0)
-        # Handle (leather)
-        if pos.y > 0.02:
-            return (0.38, 0.22, 0.10, 1.0)
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        lx = x - offset_x
+        dz = z - 0.25
+        dist = np.hypot(lx, dz)
+        front = y < 0.0
+        braces = ((np.abs(lx) < 0.02) | (np.abs(dz) < 0.02)) & front
         # Wood sections (quadrant coloring for painted look)
-        if lx > 0 and pos.z > 0.25:
-            return (0.55, 0.30, 0.12, 1.0)  # Warm wood
-        if lx < 0 and pos.z < 0.25:
-            return (0.55, 0.30, 0.12, 1.0)
-        return (0.48, 0.28, 0.14, 1.0)  # Slightly darker wood
+        warm = ((lx > 0) & (dz > 0)) | ((lx < 0) & (dz < 0))
+        return select_colors(len(pos), [
+            ((dist < 0.07) & front, (0.55, 0.52, 0.48, 1.0)),  # Boss (metal)
+            (dist > 0.20, (0.48, 0.45, 0.40, 1.0)),            # Rim (metal)
+            (braces, (0.50, 0.48, 0.42, 1.0)),                 # Cross braces (metal)
+            (y > 0.02, (0.38, 0.22, 0.10, 1.0)),               # Handle (leather)
+            (warm, (0.55, 0.30, 0.12, 1.0)),                   # Warm wood
+        ], (0.48, 0.28, 0.14, 1.0))  # Slightly darker wood
 
     set_vertex_colors(item, shield_color)
     mat = make_vc_material("ShieldMat", roughness=0.65, metallic=0.1)
@@ -286,24 +370,16 @@ def generate_axe(offset_x=3):
     item = join_parts(parts, "Axe")
 
     def axe_color(pos):
-        lx = pos.x - offset_x
-        # Blade edge (bright metal)
-        if lx > 0.14 and abs(pos.z - 0.52) < 0.08:
-            return (0.70, 0.68, 0.65, 1.0)
-        # Axe head (darker metal)
-        if lx > 0.02 and abs(pos.z - 0.52) < 0.08:
-            return (0.48, 0.46, 0.44, 1.0)
-        # Poll
-        if lx < 0.0 and abs(pos.z - 0.52) < 0.04:
-            return (0.45, 0.43, 0.40, 1.0)
-        # Grip (leather)
-        if pos.z < 0.22 and pos.z > 0.02:
-            return (0.35, 0.20, 0.08, 1.0)
-        # Pommel (metal)
-        if pos.z < 0.05:
-            return (0.50, 0.48, 0.42, 1.0)
-        # Handle (wood)
-        return (0.50, 0.35, 0.18, 1.0)
+        lx = pos[:, 0] - offset_x
+        z = pos[:, 2]
+        head_dz = np.abs(z - 0.52)
+        return select_colors(len(pos), [
+            ((lx > 0.14) & (head_dz < 0.08), (0.70, 0.68, 0.65, 1.0)),  # Blade edge (bright metal)
+            ((lx > 0.02) & (head_dz < 0.08), (0.48, 0.46, 0.44, 1.0)),  # Axe head (darker metal)
+            ((lx < 0.0) & (head_dz < 0.04), (0.45, 0.43, 0.40, 1.0)),   # Poll
+            ((z < 0.22) & (z > 0.02), (0.35, 0.20, 0.08, 1.0)),         # Grip (leather)
+            (z < 0.05, (0.50, 0.48, 0.42, 1.0)),                        # Pommel (metal)
+        ], (0.50, 0.35, 0.18, 1.0))  # Handle (wood)
 
     set_vertex_colors(item, axe_color)
     mat = make_vc_material("AxeMat", roughness=0.5, metallic=0.3)
@@ -341,20 +417,17 @@ def generate_helmet(offset_x=4.5):
     item = join_parts(parts, "Helmet")
 
     def helmet_color(pos):
-        lx = pos.x - offset_x
-        # Nose guard (slightly different metal)
-        if pos.y < -0.10 and abs(lx) < 0.025:
-            return (0.42, 0.40, 0.38, 1.0)
-        # Crest (brighter)
-        if pos.z > 0.22 and abs(lx) < 0.025:
-            return (0.55, 0.52, 0.48, 1.0)
-        # Brim
-        if pos.z < 0.07:
-            return (0.40, 0.38, 0.35, 1.0)
+        y, z = pos[:, 1], pos[:, 2]
+        center = np.abs(pos[:, 0] - offset_x) < 0.025
         # Dome (iron with slight wear variation)
-        height_factor = (pos.z - 0.05) / 0.25
+        height_factor = (z - 0.05) / 0.25
         base = 0.45 + height_factor * 0.05
-        return (base, base - 0.02, base - 0.04, 1.0)
+        dome = np.stack([base, base - 0.02, base - 0.04, np.ones_like(base)], axis=1)
+        return select_colors(len(pos), [
+            ((y < -0.10) & center, (0.42, 0.40, 0.38, 1.0)),  # Nose guard (slightly different metal)
+            ((z > 0.22) & center, (0.55, 0.52, 0.48, 1.0)),   # Crest (brighter)
+            (z < 0.07, (0.40, 0.38, 0.35, 1.0)),              # Brim
+        ], dome)
 
     set_vertex_colors(item, helmet_color)
     mat = make_vc_material("HelmetMat", roughness=0.55, metallic=0.5)
@@ -385,18 +458,20 @@ def generate_bone_fragment(offset_x=6):
     item = join_parts(parts, "BoneFragment")
 
     def bone_color(pos):
+        lx = pos[:, 0] - offset_x
+        z = pos[:, 2]
         # Slightly yellowish white bone
-        height_factor = (pos.z + 0.05) / 0.25
-        r = 0.85 + height_factor * 0.02
-        g = 0.80 + height_factor * 0.01
-        b = 0.70
+        height_factor = (z + 0.05) / 0.25
+        color = np.ones((len(pos), 4))
+        color[:, 0] = 0.85 + height_factor * 0.02
+        color[:, 1] = 0.80 + height_factor * 0.01
+        color[:, 2] = 0.70
         # Joint knobs slightly darker
-        lx = pos.x - offset_x
-        if (abs(lx + 0.03) < 0.04 and pos.z > 0.12) or (abs(lx - 0.03) < 0.04 and pos.z < 0.02):
-            r -= 0.08
-            g -= 0.08
-            b -= 0.05
-        return (min(1.0, r), min(1.0, g), min(1.0, b), 1.0)
+        knob = (((np.abs(lx + 0.03) < 0.04) & (z > 0.12))
+                | ((np.abs(lx - 0.03) < 0.04) & (z < 0.02)))
+        color[knob, :3] -= (0.08, 0.08, 0.05)
+        np.minimum(color, 1.0, out=color)
+        return color
 
     set_vertex_colors(item, bone_color)
     mat = make_vc_material("BoneMat", roughness=0.7)
@@ -433,18 +508,12 @@ def generate_wolf_pelt(offset_x=7.5):
     item = join_parts(parts, "WolfPelt")
 
     def pelt_color(pos):
-        lx = pos.x - offset_x
-        # Head area (darker)
-        if pos.y < -0.10:
-            return (0.38, 0.32, 0.25, 1.0)
-        # Spine stripe (darker along center)
-        if abs(lx) < 0.04:
-            return (0.40, 0.35, 0.28, 1.0)
-        # Belly area (lighter)
-        if abs(lx) > 0.12:
-            return (0.58, 0.52, 0.45, 1.0)
-        # Main fur
-        return (0.48, 0.42, 0.35, 1.0)
+        ax = np.abs(pos[:, 0] - offset_x)
+        return select_colors(len(pos), [
+            (pos[:, 1] < -0.10, (0.38, 0.32, 0.25, 1.0)),  # Head area (darker)
+            (ax < 0.04, (0.40, 0.35, 0.28, 1.0)),          # Spine stripe (darker along center)
+            (ax > 0.12, (0.58, 0.52, 0.45, 1.0)),          # Belly area (lighter)
+        ], (0.48, 0.42, 0.35, 1.0))  # Main fur
 
     set_vertex_colors(item, pelt_color)
     mat = make_vc_material("PeltMat", roughness=0.85)
@@ -466,12 +535,19 @@ def main():
     print("  Generating Items")
     print("=" * 60)
 
-    generate_health_potion(offset_x=0)
-    generate_shield(offset_x=1.5)
-    generate_axe(offset_x=3)
-    generate_helmet(offset_x=4.5)
-    generate_bone_fragment(offset_x=6)
-    generate_wolf_pelt(offset_x=7.5)
+    items = [
+        generate_health_potion(offset_x=0),
+        generate_shield(offset_x=1.5),
+        generate_axe(offset_x=3),
+        generate_helmet(offset_x=4.5),
+        generate_bone_fragment(offset_x=6),
+        generate_wolf_pelt(offset_x=7.5),
+    ]
+
+    # Link everything in one go so the depsgraph is evaluated once
+    for item in items:
+        bpy.context.scene.collection.objects.link(item)
+    bpy.context.view_layer.update()
 
     export_glb(os.path.join(EXPORT_DIR, "items.glb"))
 
@@ -17,39 +17,73 @@ import bpy
 import bmesh
 import os
 import math
-from mathutils import Vector
+import shutil
+import subprocess
+import numpy as np
+from mathutils import Euler
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 EXPORT_DIR = os.path.join(SCRIPT_DIR, "..", "exports")
 
+# Vertex-color materials by (roughness, metallic); models with the same
+# surface share one material, and one material block in the GLB
+_MAT_CACHE = {}
+
 
 def clear_scene():
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete(use_global=False)
-    for block in bpy.data.meshes:
-        if block.users == 0:
-            bpy.data.meshes.remove(block)
-    for mat in bpy.data.materials:
-        if mat.users == 0:
-            bpy.data.materials.remove(mat)
+    _MAT_CACHE.clear()
+    bpy.data.batch_remove(ids=list(bpy.data.objects))
+    orphans = [b for coll in (bpy.data.meshes, bpy.data.materials)
+               for b in coll if b.users == 0]
+    bpy.data.batch_remove(ids=orphans)
 
 
 def set_vertex_colors(obj, color_func):
-    """Apply vertex colors using a function(vertex_position) -> (r,g,b,a)."""
+    """
+    Apply vertex colors using color_func, which maps an (N, 3) array of
+    world-space positions to (N, 4) RGBA colors.
+    """
     mesh = obj.data
     if not mesh.color_attributes:
         mesh.color_attributes.new(name="Color", type='BYTE_COLOR', domain='CORNER')
     color_layer = mesh.color_attributes[0]
-    vert_positions = {v.index: v.co.copy() for v in mesh.vertices}
-    for poly in mesh.polygons:
-        for li in poly.loop_indices:
-            loop = mesh.loops[li]
-            vi = loop.vertex_index
-            color_layer.data[li].color = color_func(vert_positions[vi])
+
+    n_verts = len(mesh.vertices)
+    co = np.empty(n_verts * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    # build_mesh creates the object at the origin, so mesh coordinates are
+    # already the world coordinates the color rules are written in
+    co = co.reshape(n_verts, 3).astype(np.float64)
+    loop_vi = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vi)
+
+    # Color each vertex once, then gather per corner (loop)
+    colors = color_func(co)[loop_vi]
+    color_layer.data.foreach_set("color", colors.astype(np.float32, copy=False).ravel())
+
+
+def select_colors(n, rules, default):
+    """
+    Vectorized if/elif chain for color functions: rules is a list of
+    (mask, color) pairs where the first matching mask wins. A color is
+    either an RGBA tuple or an (n, 4) array.
+    """
+    out = np.empty((n, 4), dtype=np.float32)
+    out[:] = default
+    for mask, color in reversed(rules):
+        out[mask] = color[mask] if np.ndim(color) == 2 else color
+    return out
 
 
 def make_vc_material(name, roughness=0.6, metallic=0.0):
-    """Create a Principled BSDF material reading vertex colors."""
+    """
+    Return the Principled BSDF material reading vertex colors for
+    (roughness, metallic), creating it under this name on first use.
+    """
+    key = (round(roughness, 2), round(metallic, 2))
+    mat = _MAT_CACHE.get(key)
+    if mat is not None:
+        return mat
     mat = bpy.data.materials.new(name=name)
     mat.use_nodes = True
     tree = mat.node_tree
@@ -71,73 +105,144 @@ def make_vc_material(name, roughness=0.6, metallic=0.0):
     tree.links.new(vc_node.outputs["Color"], bsdf.inputs["Base Color"])
     tree.links.new(bsdf.outputs["BSDF"], output.inputs["Surface"])
 
+    _MAT_CACHE[key] = mat
     return mat
 
 
 def export_glb(filepath):
-    bpy.ops.object.select_all(action='SELECT')
+    # clear_scene left only the generated models, so no selection is needed
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
     bpy.ops.export_scene.gltf(
         filepath=filepath,
         export_format='GLB',
-        use_selection=True,
-        export_apply=True,
+        use_selection=False,
+        export_apply=False,  # no modifiers; transforms are baked into the meshes
         export_yup=True,
         export_materials='EXPORT',
+        export_skins=False,
+        export_morph=False,
+        export_animations=False,
     )
+    optimize_glb(filepath)
     size = os.path.getsize(filepath)
     print(f"  Exported: {filepath} ({size / 1024:.1f} KB)")
 
 
+def optimize_glb(filepath):
+    """
+    Run gltfpack (meshoptimizer) over the GLB: vertex cache/fetch reordering
+    and quantized attributes, except positions (-vpf), whose dequantization
+    would land on the node that GltfBootstrap discards. -kn keeps one named
+    node per NPC. Skipped if gltfpack is not on PATH.
+    """
+    gltfpack = shutil.which("gltfpack")
+    if gltfpack is None:
+        print("  gltfpack not found, skipping mesh optimization")
+        return
+    subprocess.run([gltfpack, "-i", filepath, "-o", filepath, "-vpf", "-kn"], check=True)
+
+
+def _build_templates():
+    """
+    Unit primitives built once with bmesh, as read-only float32/int32 arrays:
+    {prim: (homogeneous verts (V, 4), face vertex indices (flat), face sizes)}.
+    """
+    templates = {}
+    for prim in ('cube', 'cylinder', 'uv_sphere', 'cone'):
+        bm = bmesh.new()
+        if prim == 'cube':
+            bmesh.ops.create_cube(bm, size=2.0)
+        elif prim == 'cylinder':
+            bmesh.ops.create_cone(bm, cap_ends=True, segments=8, radius1=1, radius2=1, depth=1)
+        elif prim == 'uv_sphere':
+            bmesh.ops.create_uvsphere(bm, u_segments=10, v_segments=8, radius=1)
+        elif prim == 'cone':
+            bmesh.ops.create_cone(bm, cap_ends=True, segments=8, radius1=1, radius2=0, depth=1)
+        bm.verts.index_update()
+        verts = np.array([(*v.co, 1.0) for v in bm.verts], dtype=np.float32)
+        face_verts = np.array([v.index for f in bm.faces for v in f.verts], dtype=np.int32)
+        face_sizes = np.array([len(f.verts) for f in bm.faces], dtype=np.int32)
+        bm.free()
+        for arr in (verts, face_verts, face_sizes):
+            arr.flags.writeable = False
+        templates[prim] = (verts, face_verts, face_sizes)
+    return templates
+
+
+PRIM_TEMPLATES = _build_templates()
+
+
 def add_part(parts, name, prim, loc, scl, rot=None):
-    if prim == 'cube':
-        bpy.ops.mesh.primitive_cube_add(location=loc)
-    elif prim == 'cylinder':
-        bpy.ops.mesh.primitive_cylinder_add(location=loc, vertices=8, radius=1, depth=1)
-    elif prim == 'uv_sphere':
-        bpy.ops.mesh.primitive_uv_sphere_add(location=loc, segments=10, ring_count=8)
-    elif prim == 'cone':
-        bpy.ops.mesh.primitive_cone_add(location=loc, vertices=8, radius1=1, radius2=0, depth=1)
-    obj = bpy.context.active_object
-    obj.name = name
-    obj.scale = scl
-    if rot:
-        obj.rotation_euler = rot
-    bpy.ops.object.transform_apply(scale=True, rotation=True)
-    parts.append(obj)
-    return obj
-
-
-def join_parts(parts, final_name):
-    bpy.ops.object.select_all(action='DESELECT')
-    for p in parts:
-        p.select_set(True)
-    bpy.context.view_layer.objects.active = parts[0]
-    bpy.ops.object.join()
-    obj = bpy.context.active_object
-    obj.name = final_name
-    return obj
+    """Queue a primitive with its transform; build_mesh places all parts at once."""
+    parts.append((prim, loc, scl, rot))
+
+
+def build_mesh(parts, final_name):
+    """
+    Build one mesh object from the queued parts with bulk foreach_set calls.
+    Parts are grouped by primitive so each group is placed with one einsum
+    over its stacked (K, 3, 4) affine matrices; no operator is involved.
+    The object is not linked to the scene yet; main() links all NPCs at
+    once right before export.
+    """
+    groups = {}
+    for prim, loc, scl, rot in parts:
+        groups.setdefault(prim, []).append((loc, scl, rot))
+
+    co_chunks, vi_chunks, size_chunks = [], [], []
+    n_verts = 0
+    for prim, specs in groups.items():
+        verts, face_verts, face_sizes = PRIM_TEMPLATES[prim]
+        k = len(specs)
+        ms = np.empty((k, 3, 4), dtype=np.float32)
+        # R @ diag(scl): scale the rotation's columns, translation in column 3
+        ms[:, :, :3] = [Euler(rot).to_matrix() if rot else np.eye(3) for _, _, rot in specs]
+        ms[:, :, :3] *= np.array([scl for _, scl, _ in specs], dtype=np.float32)[:, None, :]
+        ms[:, :, 3] = [loc for loc, _, _ in specs]
+        co_chunks.append(np.einsum('kij,vj->kvi', ms, verts).reshape(-1, 3))
+        offsets = n_verts + np.arange(k, dtype=np.int32)[:, None] * len(verts)
+        vi_chunks.append((face_verts + offsets).ravel())
+        size_chunks.append(np.tile(face_sizes, k))
+        n_verts += k * len(verts)
+
+    co = np.concatenate(co_chunks)
+    loop_vi = np.concatenate(vi_chunks)
+    loop_total = np.concatenate(size_chunks)
+    loop_start = np.zeros(len(loop_total), dtype=np.int32)
+    np.cumsum(loop_total[:-1], out=loop_start[1:])
+
+    mesh = bpy.data.meshes.new(final_name)
+    mesh.vertices.add(n_verts)
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.loops.add(len(loop_vi))
+    mesh.loops.foreach_set("vertex_index", loop_vi)
+    mesh.polygons.add(len(loop_total))
+    mesh.polygons.foreach_set("loop_start", loop_start)
+    if bpy.app.version < (4, 0, 0):  # derived from loop_start in 4.0+
+        mesh.polygons.foreach_set("loop_total", loop_total)
+    mesh.update(calc_edges=True)
+
+    return bpy.data.objects.new(final_name, mesh)
 
 
 def smooth_shade(obj):
-    for poly in obj.data.polygons:
-        poly.use_smooth = True
+    n = len(obj.data.polygons)
+    obj.data.polygons.foreach_set("use_smooth", np.ones(n, dtype=bool))
 
 
 def set_origin_bottom(obj, z_offset=0.0):
     """Move vertices so the mesh is centered in X/Y with bottom at Z=0.
     This strips out any offset_x baked into vertex positions."""
-    verts = obj.data.vertices
-    xs = [v.co.x for v in verts]
-    ys = [v.co.y for v in verts]
-    zs = [v.co.z for v in verts]
-    cx = (min(xs) + max(xs)) * 0.5
-    cy = (min(ys) + max(ys)) * 0.5
-    min_z = min(zs) + z_offset
-    for v in verts:
-        v.co.x -= cx
-        v.co.y -= cy
-        v.co.z -= min_z
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+    mn = co.min(axis=0)
+    mx = co.max(axis=0)
+    co[:, :2] -= (mn[:2] + mx[:2]) * 0.5
+    co[:, 2] -= mn[2] + z_offset
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.update()
     obj.location = (0, 0, 0)
 
 
@@ -180,29 +285,20 @@ def generate_villager(offset_x=0):
         add_part(parts, f"V_Sole_{side}", 'cube',
                  (offset_x + side * 0.06, -0.01, 0.24), (0.05, 0.07, 0.02))
 
-    npc = join_parts(parts, "Villager")
+    npc = build_mesh(parts, "Villager")
 
     def villager_color(pos):
-        lx = pos.x - offset_x
-        # Head/hands -- skin tone
-        if pos.z > 1.42 and pos.z < 1.65:
-            return (0.85, 0.70, 0.58, 1.0)
-        if pos.z > 1.65:  # Hair
-            return (0.35, 0.22, 0.12, 1.0)
-        # Hands
-        if pos.z < 0.92 and pos.z > 0.82 and abs(lx) > 0.12:
-            return (0.85, 0.70, 0.58, 1.0)
-        # Belt
-        if pos.z > 0.92 and pos.z < 0.98:
-            return (0.35, 0.22, 0.10, 1.0)
-        # Tunic
-        if pos.z > 0.80 and pos.z < 1.42:
-            return (0.25, 0.45, 0.20, 1.0)  # Green tunic
-        # Boots
-        if pos.z < 0.50:
-            return (0.30, 0.18, 0.10, 1.0)
-        # Pants
-        return (0.40, 0.35, 0.28, 1.0)
+        ax = np.abs(pos[:, 0] - offset_x)
+        z = pos[:, 2]
+        skin = (0.85, 0.70, 0.58, 1.0)
+        return select_colors(len(pos), [
+            ((z > 1.42) & (z < 1.65), skin),                          # Head
+            (z > 1.65, (0.35, 0.22, 0.12, 1.0)),                      # Hair
+            ((z < 0.92) & (z > 0.82) & (ax > 0.12), skin),            # Hands
+            ((z > 0.92) & (z < 0.98), (0.35, 0.22, 0.10, 1.0)),       # Belt
+            ((z > 0.80) & (z < 1.42), (0.25, 0.45, 0.20, 1.0)),       # Green tunic
+            (z < 0.50, (0.30, 0.18, 0.10, 1.0)),                      # Boots
+        ], (0.40, 0.35, 0.28, 1.0))  # Pants
 
     set_vertex_colors(npc, villager_color)
     mat = make_vc_material("VillagerMat", roughness=0.7)
@@ -259,36 +355,24 @@ def generate_blacksmith(offset_x=3):
         add_part(parts, f"B_Sole_{side}", 'cube',
                  (offset_x + side * 0.07, -0.01, 0.22), (0.055, 0.075, 0.025))
 
-    npc = join_parts(parts, "Blacksmith")
+    npc = build_mesh(parts, "Blacksmith")
 
     def blacksmith_color(pos):
-        lx = pos.x - offset_x
-        # Head -- skin
-        if pos.z > 1.38:
-            return (0.75, 0.58, 0.48, 1.0)
-        # Hands
-        if pos.z < 0.88 and pos.z > 0.76 and abs(lx) > 0.15:
-            return (0.75, 0.58, 0.48, 1.0)
-        # Hammer head (metal)
-        if pos.z < 0.56 and pos.z > 0.44 and lx > 0.15:
-            return (0.50, 0.50, 0.52, 1.0)
-        # Hammer handle
-        if pos.z < 0.80 and pos.z > 0.50 and lx > 0.18 and abs(pos.y + 0.05) < 0.05:
-            return (0.45, 0.30, 0.15, 1.0)
-        # Apron (leather brown)
-        if pos.y < -0.08 and pos.z > 0.68 and pos.z < 1.30 and abs(lx) < 0.15:
-            return (0.40, 0.25, 0.12, 1.0)
-        # Belt
-        if pos.z > 0.87 and pos.z < 0.93:
-            return (0.30, 0.18, 0.08, 1.0)
-        # Shirt (dark grey)
-        if pos.z > 0.80 and pos.z < 1.38:
-            return (0.25, 0.25, 0.28, 1.0)
-        # Boots
-        if pos.z < 0.45:
-            return (0.28, 0.16, 0.08, 1.0)
-        # Pants
-        return (0.35, 0.30, 0.25, 1.0)
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        lx = x - offset_x
+        skin = (0.75, 0.58, 0.48, 1.0)
+        hammer_handle = (z < 0.80) & (z > 0.50) & (lx > 0.18) & (np.abs(y + 0.05) < 0.05)
+        apron = (y < -0.08) & (z > 0.68) & (z < 1.30) & (np.abs(lx) < 0.15)
+        return select_colors(len(pos), [
+            (z > 1.38, skin),                                          # Head
+            ((z < 0.88) & (z > 0.76) & (np.abs(lx) > 0.15), skin),     # Hands
+            ((z < 0.56) & (z > 0.44) & (lx > 0.15), (0.50, 0.50, 0.52, 1.0)),  # Hammer head (metal)
+            (hammer_handle, (0.45, 0.30, 0.15, 1.0)),                  # Hammer handle
+            (apron, (0.40, 0.25, 0.12, 1.0)),                          # Apron (leather brown)
+            ((z > 0.87) & (z < 0.93), (0.30, 0.18, 0.08, 1.0)),        # Belt
+            ((z > 0.80) & (z < 1.38), (0.25, 0.25, 0.28, 1.0)),        # Shirt (dark grey)
+            (z < 0.45, (0.28, 0.16, 0.08, 1.0)),                       # Boots
+        ], (0.35, 0.30, 0.25, 1.0))  # Pants
 
     set_vertex_colors(npc, blacksmith_color)
     mat = make_vc_material("BlacksmithMat", roughness=0.75)
@@ -341,33 +425,22 @@ def generate_merchant(offset_x=6):
     # Sash/belt
     add_part(parts, "M_Sash", 'cylinder', (offset_x, 0, 0.92), (0.16, 0.12, 0.025))
 
-    npc = join_parts(parts, "Merchant")
+    npc = build_mesh(parts, "Merchant")
 
     def merchant_color(pos):
-        lx = pos.x - offset_x
-        # Face -- skin
-        if pos.z > 1.42 and pos.z < 1.60 and pos.y < 0.02:
-            return (0.82, 0.68, 0.55, 1.0)
-        # Hood
-        if pos.z > 1.55:
-            return (0.50, 0.22, 0.40, 1.0)  # Purple hood
-        # Hands
-        if pos.z < 0.96 and pos.z > 0.85 and abs(lx) > 0.16:
-            return (0.82, 0.68, 0.55, 1.0)
-        # Backpack
-        if pos.y > 0.10 and pos.z > 0.95:
-            return (0.45, 0.30, 0.18, 1.0)
-        # Straps
-        if abs(pos.y - 0.04) < 0.05 and abs(lx) < 0.08 and pos.z > 1.10:
-            return (0.40, 0.25, 0.12, 1.0)
-        # Sash
-        if pos.z > 0.89 and pos.z < 0.95:
-            return (0.70, 0.55, 0.15, 1.0)  # Gold sash
-        # Robe
-        if pos.z > 0.45:
-            return (0.55, 0.25, 0.45, 1.0)  # Purple robe
-        # Robe bottom (darker)
-        return (0.45, 0.18, 0.35, 1.0)
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        ax = np.abs(x - offset_x)
+        skin = (0.82, 0.68, 0.55, 1.0)
+        return select_colors(len(pos), [
+            ((z > 1.42) & (z < 1.60) & (y < 0.02), skin),                # Face
+            (z > 1.55, (0.50, 0.22, 0.40, 1.0)),                         # Purple hood
+            ((z < 0.96) & (z > 0.85) & (ax > 0.16), skin),               # Hands
+            ((y > 0.10) & (z > 0.95), (0.45, 0.30, 0.18, 1.0)),          # Backpack
+            ((np.abs(y - 0.04) < 0.05) & (ax < 0.08) & (z > 1.10),
+             (0.40, 0.25, 0.12, 1.0)),                                   # Straps
+            ((z > 0.89) & (z < 0.95), (0.70, 0.55, 0.15, 1.0)),          # Gold sash
+            (z > 0.45, (0.55, 0.25, 0.45, 1.0)),                         # Purple robe
+        ], (0.45, 0.18, 0.35, 1.0))  # Robe bottom (darker)
 
     set_vertex_colors(npc, merchant_color)
     mat = make_vc_material("MerchantMat", roughness=0.65)
@@ -427,39 +500,23 @@ def generate_scout(offset_x=9):
         add_part(parts, f"S_Sole_{side}", 'cube',
                  (offset_x + side * 0.06, -0.01, 0.22), (0.045, 0.065, 0.02))
 
-    npc = join_parts(parts, "Scout")
+    npc = build_mesh(parts, "Scout")
 
     def scout_color(pos):
-        lx = pos.x - offset_x
-        # Face -- skin
-        if pos.z > 1.42 and pos.z < 1.58 and pos.y < 0.01:
-            return (0.80, 0.65, 0.52, 1.0)
-        # Hood
-        if pos.z > 1.58:
-            return (0.22, 0.32, 0.18, 1.0)  # Dark green
-        # Hands
-        if pos.z < 0.90 and pos.z > 0.80 and abs(lx) > 0.12:
-            return (0.80, 0.65, 0.52, 1.0)
-        # Quiver
-        if lx > 0.04 and pos.y > 0.06 and pos.z > 1.00:
-            return (0.45, 0.30, 0.15, 1.0)  # Leather quiver
-        # Arrow tips
-        if pos.z > 1.35 and lx > 0.04:
-            return (0.55, 0.55, 0.58, 1.0)  # Metal tips
-        # Cloak
-        if pos.y > 0.0 and pos.z > 0.70:
-            return (0.25, 0.35, 0.20, 1.0)  # Green cloak
-        # Belt
-        if pos.z > 0.90 and pos.z < 0.96:
-            return (0.35, 0.22, 0.10, 1.0)
-        # Tunic (under cloak)
-        if pos.z > 0.80 and pos.z < 1.42:
-            return (0.35, 0.28, 0.18, 1.0)  # Brown
-        # Boots
-        if pos.z < 0.45:
-            return (0.25, 0.18, 0.10, 1.0)
-        # Pants
-        return (0.30, 0.28, 0.22, 1.0)
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        lx = x - offset_x
+        skin = (0.80, 0.65, 0.52, 1.0)
+        return select_colors(len(pos), [
+            ((z > 1.42) & (z < 1.58) & (y < 0.01), skin),                # Face
+            (z > 1.58, (0.22, 0.32, 0.18, 1.0)),                         # Dark green hood
+            ((z < 0.90) & (z > 0.80) & (np.abs(lx) > 0.12), skin),       # Hands
+            ((lx > 0.04) & (y > 0.06) & (z > 1.00), (0.45, 0.30, 0.15, 1.0)),  # Leather quiver
+            ((z > 1.35) & (lx > 0.04), (0.55, 0.55, 0.58, 1.0)),         # Metal arrow tips
+            ((y > 0.0) & (z > 0.70), (0.25, 0.35, 0.20, 1.0)),           # Green cloak
+            ((z > 0.90) & (z < 0.96), (0.35, 0.22, 0.10, 1.0)),          # Belt
+            ((z > 0.80) & (z < 1.42), (0.35, 0.28, 0.18, 1.0)),          # Brown tunic (under cloak)
+            (z < 0.45, (0.25, 0.18, 0.10, 1.0)),                         # Boots
+        ], (0.30, 0.28, 0.22, 1.0))  # Pants
 
     set_vertex_colors(npc, scout_color)
     mat = make_vc_material("ScoutMat", roughness=0.7)
@@ -481,10 +538,17 @@ def main():
     print("  Generating NPCs")
     print("=" * 60)
 
-    villager = generate_villager(offset_x=0)
-    blacksmith = generate_blacksmith(offset_x=3)
-    merchant = generate_merchant(offset_x=6)
-    scout = generate_scout(offset_x=9)
+    npcs = [
+        generate_villager(offset_x=0),
+        generate_blacksmith(offset_x=3),
+        generate_merchant(offset_x=6),
+        generate_scout(offset_x=9),
+    ]
+
+    # Link everything in one go so the depsgraph is evaluated once
+    for npc in npcs:
+        bpy.context.scene.collection.objects.link(npc)
+    bpy.context.view_layer.update()
 
     export_glb(os.path.join(EXPORT_DIR, "npcs.glb"))
 
@@ -19,37 +19,83 @@ import bpy
 import bmesh
 import os
 import math
-from mathutils import Vector
+import shutil
+import subprocess
+import numpy as np
+from mathutils import Euler
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 EXPORT_DIR = os.path.join(SCRIPT_DIR, "..", "exports")
 
+# Heights of the chest's metal bands and the barrel's hoops, shared by the
+# part placement and the color functions' (N, 3) broadcast tests
+CHEST_BAND_Z = np.array([0.10, 0.25, 0.34])
+BARREL_HOOP_Z = np.array([0.12, 0.35, 0.58])
+
+# Fixed angles of the campfire's stone ring, logs and embers
+CF_STONE_ANGLES = np.linspace(0, 2 * np.pi, 6, endpoint=False)
+CF_LOG_ANGLES = np.linspace(0, 2 * np.pi, 3, endpoint=False) + np.pi / 6
+CF_EMBER_ANGLES = np.linspace(0, 2 * np.pi, 4, endpoint=False) + 0.3
+
+# Vertex-color materials by (roughness, metallic); models with the same
+# surface share one material, and one material block in the GLB
+_MAT_CACHE = {}
+
 
 def clear_scene():
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete(use_global=False)
-    for block in bpy.data.meshes:
-        if block.users == 0:
-            bpy.data.meshes.remove(block)
-    for mat in bpy.data.materials:
-        if mat.users == 0:
-            bpy.data.materials.remove(mat)
+    _MAT_CACHE.clear()
+    bpy.data.batch_remove(ids=list(bpy.data.objects))
+    orphans = [b for coll in (bpy.data.meshes, bpy.data.materials)
+               for b in coll if b.users == 0]
+    bpy.data.batch_remove(ids=orphans)
 
 
 def set_vertex_colors(obj, color_func):
+    """
+    Apply vertex colors using color_func, which maps an (N, 3) array of
+    world-space positions to (N, 4) RGBA colors.
+    """
     mesh = obj.data
     if not mesh.color_attributes:
         mesh.color_attributes.new(name="Color", type='BYTE_COLOR', domain='CORNER')
     color_layer = mesh.color_attributes[0]
-    vert_positions = {v.index: v.co.copy() for v in mesh.vertices}
-    for poly in mesh.polygons:
-        for li in poly.loop_indices:
-            loop = mesh.loops[li]
-            vi = loop.vertex_index
-            color_layer.data[li].color = color_func(vert_positions[vi])
+
+    n_verts = len(mesh.vertices)
+    co = np.empty(n_verts * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    # build_mesh creates the object at the origin, so mesh coordinates are
+    # already the world coordinates the color rules are written in
+    co = co.reshape(n_verts, 3).astype(np.float64)
+    loop_vi = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vi)
+
+    # Color each vertex once, then gather per corner (loop)
+    colors = color_func(co)[loop_vi]
+    color_layer.data.foreach_set("color", colors.astype(np.float32, copy=False).ravel())
+
+
+def select_colors(n, rules, default):
+    """
+    Vectorized if/elif chain for color functions: rules is a list of
+    (mask, color) pairs where the first matching mask wins. A color is
+    either an RGBA tuple or an (n, 4) array.
+    """
+    out = np.empty((n, 4), dtype=np.float32)
+    out[:] = default
+    for mask, color in reversed(rules):
+        out[mask] = color[mask] if np.ndim(color) == 2 else color
+    return out
 
 
 def make_vc_material(name, roughness=0.6, metallic=0.0):
+    """
+    Return the vertex-color material for (roughness, metallic), creating it
+    under this name on first use.
+    """
+    key = (round(roughness, 2), round(metallic, 2))
+    mat = _MAT_CACHE.get(key)
+    if mat is not None:
+        return mat
     mat = bpy.data.materials.new(name=name)
     mat.use_nodes = True
     tree = mat.node_tree
@@ -70,6 +116,7 @@ def make_vc_material(name, roughness=0.6, metallic=0.0):
 
     tree.links.new(vc_node.outputs["Color"], bsdf.inputs["Base Color"])
     tree.links.new(bsdf.outputs["BSDF"], output.inputs["Surface"])
+    _MAT_CACHE[key] = mat
     return mat
 
 
@@ -84,62 +131,148 @@ def export_glb(filepath):
         export_yup=True,
         export_materials='EXPORT',
     )
+    optimize_glb(filepath)
     size = os.path.getsize(filepath)
     print(f"  Exported: {filepath} ({size / 1024:.1f} KB)")
 
 
+def optimize_glb(filepath):
+    """
+    Run gltfpack (meshoptimizer) over the GLB: vertex cache/fetch reordering
+    and quantized normals/colors; -vpf leaves positions float, since
+    GltfBootstrap reads the meshes without the node transform that would
+    carry their dequantization. -kn keeps one named node per prop. Skipped
+    if gltfpack is not on PATH.
+    """
+    gltfpack = shutil.which("gltfpack")
+    if gltfpack is None:
+        print("  gltfpack not found, skipping mesh optimization")
+        return
+    subprocess.run([gltfpack, "-i", filepath, "-o", filepath, "-vpf", "-kn"], check=True)
+
+
+def create_torus(bm, major_radius, minor_radius, major_segments, minor_segments):
+    """Torus around Z with the same layout as primitive_torus_add (no bmesh op exists)."""
+    ring = []
+    for i in range(major_segments):
+        a = 2.0 * math.pi * i / major_segments
+        ca, sa = math.cos(a), math.sin(a)
+        for j in range(minor_segments):
+            b = 2.0 * math.pi * j / minor_segments
+            r = major_radius + math.cos(b) * minor_radius
+            ring.append(bm.verts.new((ca * r, sa * r, math.sin(b) * minor_radius)))
+    for i in range(major_segments):
+        i_next = (i + 1) % major_segments
+        for j in range(minor_segments):
+            j_next = (j + 1) % minor_segments
+            bm.faces.new((ring[i * minor_segments + j],
+                          ring[i_next * minor_segments + j],
+                          ring[i_next * minor_segments + j_next],
+                          ring[i * minor_segments + j_next]))
+
+
+def _build_templates():
+    """
+    Unit primitives built once with bmesh, as
+    {prim: (homogeneous verts (V, 4), face vertex indices (flat), face sizes)}.
+    """
+    templates = {}
+    for prim in ('cube', 'cylinder', 'uv_sphere', 'cone', 'torus'):
+        bm = bmesh.new()
+        if prim == 'cube':
+            bmesh.ops.create_cube(bm, size=2.0)
+        elif prim == 'cylinder':
+            bmesh.ops.create_cone(bm, cap_ends=True, segments=8, radius1=1, radius2=1, depth=1)
+        elif prim == 'uv_sphere':
+            bmesh.ops.create_uvsphere(bm, u_segments=10, v_segments=8, radius=1)
+        elif prim == 'cone':
+            bmesh.ops.create_cone(bm, cap_ends=True, segments=8, radius1=1, radius2=0, depth=1)
+        elif prim == 'torus':
+            create_torus(bm, major_radius=1, minor_radius=0.25,
+                         major_segments=12, minor_segments=6)
+        bm.verts.index_update()
+        verts = np.array([(*v.co, 1.0) for v in bm.verts], dtype=np.float32)
+        face_verts = np.array([v.index for f in bm.faces for v in f.verts], dtype=np.int32)
+        face_sizes = np.array([len(f.verts) for f in bm.faces], dtype=np.int32)
+        bm.free()
+        templates[prim] = (verts, face_verts, face_sizes)
+    return templates
+
+
+PRIM_TEMPLATES = _build_templates()
+
+
 def add_part(parts, name, prim, loc, scl, rot=None):
-    if prim == 'cube':
-        bpy.ops.mesh.primitive_cube_add(location=loc)
-    elif prim == 'cylinder':
-        bpy.ops.mesh.primitive_cylinder_add(location=loc, vertices=8, radius=1, depth=1)
-    elif prim == 'uv_sphere':
-        bpy.ops.mesh.primitive_uv_sphere_add(location=loc, segments=10, ring_count=8)
-    elif prim == 'cone':
-        bpy.ops.mesh.primitive_cone_add(location=loc, vertices=8, radius1=1, radius2=0, depth=1)
-    elif prim == 'torus':
-        bpy.ops.mesh.primitive_torus_add(location=loc, major_radius=1, minor_radius=0.25,
-                                          major_segments=12, minor_segments=6)
-    obj = bpy.context.active_object
-    obj.name = name
-    obj.scale = scl
-    if rot:
-        obj.rotation_euler = rot
-    bpy.ops.object.transform_apply(scale=True, rotation=True)
-    parts.append(obj)
-    return obj
-
-
-def join_parts(parts, final_name):
-    bpy.ops.object.select_all(action='DESELECT')
-    for p in parts:
-        p.select_set(True)
-    bpy.context.view_layer.objects.active = parts[0]
-    bpy.ops.object.join()
-    obj = bpy.context.active_object
-    obj.name = final_name
-    return obj
+    """Queue a primitive with its transform; build_mesh places all parts at once."""
+    parts.append((prim, loc, scl, rot))
+
+
+def build_mesh(parts, final_name):
+    """
+    Build one mesh object from the queued parts with bulk foreach_set calls.
+    Parts are grouped by primitive so each group is placed with one einsum
+    over its stacked (K, 3, 4) affine matrices; no operator is involved.
+    The object is not linked to the scene yet; main() links all props at
+    once right before export.
+    """
+    groups = {}
+    for prim, loc, scl, rot in parts:
+        groups.setdefault(prim, []).append((loc, scl, rot))
+
+    co_chunks, vi_chunks, size_chunks = [], [], []
+    n_verts = 0
+    for prim, specs in groups.items():
+        verts, face_verts, face_sizes = PRIM_TEMPLATES[prim]
+        k = len(specs)
+        ms = np.empty((k, 3, 4), dtype=np.float32)
+        # R @ diag(scl): scale the rotation's columns, translation in column 3
+        ms[:, :, :3] = [Euler(rot).to_matrix() if rot else np.eye(3) for _, _, rot in specs]
+        ms[:, :, :3] *= np.array([scl for _, scl, _ in specs], dtype=np.float32)[:, None, :]
+        ms[:, :, 3] = [loc for loc, _, _ in specs]
+        co_chunks.append(np.einsum('kij,vj->kvi', ms, verts).reshape(-1, 3))
+        offsets = n_verts + np.arange(k, dtype=np.int32)[:, None] * len(verts)
+        vi_chunks.append((face_verts + offsets).ravel())
+        size_chunks.append(np.tile(face_sizes, k))
+        n_verts += k * len(verts)
+
+    co = np.concatenate(co_chunks)
+    loop_vi = np.concatenate(vi_chunks)
+    loop_total = np.concatenate(size_chunks)
+    loop_start = np.zeros(len(loop_total), dtype=np.int32)
+    np.cumsum(loop_total[:-1], out=loop_start[1:])
+
+    mesh = bpy.data.meshes.new(final_name)
+    mesh.vertices.add(n_verts)
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.loops.add(len(loop_vi))
+    mesh.loops.foreach_set("vertex_index", loop_vi)
+    mesh.polygons.add(len(loop_total))
+    mesh.polygons.foreach_set("loop_start", loop_start)
+    if bpy.app.version < (4, 0, 0):  # derived from loop_start in 4.0+
+        mesh.polygons.foreach_set("loop_total", loop_total)
+    mesh.update(calc_edges=True)
+
+    return bpy.data.objects.new(final_name, mesh)
 
 
 def smooth_shade(obj):
-    for poly in obj.data.polygons:
-        poly.use_smooth = True
+    n = len(obj.data.polygons)
+    obj.data.polygons.foreach_set("use_smooth", np.ones(n, dtype=bool))
 
 
 def set_origin_bottom(obj, z_offset=0.0):
     """Move vertices so the mesh is centered in X/Y with bottom at Z=0.
     This strips out any offset_x baked into vertex positions."""
-    verts = obj.data.vertices
-    xs = [v.co.x for v in verts]
-    ys = [v.co.y for v in verts]
-    zs = [v.co.z for v in verts]
-    cx = (min(xs) + max(xs)) * 0.5
-    cy = (min(ys) + max(ys)) * 0.5
-    min_z = min(zs) + z_offset
-    for v in verts:
-        v.co.x -= cx
-        v.co.y -= cy
-        v.co.z -= min_z
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+    mn = co.min(axis=0)
+    mx = co.max(axis=0)
+    co[:, :2] -= (mn[:2] + mx[:2]) * 0.5
+    co[:, 2] -= mn[2] + z_offset
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.update()
     obj.location = (0, 0, 0)
 
 
@@ -150,17 +283,15 @@ def generate_campfire(offset_x=0):
     parts = []
 
     # Stone ring (6 stones)
-    for i in range(6):
-        angle = i * math.pi * 2 / 6
-        x = offset_x + math.cos(angle) * 0.35
-        y = math.sin(angle) * 0.35
+    stone_xy = np.column_stack([np.cos(CF_STONE_ANGLES), np.sin(CF_STONE_ANGLES)]) * 0.35
+    for i, (x, y) in enumerate(stone_xy.tolist()):
+        x += offset_x
         add_part(parts, f"CF_Stone_{i}", 'uv_sphere', (x, y, 0.06), (0.07, 0.06, 0.05))
 
     # Logs (3 logs in triangle)
-    for i in range(3):
-        angle = i * math.pi * 2 / 3 + math.pi / 6
-        x = offset_x + math.cos(angle) * 0.12
-        y = math.sin(angle) * 0.12
+    log_xy = np.column_stack([np.cos(CF_LOG_ANGLES), np.sin(CF_LOG_ANGLES)]) * 0.12
+    for i, ((x, y), angle) in enumerate(zip(log_xy.tolist(), CF_LOG_ANGLES.tolist())):
+        x += offset_x
         add_part(parts, f"CF_Log_{i}", 'cylinder', (x, y, 0.08),
                  (0.04, 0.04, 0.20),
                  rot=(math.radians(90), 0, angle))
@@ -169,30 +300,23 @@ def generate_campfire(offset_x=0):
     add_part(parts, "CF_Ash", 'cylinder', (offset_x, 0, 0.02), (0.15, 0.15, 0.02))
 
     # Embers (small spheres in center)
-    for i in range(4):
-        angle = i * math.pi * 2 / 4 + 0.3
-        x = offset_x + math.cos(angle) * 0.06
-        y = math.sin(angle) * 0.06
+    ember_xy = np.column_stack([np.cos(CF_EMBER_ANGLES), np.sin(CF_EMBER_ANGLES)]) * 0.06
+    for i, (x, y) in enumerate(ember_xy.tolist()):
+        x += offset_x
         add_part(parts, f"CF_Ember_{i}", 'uv_sphere', (x, y, 0.10), (0.025, 0.025, 0.02))
 
-    prop = join_parts(parts, "Campfire")
+    prop = build_mesh(parts, "Campfire")
 
     def campfire_color(pos):
-        lx = pos.x - offset_x
-        dist = math.sqrt(lx ** 2 + pos.y ** 2)
-        # Stones (outer ring)
-        if dist > 0.25 and pos.z < 0.15:
-            return (0.42, 0.40, 0.38, 1.0)
-        # Embers (center, hot)
-        if dist < 0.10 and pos.z > 0.06:
-            return (0.90, 0.35, 0.08, 1.0)
-        # Ash
-        if dist < 0.16 and pos.z < 0.05:
-            return (0.15, 0.12, 0.10, 1.0)
-        # Logs
-        if pos.z > 0.02 and pos.z < 0.20:
-            return (0.35, 0.20, 0.10, 1.0)
-        return (0.30, 0.18, 0.08, 1.0)
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        # Squared distance from the fire's axis, compared against squared radii
+        d2 = (x - offset_x) ** 2 + y ** 2
+        return select_colors(len(pos), [
+            ((d2 > 0.25 ** 2) & (z < 0.15), (0.42, 0.40, 0.38, 1.0)),  # Stones (outer ring)
+            ((d2 < 0.10 ** 2) & (z > 0.06), (0.90, 0.35, 0.08, 1.0)),  # Embers (center, hot)
+            ((d2 < 0.16 ** 2) & (z < 0.05), (0.15, 0.12, 0.10, 1.0)),  # Ash
+            ((z > 0.02) & (z < 0.20), (0.35, 0.20, 0.10, 1.0)),     # Logs
+        ], (0.30, 0.18, 0.08, 1.0))
 
     set_vertex_colors(prop, campfire_color)
     mat = make_vc_material("CampfireMat", roughness=0.85)
@@ -219,7 +343,7 @@ def generate_chest(offset_x=2):
              rot=(math.radians(90), 0, 0))
 
     # Metal bands (horizontal stripes)
-    for z in [0.10, 0.25, 0.34]:
+    for z in CHEST_BAND_Z:
         add_part(parts, f"CH_Band_{z}", 'cube', (offset_x, 0, z), (0.30, 0.20, 0.012))
 
     # Lock plate (front)
@@ -239,28 +363,22 @@ def generate_chest(offset_x=2):
         add_part(parts, f"CH_Hinge_{sx}", 'cylinder',
                  (offset_x + sx * 0.15, 0.19, 0.32), (0.02, 0.02, 0.015))
 
-    prop = join_parts(parts, "TreasureChest")
+    prop = build_mesh(parts, "TreasureChest")
 
     def chest_color(pos):
-        lx = pos.x - offset_x
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        lx = x - offset_x
         # Metal bands
-        for z in [0.10, 0.25, 0.34]:
-            if abs(pos.z - z) < 0.015:
-                return (0.55, 0.50, 0.30, 1.0)  # Brass
-        # Lock
-        if abs(pos.y + 0.19) < 0.03 and abs(pos.z - 0.24) < 0.06 and abs(lx) < 0.05:
-            return (0.60, 0.55, 0.25, 1.0)  # Gold lock
-        # Corner reinforcements
-        if abs(abs(lx) - 0.27) < 0.04 and abs(abs(pos.y) - 0.17) < 0.04:
-            return (0.50, 0.45, 0.28, 1.0)
-        # Hinges
-        if pos.y > 0.16 and pos.z > 0.29:
-            return (0.45, 0.42, 0.30, 1.0)
-        # Lid
-        if pos.z > 0.32:
-            return (0.42, 0.25, 0.12, 1.0)  # Darker wood
-        # Body
-        return (0.50, 0.32, 0.15, 1.0)  # Wood
+        band = (np.abs(z[:, None] - CHEST_BAND_Z) < 0.015).any(axis=1)
+        lock = (np.abs(y + 0.19) < 0.03) & (np.abs(z - 0.24) < 0.06) & (np.abs(lx) < 0.05)
+        corner = (np.abs(np.abs(lx) - 0.27) < 0.04) & (np.abs(np.abs(y) - 0.17) < 0.04)
+        return select_colors(len(pos), [
+            (band, (0.55, 0.50, 0.30, 1.0)),                      # Brass
+            (lock, (0.60, 0.55, 0.25, 1.0)),                      # Gold lock
+            (corner, (0.50, 0.45, 0.28, 1.0)),                    # Corner reinforcements
+            ((y > 0.16) & (z > 0.29), (0.45, 0.42, 0.30, 1.0)),   # Hinges
+            (z > 0.32, (0.42, 0.25, 0.12, 1.0)),                  # Lid (darker wood)
+        ], (0.50, 0.32, 0.15, 1.0))  # Body wood
 
     set_vertex_colors(prop, chest_color)
     mat = make_vc_material("ChestMat", roughness=0.7)
@@ -299,19 +417,22 @@ def generate_crate(offset_x=4):
     # Top edge rim
     add_part(parts, "CR_Rim", 'cube', (offset_x, 0, 0.49), (0.25, 0.25, 0.01))
 
-    prop = join_parts(parts, "Crate")
+    prop = build_mesh(parts, "Crate")
 
     def crate_color(pos):
-        lx = pos.x - offset_x
-        # Plank lines / braces (slightly darker)
-        if abs(abs(pos.y) - 0.25) < 0.01 or abs(abs(lx) - 0.25) < 0.01:
-            return (0.38, 0.24, 0.10, 1.0)
-        # Rim
-        if pos.z > 0.47:
-            return (0.42, 0.28, 0.12, 1.0)
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        lx = x - offset_x
+        strips = (np.abs(np.abs(y) - 0.25) < 0.01) | (np.abs(np.abs(lx) - 0.25) < 0.01)
         # Main wood with slight grain variation
-        grain = math.sin(pos.z * 20) * 0.03
-        return (0.52 + grain, 0.35 + grain, 0.18, 1.0)
+        grain = np.sin(z * 20) * 0.03
+        wood = np.ones((len(pos), 4))
+        wood[:, 0] = 0.52 + grain
+        wood[:, 1] = 0.35 + grain
+        wood[:, 2] = 0.18
+        return select_colors(len(pos), [
+            (strips, (0.38, 0.24, 0.10, 1.0)),     # Plank lines / braces (slightly darker)
+            (z > 0.47, (0.42, 0.28, 0.12, 1.0)),   # Rim
+        ], wood)
 
     set_vertex_colors(prop, crate_color)
     mat = make_vc_material("CrateMat", roughness=0.8)
@@ -335,7 +456,7 @@ def generate_barrel(offset_x=6):
     add_part(parts, "BA_Belly", 'cylinder', (offset_x, 0, 0.35), (0.20, 0.20, 0.12))
 
     # Metal hoops
-    for z in [0.12, 0.35, 0.58]:
+    for z in BARREL_HOOP_Z:
         add_part(parts, f"BA_Hoop_{z}", 'cylinder', (offset_x, 0, z), (0.21, 0.21, 0.015))
 
     # Top cap
@@ -345,27 +466,27 @@ def generate_barrel(offset_x=6):
     add_part(parts, "BA_Bung", 'cylinder', (offset_x, -0.20, 0.40), (0.025, 0.025, 0.01),
              rot=(math.radians(90), 0, 0))
 
-    prop = join_parts(parts, "Barrel")
+    prop = build_mesh(parts, "Barrel")
 
     def barrel_color(pos):
-        lx = pos.x - offset_x
-        dist = math.sqrt(lx ** 2 + pos.y ** 2)
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        lx = x - offset_x
         # Metal hoops
-        for z in [0.12, 0.35, 0.58]:
-            if abs(pos.z - z) < 0.02 and dist > 0.18:
-                return (0.45, 0.42, 0.38, 1.0)  # Iron grey
-        # Bung
-        if abs(pos.y + 0.20) < 0.04 and abs(pos.z - 0.40) < 0.04:
-            return (0.30, 0.20, 0.08, 1.0)  # Dark cork
-        # Top cap
-        if pos.z > 0.66:
-            return (0.48, 0.32, 0.16, 1.0)
-        # Barrel staves (alternating tones)
-        angle = math.atan2(pos.y, lx)
-        stave = int((angle / (2 * math.pi) + 0.5) * 8) % 2
-        if stave:
-            return (0.50, 0.33, 0.16, 1.0)
-        return (0.55, 0.38, 0.20, 1.0)
+        hoop = ((np.abs(z[:, None] - BARREL_HOOP_Z) < 0.02).any(axis=1)
+                & (lx ** 2 + y ** 2 > 0.18 ** 2))
+        # Barrel staves (alternating tones): stave index from the angle, odd
+        # staves take the darker tone. The staves meet exactly at the body's
+        # vertex angles, so keep this arithmetic order; a rearranged formula
+        # rounds some corners into the neighboring stave.
+        angle = np.arctan2(y, lx)
+        stave = (((angle / (2 * np.pi) + 0.5) * 8).astype(np.int32) & 1).astype(bool)
+        bung = (np.abs(y + 0.20) < 0.04) & (np.abs(z - 0.40) < 0.04)
+        return select_colors(len(pos), [
+            (hoop, (0.45, 0.42, 0.38, 1.0)),       # Iron grey
+            (bung, (0.30, 0.20, 0.08, 1.0)),       # Dark cork
+            (z > 0.66, (0.48, 0.32, 0.16, 1.0)),   # Top cap
+            (stave, (0.50, 0.33, 0.16, 1.0)),
+        ], (0.55, 0.38, 0.20, 1.0))
 
     set_vertex_colors(prop, barrel_color)
     mat = make_vc_material("BarrelMat", roughness=0.75)
@@ -408,33 +529,26 @@ def generate_training_dummy(offset_x=8):
     add_part(parts, "TD_Target", 'cylinder', (offset_x, -0.08, 0.82), (0.06, 0.06, 0.005),
              rot=(math.radians(90), 0, 0))
 
-    prop = join_parts(parts, "TrainingDummy")
+    prop = build_mesh(parts, "TrainingDummy")
 
     def dummy_color(pos):
-        lx = pos.x - offset_x
-        dist = math.sqrt(lx ** 2 + pos.y ** 2)
-        # Head (straw/burlap yellow)
-        if pos.z > 1.18:
-            return (0.72, 0.60, 0.38, 1.0)
+        x, y, z = pos[:, 0], pos[:, 1], pos[:, 2]
+        lx = x - offset_x
+        lx2 = lx ** 2
+        # Squared distance from the post's axis
+        d2 = lx2 + y ** 2
         # Target (red circle)
-        if abs(pos.y + 0.08) < 0.02 and abs(pos.z - 0.82) < 0.08 and abs(lx) < 0.07:
-            d = math.sqrt(lx ** 2 + (pos.z - 0.82) ** 2)
-            if d < 0.03:
-                return (0.85, 0.15, 0.10, 1.0)  # Center red
-            return (0.80, 0.20, 0.12, 1.0)  # Ring red
-        # Burlap wrap
-        if pos.z > 0.65 and pos.z < 1.00 and dist < 0.10:
-            return (0.65, 0.52, 0.32, 1.0)
-        # Padding
-        if abs(lx) > 0.20 and abs(pos.z - 1.00) < 0.08:
-            return (0.60, 0.48, 0.30, 1.0)
-        # Crossbar / post (wood)
-        if dist < 0.06:
-            return (0.42, 0.28, 0.14, 1.0)
-        # Base plate
-        if pos.z < 0.06:
-            return (0.35, 0.25, 0.12, 1.0)
-        return (0.45, 0.30, 0.15, 1.0)
+        target = (np.abs(y + 0.08) < 0.02) & (np.abs(z - 0.82) < 0.08) & (np.abs(lx) < 0.07)
+        target_center = target & (lx2 + (z - 0.82) ** 2 < 0.03 ** 2)
+        return select_colors(len(pos), [
+            (z > 1.18, (0.72, 0.60, 0.38, 1.0)),                            # Straw head
+            (target_center, (0.85, 0.15, 0.10, 1.0)),                       # Center red
+            (target, (0.80, 0.20, 0.12, 1.0)),                              # Ring red
+            ((z > 0.65) & (z < 1.00) & (d2 < 0.10 ** 2), (0.65, 0.52, 0.32, 1.0)),  # Burlap wrap
+            ((np.abs(lx) > 0.20) & (np.abs(z - 1.00) < 0.08), (0.60, 0.48, 0.30, 1.0)),  # Padding
+            (d2 < 0.06 ** 2, (0.42, 0.28, 0.14, 1.0)),                      # Crossbar / post (wood)
+            (z < 0.06, (0.35, 0.25, 0.12, 1.0)),                            # Base plate
+        ], (0.45, 0.30, 0.15, 1.0))
 
     set_vertex_colors(prop, dummy_color)
     mat = make_vc_material("DummyMat", roughness=0.8)
@@ -468,18 +582,15 @@ def generate_signpost(offset_x=10):
     # Base
     add_part(parts, "SP_Base", 'cube', (offset_x, 0, 0.02), (0.10, 0.10, 0.02))
 
-    prop = join_parts(parts, "Signpost")
+    prop = build_mesh(parts, "Signpost")
 
     def signpost_color(pos):
-        lx = pos.x - offset_x
-        # Sign plank (lighter wood)
-        if abs(pos.z - 0.90) < 0.10 and lx > 0.0:
-            return (0.58, 0.42, 0.22, 1.0)
-        # Cap
-        if pos.z > 1.06:
-            return (0.50, 0.38, 0.18, 1.0)
-        # Post
-        return (0.40, 0.26, 0.12, 1.0)
+        lx = pos[:, 0] - offset_x
+        z = pos[:, 2]
+        return select_colors(len(pos), [
+            ((np.abs(z - 0.90) < 0.10) & (lx > 0.0), (0.58, 0.42, 0.22, 1.0)),  # Sign plank
+            (z > 1.06, (0.50, 0.38, 0.18, 1.0)),                                # Cap
+        ], (0.40, 0.26, 0.12, 1.0))  # Post
 
     set_vertex_colors(prop, signpost_color)
     mat = make_vc_material("SignpostMat", roughness=0.82)
@@ -501,12 +612,19 @@ def main():
     print("  Generating Props")
     print("=" * 60)
 
-    generate_campfire(offset_x=0)
-    generate_chest(offset_x=2)
-    generate_crate(offset_x=4)
-    generate_barrel(offset_x=6)
-    generate_training_dummy(offset_x=8)
-    generate_signpost(offset_x=10)
+    props = [
+        generate_campfire(offset_x=0),
+        generate_chest(offset_x=2),
+        generate_crate(offset_x=4),
+        generate_barrel(offset_x=6),
+        generate_training_dummy(offset_x=8),
+        generate_signpost(offset_x=10),
+    ]
+
+    # Link everything in one go so the depsgraph is evaluated once
+    for prop in props:
+        bpy.context.scene.collection.objects.link(prop)
+    bpy.context.view_layer.update()
 
     export_glb(os.path.join(EXPORT_DIR, "props.glb"))
 
@@ -14,10 +14,13 @@ Rock variants:
 """
 
 import bpy
+import bmesh
 import math
 import os
-import random
-from mathutils import Vector
+import shutil
+import subprocess
+import numpy as np
+from mathutils import Matrix, Vector
 
 # ---------------------------------------------------------------------------
 # Config
@@ -25,9 +28,6 @@ from mathutils import Vector
 EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "exports")
 EXPORT_PATH = os.path.join(EXPORT_DIR, "rocks.glb")
 
-SEED = 99
-random.seed(SEED)
-
 ROCK_COLOR = (0.48, 0.44, 0.38, 1.0)        # Grey-brown
 ROCK_DARK = (0.35, 0.32, 0.28, 1.0)          # Dark rock
 MOSS_COLOR = (0.30, 0.40, 0.22, 1.0)         # Mossy green
@@ -36,14 +36,16 @@ MOSS_COLOR = (0.30, 0.40, 0.22, 1.0)         # Mossy green
 # Helpers
 # ---------------------------------------------------------------------------
 def clear_scene():
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete(use_global=False)
-    for block in bpy.data.meshes:
-        if block.users == 0:
-            bpy.data.meshes.remove(block)
+    bpy.data.batch_remove(ids=list(bpy.data.objects))
+    orphans = [b for coll in (bpy.data.meshes, bpy.data.materials)
+               for b in coll if b.users == 0]
+    bpy.data.batch_remove(ids=orphans)
 
 def set_vertex_colors_with_moss(obj, base_color, moss_color, moss_threshold=0.5):
-    """Color vertices based on their face normal direction - top faces get moss."""
+    """
+    Color vertices based on their face normal direction - top faces get moss.
+    base_color is an RGBA tuple, or an (n_polys, 4) array with one per face.
+    """
     mesh = obj.data
     mesh.update()
 
@@ -51,42 +53,121 @@ def set_vertex_colors_with_moss(obj, base_color, moss_color, moss_threshold=0.5)
         mesh.color_attributes.new(name="Color", type='BYTE_COLOR', domain='CORNER')
     color_layer = mesh.color_attributes[0]
 
-    for poly in mesh.polygons:
-        # Use the face normal (Z-up in Blender)
-        normal_z = poly.normal.z
-        for loop_idx in poly.loop_indices:
-            if normal_z > moss_threshold:
-                blend = (normal_z - moss_threshold) / (1.0 - moss_threshold)
-                r = base_color[0] * (1 - blend) + moss_color[0] * blend
-                g = base_color[1] * (1 - blend) + moss_color[1] * blend
-                b = base_color[2] * (1 - blend) + moss_color[2] * blend
-                color_layer.data[loop_idx].color = (r, g, b, 1.0)
-            else:
-                color_layer.data[loop_idx].color = base_color
+    # Face normal Z (Z-up in Blender) decides the moss blend for every corner
+    n_polys = len(mesh.polygons)
+    normals = np.empty(n_polys * 3, dtype=np.float32)
+    mesh.polygons.foreach_get("normal", normals)
+    loop_total = np.empty(n_polys, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_total)
+
+    blend = np.clip((normals[2::3] - moss_threshold) / (1.0 - moss_threshold), 0.0, 1.0)
+    base = np.asarray(base_color, dtype=np.float32)
+    moss = np.asarray(moss_color, dtype=np.float32)
+    colors = base * (1.0 - blend[:, None]) + moss * blend[:, None]
+    # Corners are stored polygon by polygon, so each face color repeats per corner
+    color_layer.data.foreach_set("color", np.repeat(colors, loop_total, axis=0).ravel())
 
 def displace_vertices(obj, amount, seed_offset=0):
     """Randomly displace vertices along their normals for organic look."""
-    rng = random.Random(seed_offset)
     mesh = obj.data
     mesh.update()
-    for v in mesh.vertices:
-        displacement = rng.uniform(-amount, amount)
-        v.co += v.normal * displacement
+    n = len(mesh.vertices)
+    co = np.empty(n * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    normals = np.empty(n * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("normal", normals)
+
+    rng = np.random.default_rng(seed_offset)
+    displacement = rng.uniform(-amount, amount, n).astype(np.float32)
+    co += (normals.reshape(n, 3) * displacement[:, None]).ravel()
+    mesh.vertices.foreach_set("co", co)
+    mesh.update()
+
+def recalc_normals(obj):
+    """Make face normals point outward (normals_make_consistent without EDIT mode)."""
+    bm = bmesh.new()
+    bm.from_mesh(obj.data)
+    bmesh.ops.recalc_face_normals(bm, faces=bm.faces)
+    bm.to_mesh(obj.data)
+    bm.free()
+
+def subdivide(obj, cuts):
+    """Subdivide every edge with a grid fill (mesh.subdivide without EDIT mode)."""
+    bm = bmesh.new()
+    bm.from_mesh(obj.data)
+    bmesh.ops.subdivide_edges(bm, edges=bm.edges[:], cuts=cuts, use_grid_fill=True)
+    bm.to_mesh(obj.data)
+    bm.free()
+
+def add_primitive(name, prim, location, scale=(1.0, 1.0, 1.0), **params):
+    """
+    Build a primitive with bmesh instead of a primitive operator and link it
+    at location. Scale is baked into the vertices as transform_apply did;
+    params go to the bmesh.ops creator (e.g. subdivisions, radius).
+    """
+    bm = bmesh.new()
+    matrix = Matrix.Diagonal((*scale, 1.0))
+    if prim == 'ico_sphere':
+        bmesh.ops.create_icosphere(bm, matrix=matrix, **params)
+    elif prim == 'cube':
+        bmesh.ops.create_cube(bm, size=2.0, matrix=matrix)
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+
+    obj = bpy.data.objects.new(name, mesh)
+    obj.location = location
+    bpy.context.collection.objects.link(obj)
+    return obj
+
+def add_ico_spheres(name, spheres, location, subdivisions):
+    """
+    Build several icospheres into one mesh with a single bmesh and link it
+    at location. spheres is a list of (center, radius, scale) with world
+    space centers. Returns the object and each sphere's face count, in order.
+    """
+    bm = bmesh.new()
+    face_counts = []
+    for center, radius, scale in spheres:
+        matrix = Matrix.LocRotScale(Vector(center) - Vector(location), None, scale)
+        n_faces = len(bm.faces)
+        bmesh.ops.create_icosphere(bm, subdivisions=subdivisions, radius=radius, matrix=matrix)
+        face_counts.append(len(bm.faces) - n_faces)
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+
+    obj = bpy.data.objects.new(name, mesh)
+    obj.location = location
+    bpy.context.collection.objects.link(obj)
+    return obj, face_counts
+
+def set_origin_base(obj, location):
+    """Shift the mesh so its lowest vertex is at Z=0, then place the object at location."""
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co[2::3] -= co[2::3].min()
+    mesh.vertices.foreach_set("co", co)
+    mesh.update()
+    obj.location = location
 
 def smooth_shade(obj):
-    for poly in obj.data.polygons:
-        poly.use_smooth = True
+    n = len(obj.data.polygons)
+    obj.data.polygons.foreach_set("use_smooth", np.ones(n, dtype=bool))
 
 def create_material(name):
-    """Create a vertex-color material."""
+    """Create (or reuse) a vertex-color material."""
+    mat = bpy.data.materials.get(name)
+    if mat is not None:
+        return mat
     mat = bpy.data.materials.new(name=name)
     mat.use_nodes = True
     tree = mat.node_tree
     nodes = tree.nodes
     links = tree.links
 
-    for n in nodes:
-        nodes.remove(n)
+    nodes.clear()
 
     vc_node = nodes.new('ShaderNodeVertexColor')
     vc_node.layer_name = "Color"
@@ -105,88 +186,77 @@ def create_material(name):
 
     return mat
 
+def optimize_glb(filepath):
+    """
+    Reorder the rocks' index and vertex buffers for GPU vertex cache and
+    fetch locality with gltfpack (meshoptimizer), and quantize normals and
+    colors (KHR_mesh_quantization). -vpf keeps positions float: GltfBootstrap
+    uses the meshes without the node that would carry their dequantization.
+    -kn keeps one named node per rock. Skipped if gltfpack is not on PATH.
+    """
+    gltfpack = shutil.which("gltfpack")
+    if gltfpack is None:
+        print("  gltfpack not found, skipping mesh optimization")
+        return
+    subprocess.run([gltfpack, "-i", filepath, "-o", filepath, "-vpf", "-kn"], check=True)
+
 
 # ---------------------------------------------------------------------------
 # Rock Generators
 # ---------------------------------------------------------------------------
 def create_boulder():
     """Large rounded boulder."""
-    bpy.ops.mesh.primitive_ico_sphere_add(
-        subdivisions=2, radius=0.8,
-        location=(0, 0, 0.6)
-    )
-    rock = bpy.context.active_object
-    rock.name = "Rock_Boulder"
-
-    # Flatten slightly
-    rock.scale = (1.0, 0.9, 0.7)
-    bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
+    # Flattened slightly
+    rock = add_primitive("Rock_Boulder", 'ico_sphere', (0, 0, 0.6), (1.0, 0.9, 0.7),
+                         subdivisions=2, radius=0.8)
 
     # Organic displacement
     displace_vertices(rock, 0.12, seed_offset=500)
 
     # Recalculate normals before coloring
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.select_all(action='SELECT')
-    bpy.ops.mesh.normals_make_consistent(inside=False)
-    bpy.ops.object.mode_set(mode='OBJECT')
+    recalc_normals(rock)
 
     set_vertex_colors_with_moss(rock, ROCK_COLOR, MOSS_COLOR, moss_threshold=0.6)
     smooth_shade(rock)
 
     # Set origin to base
-    min_z = min(v.co.z for v in rock.data.vertices)
-    for v in rock.data.vertices:
-        v.co.z -= min_z
-    rock.location = (0, 0, 0)
+    set_origin_base(rock, (0, 0, 0))
 
     return rock
 
 
 def create_standing_stone():
     """Tall monolithic standing stone."""
-    bpy.ops.mesh.primitive_cube_add(location=(3, 0, 1.2))
-    stone = bpy.context.active_object
-    stone.name = "Rock_StandingStone"
-    stone.scale = (0.3, 0.25, 1.2)
-    bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
+    stone = add_primitive("Rock_StandingStone", 'cube', (3, 0, 1.2), (0.3, 0.25, 1.2))
 
     # Subdivide for smoother deformation
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.select_all(action='SELECT')
-    bpy.ops.mesh.subdivide(number_cuts=3)
-    bpy.ops.object.mode_set(mode='OBJECT')
+    subdivide(stone, 3)
 
     # Organic displacement
     displace_vertices(stone, 0.06, seed_offset=600)
 
     # Taper the top slightly
-    for v in stone.data.vertices:
-        if v.co.z > 0.5:
-            factor = 1.0 - (v.co.z - 0.5) * 0.15
-            v.co.x *= factor
-            v.co.y *= factor
+    mesh = stone.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+    top = co[:, 2] > 0.5
+    co[top, :2] *= (1.0 - (co[top, 2] - 0.5) * 0.15)[:, None]
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.update()
 
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.normals_make_consistent(inside=False)
-    bpy.ops.object.mode_set(mode='OBJECT')
+    recalc_normals(stone)
 
     set_vertex_colors_with_moss(stone, ROCK_DARK, MOSS_COLOR, moss_threshold=0.7)
     smooth_shade(stone)
 
-    min_z = min(v.co.z for v in stone.data.vertices)
-    for v in stone.data.vertices:
-        v.co.z -= min_z
-    stone.location = (3, 0, 0)
+    set_origin_base(stone, (3, 0, 0))
 
     return stone
 
 
 def create_rock_cluster():
     """Group of 4 small rocks."""
-    parts = []
-    rng = random.Random(700)
-
     cluster_configs = [
         (6.0, 0.0, 0.25, 0.35),    # (x, y, z_offset, radius)
         (6.3, 0.25, 0.2, 0.25),
@@ -194,46 +264,24 @@ def create_rock_cluster():
         (6.15, -0.15, 0.18, 0.28),
     ]
 
-    for i, (x, y, z_off, rad) in enumerate(cluster_configs):
-        bpy.ops.mesh.primitive_ico_sphere_add(
-            subdivisions=1, radius=rad,
-            location=(x, y, z_off)
-        )
-        rock = bpy.context.active_object
-        rock.name = f"Cluster_Rock_{i}"
-
-        # Random squash
-        sx = rng.uniform(0.7, 1.1)
-        sy = rng.uniform(0.7, 1.0)
-        sz = rng.uniform(0.5, 0.8)
-        rock.scale = (sx, sy, sz)
-        bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
-
-        displace_vertices(rock, 0.05, seed_offset=700 + i * 13)
-
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.normals_make_consistent(inside=False)
-        bpy.ops.object.mode_set(mode='OBJECT')
-
-        color = ROCK_COLOR if i % 2 == 0 else ROCK_DARK
-        set_vertex_colors_with_moss(rock, color, MOSS_COLOR, moss_threshold=0.5)
-        smooth_shade(rock)
-        parts.append(rock)
-
-    # Join all
-    bpy.ops.object.select_all(action='DESELECT')
-    for obj in parts:
-        obj.select_set(True)
-    bpy.context.view_layer.objects.active = parts[0]
-    bpy.ops.object.join()
-
-    cluster = bpy.context.active_object
-    cluster.name = "Rock_Cluster"
-
-    min_z = min(v.co.z for v in cluster.data.vertices)
-    for v in cluster.data.vertices:
-        v.co.z -= min_z
-    cluster.location = (6, 0, 0)
+    # Random squash (x, y, z) per rock
+    squash = np.random.default_rng(700).uniform((0.7, 0.7, 0.5), (1.1, 1.0, 0.8),
+                                                (len(cluster_configs), 3))
+    spheres = [((x, y, z_off), rad, scale)
+               for (x, y, z_off, rad), scale in zip(cluster_configs, squash.tolist())]
+    cluster, face_counts = add_ico_spheres("Rock_Cluster", spheres, (6, 0, 0), subdivisions=1)
+
+    displace_vertices(cluster, 0.05, seed_offset=700)
+
+    recalc_normals(cluster)
+
+    # Alternate light and dark rock per sphere
+    base = [ROCK_COLOR if i % 2 == 0 else ROCK_DARK for i in range(len(spheres))]
+    base = np.repeat(np.asarray(base, dtype=np.float32), face_counts, axis=0)
+    set_vertex_colors_with_moss(cluster, base, MOSS_COLOR, moss_threshold=0.5)
+    smooth_shade(cluster)
+
+    set_origin_base(cluster, (6, 0, 0))
 
     return cluster
 
@@ -266,17 +314,17 @@ def main():
         poly_count = len(rock.data.polygons)
         print(f"  {rock.name}: {vert_count} verts, {poly_count} polys")
 
-    bpy.ops.object.select_all(action='SELECT')
-
+    # clear_scene left only the generated rocks, so no selection is needed
     os.makedirs(EXPORT_DIR, exist_ok=True)
     bpy.ops.export_scene.gltf(
         filepath=EXPORT_PATH,
         export_format='GLB',
-        use_selection=True,
-        export_apply=True,
+        use_selection=False,
+        export_apply=False,  # the generators add no modifiers
         export_yup=True,
         export_materials='EXPORT',
     )
+    optimize_glb(EXPORT_PATH)
 
     file_size = os.path.getsize(EXPORT_PATH)
     print(f"  Exported: {EXPORT_PATH}")
@@ -9,8 +9,12 @@ Exports to BlenderPipeline/exports/sword.glb
 """
 
 import bpy
+import bmesh
 import os
-from mathutils import Vector
+import shutil
+import subprocess
+import numpy as np
+from mathutils import Matrix, Vector
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 EXPORT_DIR = os.path.join(SCRIPT_DIR, "..", "exports")
@@ -25,37 +29,105 @@ POMMEL_COLOR = (0.55, 0.45, 0.20, 1.0)      # Bronze
 
 
 def clear_scene():
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete(use_global=False)
-    for block in bpy.data.meshes:
-        if block.users == 0:
-            bpy.data.meshes.remove(block)
+    bpy.data.batch_remove(ids=list(bpy.data.objects))
+    orphans = [b for coll in (bpy.data.meshes, bpy.data.materials)
+               for b in coll if b.users == 0]
+    bpy.data.batch_remove(ids=orphans)
 
 
 def create_part(name, location, scale, color, prim='cube'):
+    # Built with bmesh and scaled in place rather than through a primitive
+    # operator and transform_apply
+    bm = bmesh.new()
+    matrix = Matrix.Diagonal((*scale, 1.0))
     if prim == 'cube':
-        bpy.ops.mesh.primitive_cube_add(location=location)
+        bmesh.ops.create_cube(bm, size=2.0, matrix=matrix)
     elif prim == 'cylinder':
-        bpy.ops.mesh.primitive_cylinder_add(location=location, vertices=8, radius=1, depth=1)
+        bmesh.ops.create_cone(bm, cap_ends=True, segments=8, radius1=1, radius2=1, depth=1,
+                              matrix=matrix)
     elif prim == 'uv_sphere':
-        bpy.ops.mesh.primitive_uv_sphere_add(location=location, segments=8, ring_count=6)
+        bmesh.ops.create_uvsphere(bm, u_segments=8, v_segments=6, radius=1, matrix=matrix)
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
 
-    obj = bpy.context.active_object
-    obj.name = name
-    obj.scale = scale
-    bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
+    # Never linked to the scene; join_parts consumes it
+    obj = bpy.data.objects.new(name, mesh)
+    obj.location = location
 
     # Add vertex colors
-    mesh = obj.data
     if not mesh.color_attributes:
         mesh.color_attributes.new(name="Color", type='BYTE_COLOR', domain='CORNER')
     color_layer = mesh.color_attributes[0]
-    for i in range(len(color_layer.data)):
-        color_layer.data[i].color = color
+    rgba = np.tile(np.asarray(color, dtype=np.float32), len(color_layer.data))
+    color_layer.data.foreach_set("color", rgba)
 
     return obj
 
 
+def join_parts(parts, name):
+    """
+    Merge parts into one new object at the first part's location, in place
+    of bpy.ops.object.join. Each part's offset is baked into its mesh before
+    bmesh appends it, and the parts are removed afterwards.
+    """
+    origin = parts[0].location.copy()
+    bm = bmesh.new()
+    for obj in parts:
+        obj.data.transform(Matrix.Translation(obj.location - origin))
+        bm.from_mesh(obj.data)
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+    bpy.data.batch_remove(ids=parts + [p.data for p in parts])
+
+    joined = bpy.data.objects.new(name, mesh)
+    joined.location = origin
+    bpy.context.collection.objects.link(joined)
+    return joined
+
+
+def create_material(name, roughness, metallic):
+    """Create (or reuse) a vertex-color material."""
+    mat = bpy.data.materials.get(name)
+    if mat is not None:
+        return mat
+    mat = bpy.data.materials.new(name=name)
+    mat.use_nodes = True
+    tree = mat.node_tree
+    tree.nodes.clear()
+
+    vc_node = tree.nodes.new('ShaderNodeVertexColor')
+    vc_node.layer_name = "Color"
+    vc_node.location = (-300, 0)
+
+    bsdf = tree.nodes.new('ShaderNodeBsdfPrincipled')
+    bsdf.location = (0, 0)
+    bsdf.inputs["Roughness"].default_value = roughness
+    bsdf.inputs["Metallic"].default_value = metallic
+
+    output = tree.nodes.new('ShaderNodeOutputMaterial')
+    output.location = (300, 0)
+
+    tree.links.new(vc_node.outputs["Color"], bsdf.inputs["Base Color"])
+    tree.links.new(bsdf.outputs["BSDF"], output.inputs["Surface"])
+    return mat
+
+
+def optimize_glb(filepath):
+    """
+    Vertex cache/fetch reordering of sword.glb with gltfpack (meshoptimizer)
+    plus quantized normals and colors. Positions stay float (-vpf), as the
+    hand mount uses the mesh without its node; the Sword node is kept (-kn).
+    Skipped if gltfpack is not on PATH.
+    """
+    gltfpack = shutil.which("gltfpack")
+    if gltfpack is None:
+        print("  gltfpack not found, skipping mesh optimization")
+        return
+    subprocess.run([gltfpack, "-i", filepath, "-o", filepath, "-vpf", "-kn"], check=True)
+
+
 def main():
     print("=" * 60)
     print("  Generating sword")
@@ -85,62 +157,34 @@ def main():
     pommel = create_part("Pommel", (0, 0, -0.02), (0.02, 0.02, 0.02), POMMEL_COLOR, prim='uv_sphere')
     parts.append(pommel)
 
-    # Join all parts
-    bpy.ops.object.select_all(action='DESELECT')
-    for p in parts:
-        p.select_set(True)
-    bpy.context.view_layer.objects.active = blade
-    bpy.ops.object.join()
-
-    sword = bpy.context.active_object
-    sword.name = "Sword"
+    # Join all parts (the blade comes first, so the sword starts at its location)
+    sword = join_parts(parts, "Sword")
 
     # Set origin to grip area (where the hand holds it)
-    bpy.context.scene.cursor.location = Vector((0, 0, 0.1))
-    bpy.ops.object.origin_set(type='ORIGIN_CURSOR')
+    grip_origin = Vector((0, 0, 0.1))
+    sword.data.transform(Matrix.Translation(sword.location - grip_origin))
+    sword.location = grip_origin
 
     # Smooth shade
-    for poly in sword.data.polygons:
-        poly.use_smooth = True
-
-    # Create vertex color material
-    mat = bpy.data.materials.new(name="SwordMat")
-    mat.use_nodes = True
-    tree = mat.node_tree
-    for n in tree.nodes:
-        tree.nodes.remove(n)
-
-    vc_node = tree.nodes.new('ShaderNodeVertexColor')
-    vc_node.layer_name = "Color"
-    vc_node.location = (-300, 0)
-
-    bsdf = tree.nodes.new('ShaderNodeBsdfPrincipled')
-    bsdf.location = (0, 0)
-    bsdf.inputs["Roughness"].default_value = 0.3
-    bsdf.inputs["Metallic"].default_value = 0.7
-
-    output = tree.nodes.new('ShaderNodeOutputMaterial')
-    output.location = (300, 0)
-
-    tree.links.new(vc_node.outputs["Color"], bsdf.inputs["Base Color"])
-    tree.links.new(bsdf.outputs["BSDF"], output.inputs["Surface"])
+    sword.data.polygons.foreach_set("use_smooth", np.ones(len(sword.data.polygons), dtype=bool))
 
+    mat = create_material("SwordMat", roughness=0.3, metallic=0.7)
     sword.data.materials.append(mat)
 
     # Stats
     print(f"  Sword: {len(sword.data.vertices)} verts, {len(sword.data.polygons)} polys")
 
-    # Export
-    bpy.ops.object.select_all(action='SELECT')
+    # Export (the sword is the only object in the scene)
     os.makedirs(EXPORT_DIR, exist_ok=True)
     bpy.ops.export_scene.gltf(
         filepath=EXPORT_PATH,
         export_format='GLB',
-        use_selection=True,
-        export_apply=True,
+        use_selection=False,
+        export_apply=False,  # the generators add no modifiers
         export_yup=True,
         export_materials='EXPORT',
     )
+    optimize_glb(EXPORT_PATH)
 
     file_size = os.path.getsize(EXPORT_PATH)
     print(f"  Exported: {EXPORT_PATH}")
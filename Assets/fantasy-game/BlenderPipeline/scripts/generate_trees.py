@@ -15,10 +15,11 @@ Tree variants:
 
 import bpy
 import bmesh
-import math
 import os
-import random
-from mathutils import Vector
+import shutil
+import subprocess
+import numpy as np
+from mathutils import Matrix, Vector
 
 # ---------------------------------------------------------------------------
 # Config
@@ -27,7 +28,6 @@ EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "exp
 EXPORT_PATH = os.path.join(EXPORT_DIR, "trees.glb")
 
 SEED = 42
-random.seed(SEED)
 
 # Vertex colors
 TRUNK_COLOR = (0.45, 0.28, 0.15, 1.0)     # Brown
@@ -38,36 +38,128 @@ LEAF_COLOR_WARM = (0.35, 0.50, 0.18, 1.0)  # Warm green variation
 # Helpers
 # ---------------------------------------------------------------------------
 def clear_scene():
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete(use_global=False)
-    for block in bpy.data.meshes:
-        if block.users == 0:
-            bpy.data.meshes.remove(block)
+    bpy.data.batch_remove(ids=list(bpy.data.objects))
+    orphans = [b for coll in (bpy.data.meshes, bpy.data.materials)
+               for b in coll if b.users == 0]
+    bpy.data.batch_remove(ids=orphans)
 
 def set_vertex_colors(obj, color):
-    """Set all vertices of an object to a single color via vertex color layer."""
+    """
+    Set all vertices of an object to a single color via vertex color layer.
+    color may also be an (n_polys, 4) array with one color per face.
+    """
     mesh = obj.data
     if not mesh.color_attributes:
         mesh.color_attributes.new(name="Color", type='BYTE_COLOR', domain='CORNER')
     color_layer = mesh.color_attributes[0]
-    for i in range(len(color_layer.data)):
-        color_layer.data[i].color = color
+    color = np.asarray(color, dtype=np.float32)
+    if color.ndim == 2:
+        loop_total = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", loop_total)
+        rgba = np.repeat(color, loop_total, axis=0).ravel()
+    else:
+        rgba = np.tile(color, len(color_layer.data))
+    color_layer.data.foreach_set("color", rgba)
 
 def displace_vertices(obj, amount, seed_offset=0):
     """Randomly displace vertices for organic look."""
-    rng = random.Random(seed_offset)
     mesh = obj.data
-    for v in mesh.vertices:
-        v.co.x += rng.uniform(-amount, amount)
-        v.co.y += rng.uniform(-amount, amount)
-        v.co.z += rng.uniform(-amount, amount)
+    n = len(mesh.vertices)
+    co = np.empty(n * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    rng = np.random.default_rng(seed_offset)
+    co += rng.uniform(-amount, amount, n * 3).astype(np.float32)
+    mesh.vertices.foreach_set("co", co)
+    mesh.update()
+
+def subdivide(obj, cuts):
+    """Subdivide every edge with a grid fill (mesh.subdivide without EDIT mode)."""
+    bm = bmesh.new()
+    bm.from_mesh(obj.data)
+    bmesh.ops.subdivide_edges(bm, edges=bm.edges[:], cuts=cuts, use_grid_fill=True)
+    bm.to_mesh(obj.data)
+    bm.free()
+
+def add_primitive(name, prim, location, **params):
+    """
+    Build a cone or cylinder with bmesh instead of a primitive operator, at
+    location; params go to bmesh.ops.create_cone (radius, depth, ...). A
+    'cylinder' is a cone with equal radii. The object is not linked;
+    join_parts consumes it.
+    """
+    bm = bmesh.new()
+    if prim == 'cylinder':
+        radius = params.pop('radius')
+        bmesh.ops.create_cone(bm, cap_ends=True, radius1=radius, radius2=radius, **params)
+    elif prim == 'cone':
+        bmesh.ops.create_cone(bm, cap_ends=True, **params)
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+
+    obj = bpy.data.objects.new(name, mesh)
+    obj.location = location
+    return obj
+
+def add_ico_spheres(name, spheres, subdivisions):
+    """
+    Build several icospheres into one mesh with a single bmesh. spheres is a
+    list of (center, radius) in world space. The object sits at the world
+    origin and is not linked; join_parts consumes it. Returns the object and
+    each sphere's face count, in order.
+    """
+    bm = bmesh.new()
+    face_counts = []
+    for center, radius in spheres:
+        n_faces = len(bm.faces)
+        bmesh.ops.create_icosphere(bm, subdivisions=subdivisions, radius=radius,
+                                   matrix=Matrix.Translation(center))
+        face_counts.append(len(bm.faces) - n_faces)
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+    return bpy.data.objects.new(name, mesh), face_counts
+
+def join_parts(parts, name):
+    """
+    Merge parts into one new object at the first part's location, in place
+    of bpy.ops.object.join. Each part's offset is baked into its mesh before
+    bmesh appends it, and the parts are removed afterwards.
+    """
+    origin = parts[0].location.copy()
+    bm = bmesh.new()
+    for obj in parts:
+        obj.data.transform(Matrix.Translation(obj.location - origin))
+        bm.from_mesh(obj.data)
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+    bpy.data.batch_remove(ids=parts + [p.data for p in parts])
+
+    joined = bpy.data.objects.new(name, mesh)
+    joined.location = origin
+    bpy.context.collection.objects.link(joined)
+    return joined
+
+def set_origin_base(obj, location):
+    """Shift the mesh so its lowest vertex is at Z=0, then place the object at location."""
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co[2::3] -= co[2::3].min()
+    mesh.vertices.foreach_set("co", co)
+    mesh.update()
+    obj.location = location
 
 def smooth_shade(obj):
-    for poly in obj.data.polygons:
-        poly.use_smooth = True
+    n = len(obj.data.polygons)
+    obj.data.polygons.foreach_set("use_smooth", np.ones(n, dtype=bool))
 
 def create_material(name, base_color):
-    """Create a simple vertex-color material."""
+    """Create (or reuse) a simple vertex-color material."""
+    mat = bpy.data.materials.get(name)
+    if mat is not None:
+        return mat
     mat = bpy.data.materials.new(name=name)
     mat.use_nodes = True
     tree = mat.node_tree
@@ -75,8 +167,7 @@ def create_material(name, base_color):
     links = tree.links
 
     # Clear defaults
-    for n in nodes:
-        nodes.remove(n)
+    nodes.clear()
 
     # Vertex color node -> BSDF -> Output
     vc_node = nodes.new('ShaderNodeVertexColor')
@@ -96,6 +187,19 @@ def create_material(name, base_color):
 
     return mat
 
+def optimize_glb(filepath):
+    """
+    Run gltfpack (meshoptimizer) over trees.glb for vertex cache and fetch
+    ordering and quantized normals/colors. Positions stay float (-vpf) since
+    the game reads the meshes without their nodes; -kn keeps each tree's
+    named node. Does nothing if gltfpack is not on PATH.
+    """
+    gltfpack = shutil.which("gltfpack")
+    if gltfpack is None:
+        print("  gltfpack not found, skipping mesh optimization")
+        return
+    subprocess.run([gltfpack, "-i", filepath, "-o", filepath, "-vpf", "-kn"], check=True)
+
 
 # ---------------------------------------------------------------------------
 # Tree Generators
@@ -105,23 +209,16 @@ def create_oak_tree():
     parts = []
 
     # Trunk - tapered cylinder
-    bpy.ops.mesh.primitive_cylinder_add(
-        vertices=8, radius=0.15, depth=2.5,
-        location=(0, 0, 1.25)
-    )
-    trunk = bpy.context.active_object
-    trunk.name = "Oak_Trunk"
+    trunk = add_primitive("Oak_Trunk", 'cylinder', (0, 0, 1.25),
+                          segments=8, radius=0.15, depth=2.5)
     # Taper top
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.select_all(action='DESELECT')
-    bm = bmesh.from_edit_mesh(trunk.data)
-    for v in bm.verts:
-        if v.co.z > 0:  # Top half
-            factor = 0.6
-            v.co.x *= factor
-            v.co.y *= factor
-    bmesh.update_edit_mesh(trunk.data)
-    bpy.ops.object.mode_set(mode='OBJECT')
+    mesh = trunk.data
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+    co[co[:, 2] > 0, :2] *= 0.6  # Top half
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.update()
 
     set_vertex_colors(trunk, TRUNK_COLOR)
     smooth_shade(trunk)
@@ -136,36 +233,20 @@ def create_oak_tree():
         (-0.3, 0.4, 3.3),
     ]
 
-    for i, pos in enumerate(canopy_positions):
-        bpy.ops.mesh.primitive_ico_sphere_add(
-            subdivisions=2, radius=0.8 + random.uniform(-0.2, 0.2),
-            location=pos
-        )
-        leaf = bpy.context.active_object
-        leaf.name = f"Oak_Canopy_{i}"
-        displace_vertices(leaf, 0.15, seed_offset=i * 7)
-        # Mix leaf colors
-        color = LEAF_COLOR_BASE if i % 2 == 0 else LEAF_COLOR_WARM
-        set_vertex_colors(leaf, color)
-        smooth_shade(leaf)
-        parts.append(leaf)
-
-    # Join all parts
-    bpy.ops.object.select_all(action='DESELECT')
-    for obj in parts:
-        obj.select_set(True)
-    bpy.context.view_layer.objects.active = parts[0]
-    bpy.ops.object.join()
+    radii = 0.8 + np.random.default_rng(SEED).uniform(-0.2, 0.2, len(canopy_positions))
+    spheres = list(zip(canopy_positions, radii.tolist()))
+    canopy, face_counts = add_ico_spheres("Oak_Canopy", spheres, subdivisions=2)
+    displace_vertices(canopy, 0.15)
+    # Mix leaf colors
+    colors = [LEAF_COLOR_BASE if i % 2 == 0 else LEAF_COLOR_WARM for i in range(len(spheres))]
+    set_vertex_colors(canopy, np.repeat(np.asarray(colors, dtype=np.float32), face_counts, axis=0))
+    smooth_shade(canopy)
+    parts.append(canopy)
 
-    tree = bpy.context.active_object
-    tree.name = "Tree_Oak"
+    tree = join_parts(parts, "Tree_Oak")
 
     # Set origin to base
-    min_z = min(v.co.z for v in tree.data.vertices)
-    for v in tree.data.vertices:
-        v.co.z -= min_z
-    bpy.ops.object.transform_apply(location=True, rotation=False, scale=False)
-    tree.location = (0, 0, 0)
+    set_origin_base(tree, (0, 0, 0))
 
     return tree
 
@@ -175,12 +256,8 @@ def create_pine_tree():
     parts = []
 
     # Trunk
-    bpy.ops.mesh.primitive_cylinder_add(
-        vertices=6, radius=0.1, depth=3.0,
-        location=(5, 0, 1.5)
-    )
-    trunk = bpy.context.active_object
-    trunk.name = "Pine_Trunk"
+    trunk = add_primitive("Pine_Trunk", 'cylinder', (5, 0, 1.5),
+                          segments=6, radius=0.1, depth=3.0)
     set_vertex_colors(trunk, TRUNK_COLOR)
     smooth_shade(trunk)
     parts.append(trunk)
@@ -194,33 +271,18 @@ def create_pine_tree():
     ]
 
     for i, (x, y, z, rad, h) in enumerate(cone_layers):
-        bpy.ops.mesh.primitive_cone_add(
-            vertices=8, radius1=rad, radius2=0.05, depth=h,
-            location=(x, y, z)
-        )
-        cone = bpy.context.active_object
-        cone.name = f"Pine_Canopy_{i}"
+        cone = add_primitive(f"Pine_Canopy_{i}", 'cone', (x, y, z),
+                             segments=8, radius1=rad, radius2=0.05, depth=h)
         displace_vertices(cone, 0.05, seed_offset=100 + i * 7)
         color = LEAF_COLOR_BASE if i % 2 == 0 else (0.18, 0.38, 0.12, 1.0)
         set_vertex_colors(cone, color)
         smooth_shade(cone)
         parts.append(cone)
 
-    # Join
-    bpy.ops.object.select_all(action='DESELECT')
-    for obj in parts:
-        obj.select_set(True)
-    bpy.context.view_layer.objects.active = parts[0]
-    bpy.ops.object.join()
-
-    tree = bpy.context.active_object
-    tree.name = "Tree_Pine"
+    tree = join_parts(parts, "Tree_Pine")
 
     # Set origin to base
-    min_z = min(v.co.z for v in tree.data.vertices)
-    for v in tree.data.vertices:
-        v.co.z -= min_z
-    tree.location = (5, 0, 0)  # Keep offset for separate objects in GLB
+    set_origin_base(tree, (5, 0, 0))  # Keep offset for separate objects in GLB
 
     return tree
 
@@ -230,29 +292,31 @@ def create_fantasy_tree():
     parts = []
 
     # Trunk - cylinder with twist deformation
-    bpy.ops.mesh.primitive_cylinder_add(
-        vertices=8, radius=0.2, depth=3.0,
-        location=(10, 0, 1.5)
-    )
-    trunk = bpy.context.active_object
-    trunk.name = "Fantasy_Trunk"
+    trunk = add_primitive("Fantasy_Trunk", 'cylinder', (10, 0, 1.5),
+                          segments=8, radius=0.2, depth=3.0)
 
     # Add loop cuts for twisting
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.select_all(action='SELECT')
-    bpy.ops.mesh.subdivide(number_cuts=6)
-    bpy.ops.object.mode_set(mode='OBJECT')
+    subdivide(trunk, 6)
+
+    # Independent streams for the trunk jitter and the leaf sizes/tints
+    twist_rng, leaf_rng = (np.random.default_rng(ss)
+                           for ss in np.random.SeedSequence(200).spawn(2))
 
     # Twist and displace for gnarled look
-    rng = random.Random(200)
-    for v in trunk.data.vertices:
-        angle = v.co.z * 0.5  # Twist around Z
-        x, y = v.co.x, v.co.y
-        v.co.x = x * math.cos(angle) - y * math.sin(angle)
-        v.co.y = x * math.sin(angle) + y * math.cos(angle)
-        # Organic displacement
-        v.co.x += rng.uniform(-0.05, 0.05)
-        v.co.y += rng.uniform(-0.05, 0.05)
+    mesh = trunk.data
+    n = len(mesh.vertices)
+    co = np.empty(n * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(n, 3)
+    angle = co[:, 2] * 0.5  # Twist around Z
+    c, s = np.cos(angle), np.sin(angle)
+    x, y = co[:, 0].copy(), co[:, 1].copy()
+    # Organic displacement
+    noise = twist_rng.uniform(-0.05, 0.05, (n, 2)).astype(np.float32)
+    co[:, 0] = x * c - y * s + noise[:, 0]
+    co[:, 1] = x * s + y * c + noise[:, 1]
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.update()
 
     set_vertex_colors(trunk, (0.40, 0.25, 0.12, 1.0))  # Darker brown
     smooth_shade(trunk)
@@ -268,36 +332,23 @@ def create_fantasy_tree():
         (10.2, -0.4, 3.1),
     ]
 
-    for i, pos in enumerate(cluster_positions):
-        bpy.ops.mesh.primitive_ico_sphere_add(
-            subdivisions=1, radius=0.4 + rng.uniform(-0.1, 0.15),
-            location=pos
-        )
-        leaf = bpy.context.active_object
-        leaf.name = f"Fantasy_Leaves_{i}"
-        displace_vertices(leaf, 0.1, seed_offset=300 + i * 11)
-        # Fantasy warm-tinted greens
-        warm = rng.uniform(0, 0.15)
-        color = (0.25 + warm, 0.42 + warm * 0.5, 0.12, 1.0)
-        set_vertex_colors(leaf, color)
-        smooth_shade(leaf)
-        parts.append(leaf)
-
-    # Join
-    bpy.ops.object.select_all(action='DESELECT')
-    for obj in parts:
-        obj.select_set(True)
-    bpy.context.view_layer.objects.active = parts[0]
-    bpy.ops.object.join()
-
-    tree = bpy.context.active_object
-    tree.name = "Tree_Fantasy"
+    n_leaves = len(cluster_positions)
+    radii = 0.4 + leaf_rng.uniform(-0.1, 0.15, n_leaves)
+    spheres = list(zip(cluster_positions, radii.tolist()))
+    # Fantasy warm-tinted greens
+    warm = leaf_rng.uniform(0, 0.15, n_leaves).astype(np.float32)
+    colors = np.column_stack([0.25 + warm, 0.42 + warm * 0.5,
+                              np.full(n_leaves, 0.12, np.float32), np.ones(n_leaves, np.float32)])
+    leaves, face_counts = add_ico_spheres("Fantasy_Leaves", spheres, subdivisions=1)
+    displace_vertices(leaves, 0.1, seed_offset=300)
+    set_vertex_colors(leaves, np.repeat(colors, face_counts, axis=0))
+    smooth_shade(leaves)
+    parts.append(leaves)
+
+    tree = join_parts(parts, "Tree_Fantasy")
 
     # Set origin to base
-    min_z = min(v.co.z for v in tree.data.vertices)
-    for v in tree.data.vertices:
-        v.co.z -= min_z
-    tree.location = (10, 0, 0)
+    set_origin_base(tree, (10, 0, 0))
 
     return tree
 
@@ -333,19 +384,17 @@ def main():
         poly_count = len(tree.data.polygons)
         print(f"  {tree.name}: {vert_count} verts, {poly_count} polys")
 
-    # Select all for export
-    bpy.ops.object.select_all(action='SELECT')
-
-    # Export
+    # Export; clear_scene left only the generated trees, so no selection is needed
     os.makedirs(EXPORT_DIR, exist_ok=True)
     bpy.ops.export_scene.gltf(
         filepath=EXPORT_PATH,
         export_format='GLB',
-        use_selection=True,
-        export_apply=True,
+        use_selection=False,
+        export_apply=False,  # the generators add no modifiers
         export_yup=True,
         export_materials='EXPORT',
     )
+    optimize_glb(EXPORT_PATH)
 
     file_size = os.path.getsize(EXPORT_PATH)
     print(f"  Exported: {EXPORT_PATH}")
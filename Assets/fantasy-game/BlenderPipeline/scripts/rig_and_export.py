@@ -3,10 +3,12 @@ rig_and_export.py
 =================
 Blender Python script — run headless:
     blender --background --python BlenderPipeline/scripts/rig_and_export.py
+    blender --background --python BlenderPipeline/scripts/rig_and_export.py -- --verbose
 
 Loads the unrigged humanoid.glb, creates a humanoid armature with manually
 defined bones (no Rigify), skins the mesh via existing vertex groups, and
-exports the rigged model as humanoid_rigged.glb.
+exports the rigged model as humanoid_rigged.glb. Pass --verbose after "--"
+to print the vertex count assigned to each bone.
 
 Bone names match the vertex groups created by generate_humanoid.py and also
 follow Unity's Humanoid convention so Mecanim auto-mapping works.
@@ -15,7 +17,14 @@ follow Unity's Humanoid convention so Mecanim auto-mapping works.
 import bpy
 import os
 import sys
-from mathutils import Vector
+import numpy as np
+from mathutils import Matrix
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; fall back to the NumPy kernel
+    njit = None
+    prange = range
 
 # ---------------------------------------------------------------------------
 # Config
@@ -25,6 +34,10 @@ EXPORT_DIR = os.path.join(SCRIPT_DIR, "..", "exports")
 INPUT_PATH = os.path.join(EXPORT_DIR, "humanoid.glb")
 OUTPUT_PATH = os.path.join(EXPORT_DIR, "humanoid_rigged.glb")
 
+# Script arguments follow Blender's own after "--"
+ARGV = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+VERBOSE = "--verbose" in ARGV
+
 # Bone definitions: (name, head_xyz, tail_xyz, parent_name)
 # Positions match the body parts in generate_humanoid.py
 # Head = joint start, Tail = joint end (child direction)
@@ -60,6 +73,9 @@ BONES = [
     ("Foot_R",       (-0.12, 0, 0.08),(-0.12, 0.15, 0.02),"LowerLeg_R"),
 ]
 
+# Bones that only organise the hierarchy and never receive vertex weights
+UTILITY_BONES = frozenset({"Root"})
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -68,12 +84,9 @@ def clear_scene():
     """Remove everything."""
     bpy.ops.object.select_all(action='SELECT')
     bpy.ops.object.delete(use_global=False)
-    for block in bpy.data.meshes:
-        if block.users == 0:
-            bpy.data.meshes.remove(block)
-    for block in bpy.data.armatures:
-        if block.users == 0:
-            bpy.data.armatures.remove(block)
+    orphans = [b for coll in (bpy.data.meshes, bpy.data.armatures)
+               for b in coll if b.users == 0]
+    bpy.data.batch_remove(ids=orphans)
 
 
 def import_humanoid() -> bpy.types.Object:
@@ -106,7 +119,9 @@ def import_humanoid() -> bpy.types.Object:
     if mesh_obj.parent:
         parent = mesh_obj.parent
         mesh_obj.parent = None
-        mesh_obj.matrix_world = mesh_obj.matrix_world  # keep world transform
+        # Keep the world transform; an identity parent leaves it unchanged
+        if parent.matrix_world != Matrix.Identity(4):
+            mesh_obj.matrix_world = parent.matrix_world @ mesh_obj.matrix_basis
         bpy.data.objects.remove(parent, do_unlink=True)
 
     print(f"  Imported mesh: {mesh_obj.name}")
@@ -134,14 +149,15 @@ def create_armature() -> bpy.types.Object:
 
     for name, head, tail, parent_name in BONES:
         bone = arm_data.edit_bones.new(name)
-        bone.head = Vector(head)
-        bone.tail = Vector(tail)
+        bone.head = head  # EditBone takes plain sequences
+        bone.tail = tail
         bone.use_connect = False
 
-        if parent_name and parent_name in bone_map:
-            bone.parent = bone_map[parent_name]
+        parent_bone = bone_map.get(parent_name)
+        if parent_bone is not None:
+            bone.parent = parent_bone
             # Connect if the child head matches parent tail (within tolerance)
-            if (bone.head - bone.parent.tail).length < 0.01:
+            if (bone.head - parent_bone.tail).length < 0.01:
                 bone.use_connect = True
 
         bone_map[name] = bone
@@ -152,20 +168,74 @@ def create_armature() -> bpy.types.Object:
     return arm_obj
 
 
+def _nearest_bone_numpy(co: np.ndarray, heads: np.ndarray, tails: np.ndarray) -> np.ndarray:
+    """
+    Index of the closest bone segment for each vertex. Every vertex is
+    projected onto every segment at once as a (V, B) broadcast; a
+    degenerate segment projects onto its head.
+    """
+    ab = tails - heads
+    length_sq = (ab * ab).sum(axis=1)
+    degenerate = length_sq < 1e-8
+    ap = co[:, None, :] - heads[None, :, :]
+    t = np.clip((ap * ab).sum(axis=2) / np.where(degenerate, 1.0, length_sq), 0.0, 1.0)
+    t[:, degenerate] = 0.0
+    # Squared distances give the same argmin
+    offset = ap - t[..., None] * ab
+    return (offset * offset).sum(axis=2).argmin(axis=1)
+
+
+def _nearest_bone_loop(co: np.ndarray, heads: np.ndarray, tails: np.ndarray) -> np.ndarray:
+    """
+    Scalar form of _nearest_bone_numpy for numba to compile. It needs no
+    (V, B, 3) temporaries; ties go to the first bone in both versions.
+    Vertices are independent, so the outer loop runs under prange.
+    """
+    n = co.shape[0]
+    num_bones = heads.shape[0]
+    best = np.zeros(n, dtype=np.int64)
+    for v in prange(n):
+        px, py, pz = co[v, 0], co[v, 1], co[v, 2]
+        best_dist = np.inf
+        for b in range(num_bones):
+            ax, ay, az = heads[b, 0], heads[b, 1], heads[b, 2]
+            abx = tails[b, 0] - ax
+            aby = tails[b, 1] - ay
+            abz = tails[b, 2] - az
+            length_sq = abx * abx + aby * aby + abz * abz
+            t = 0.0
+            if length_sq >= 1e-8:
+                t = ((px - ax) * abx + (py - ay) * aby + (pz - az) * abz) / length_sq
+                t = max(0.0, min(1.0, t))
+            dx = ax + abx * t - px
+            dy = ay + aby * t - py
+            dz = az + abz * t - pz
+            dist = dx * dx + dy * dy + dz * dz
+            if dist < best_dist:
+                best_dist = dist
+                best[v] = b
+    return best
+
+
+if njit is not None:
+    _nearest_bone = njit(cache=True, parallel=True)(_nearest_bone_loop)
+else:
+    _nearest_bone = _nearest_bone_numpy
+
+
 def assign_weights_by_bones(mesh_obj: bpy.types.Object, arm_obj: bpy.types.Object):
     """
     Assign each vertex to the nearest bone via vertex groups.
     glTF export strips vertex groups that aren't tied to an armature,
     so we reassign them here based on proximity to bone segments.
     """
-    # Collect bone midpoints from the armature's rest pose
-    bone_data = []  # list of (bone_name, head, tail)
-    for bone in arm_obj.data.bones:
-        if bone.name in ("Root",):
-            continue  # Skip root — it's a utility bone
-        head = arm_obj.matrix_world @ bone.head_local
-        tail = arm_obj.matrix_world @ bone.tail_local
-        bone_data.append((bone.name, head, tail))
+    # Collect bone segments from the armature's rest pose
+    aw = arm_obj.matrix_world
+    bone_data = [  # list of (bone_name, head, tail)
+        (bone.name, aw @ bone.head_local, aw @ bone.tail_local)
+        for bone in arm_obj.data.bones
+        if bone.name not in UTILITY_BONES
+    ]
 
     # Clear any existing vertex groups
     mesh_obj.vertex_groups.clear()
@@ -174,36 +244,30 @@ def assign_weights_by_bones(mesh_obj: bpy.types.Object, arm_obj: bpy.types.Objec
     for bone_name, _, _ in bone_data:
         mesh_obj.vertex_groups.new(name=bone_name)
 
-    def closest_point_on_segment(p, a, b):
-        """Return the closest point on segment a-b to point p."""
-        ab = b - a
-        length_sq = ab.length_squared
-        if length_sq < 1e-8:
-            return a
-        t = max(0.0, min(1.0, (p - a).dot(ab) / length_sq))
-        return a + ab * t
-
-    # Assign each vertex to the nearest bone
-    for v in mesh_obj.data.vertices:
-        co = mesh_obj.matrix_world @ v.co
-        best_bone = None
-        best_dist = float('inf')
-        for bone_name, head, tail in bone_data:
-            pt = closest_point_on_segment(co, head, tail)
-            dist = (co - pt).length
-            if dist < best_dist:
-                best_dist = dist
-                best_bone = bone_name
-        if best_bone:
-            vg = mesh_obj.vertex_groups[best_bone]
-            vg.add([v.index], 1.0, 'REPLACE')
-
-    # Report
-    for vg in mesh_obj.vertex_groups:
-        count = sum(1 for v in mesh_obj.data.vertices
-                    for g in v.groups
-                    if g.group == vg.index and g.weight > 0.01)
-        print(f"    {vg.name}: {count} vertices")
+    # World-space vertex positions, read in one call
+    mesh = mesh_obj.data
+    n_verts = len(mesh.vertices)
+    co = np.empty(n_verts * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    mw = np.array(mesh_obj.matrix_world)
+    co = co.reshape(n_verts, 3).astype(np.float64) @ mw[:3, :3].T + mw[:3, 3]
+
+    # Nearest bone segment per vertex
+    heads = np.array([head for _, head, _ in bone_data])
+    tails = np.array([tail for _, _, tail in bone_data])
+    best = _nearest_bone(co, heads, tails)
+
+    # Assign each vertex to the nearest bone, one VertexGroup.add per bone
+    for b, (bone_name, _, _) in enumerate(bone_data):
+        indices = np.flatnonzero(best == b)
+        if len(indices):
+            mesh_obj.vertex_groups[bone_name].add(indices.tolist(), 1.0, 'REPLACE')
+
+    # Report (every vertex has exactly one group, so the argmin gives the counts)
+    if VERBOSE:
+        counts = np.bincount(best, minlength=len(bone_data))
+        for (bone_name, _, _), count in zip(bone_data, counts):
+            print(f"    {bone_name}: {count} vertices")
 
 
 def skin_mesh(mesh_obj: bpy.types.Object, arm_obj: bpy.types.Object):
@@ -24,35 +24,48 @@ echo "=== Fantasy Game Asset Pipeline ==="
 echo "Blender: $("$BLENDER" --version 2>&1 | head -1)"
 echo ""
 
-echo "[1/7] Generating humanoid mesh..."
+echo "[1/6] Generating humanoid mesh..."
 "$BLENDER" --background --python "$PROJECT_ROOT/BlenderPipeline/scripts/generate_humanoid.py" 2>&1 | tail -5
 echo ""
 
-echo "[2/7] Rigging and exporting humanoid..."
+echo "[2/6] Rigging and exporting humanoid..."
 "$BLENDER" --background --python "$PROJECT_ROOT/BlenderPipeline/scripts/rig_and_export.py" 2>&1 | tail -5
 echo ""
 
-echo "[3/7] Generating animations (Idle, Walk, Run, Jump, Attack)..."
-"$BLENDER" --background --python "$PROJECT_ROOT/BlenderPipeline/scripts/generate_animations.py" 2>&1 | tail -5
+echo "[3/6] Generating animations (Idle, Walk, Run, Jump, Attack)..."
+"$BLENDER" --background --python-exit-code 1 --python "$PROJECT_ROOT/BlenderPipeline/scripts/generate_animations.py" 2>&1 | tail -5
 echo ""
 
-echo "[4/7] Generating trees..."
-"$BLENDER" --background --python "$PROJECT_ROOT/BlenderPipeline/scripts/generate_trees.py" 2>&1 | tail -5
-echo ""
-
-echo "[5/7] Generating rocks..."
-"$BLENDER" --background --python "$PROJECT_ROOT/BlenderPipeline/scripts/generate_rocks.py" 2>&1 | tail -5
-echo ""
-
-echo "[6/7] Generating sword..."
-"$BLENDER" --background --python "$PROJECT_ROOT/BlenderPipeline/scripts/generate_sword.py" 2>&1 | tail -5
+# Trees, rocks and sword are independent Blender runs, so they go in parallel;
+# each one's output is kept in its own log and shown once all have finished
+echo "[4/6] Generating trees, rocks and sword..."
+LOG_DIR="$(mktemp -d)"
+trap 'rm -rf "$LOG_DIR"' EXIT
+PIDS=()
+for name in trees rocks sword; do
+    "$BLENDER" --background --python-exit-code 1 \
+        --python "$PROJECT_ROOT/BlenderPipeline/scripts/generate_${name}.py" \
+        >"$LOG_DIR/$name.log" 2>&1 &
+    PIDS+=($!)
+done
+STATUS=0
+for pid in "${PIDS[@]}"; do
+    wait "$pid" || STATUS=1
+done
+for name in trees rocks sword; do
+    tail -5 "$LOG_DIR/$name.log"
+done
+if [[ $STATUS -ne 0 ]]; then
+    echo "ERROR: a tree/rock/sword generator failed (see output above)"
+    exit 1
+fi
 echo ""
 
-echo "[7/8] Generating enemies (Slime, Skeleton, Wolf)..."
+echo "[5/6] Generating enemies (Slime, Skeleton, Wolf)..."
 "$BLENDER" --background --python "$PROJECT_ROOT/BlenderPipeline/scripts/generate_enemies.py" 2>&1 | tail -5
 echo ""
 
-echo "[8/8] Syncing to Unity..."
+echo "[6/6] Syncing to Unity..."
 bash "$PROJECT_ROOT/tools/sync_models.sh"
 echo ""
 